@@ -0,0 +1,234 @@
+"""
+Arena: viele Agenten gleichzeitig auf demselben Spielfeld. Sie konkurrieren um dieselben
+Blumen, sterben auf denselben Minen und lernen in eine gemeinsame Q-Tabelle.
+
+    python arena.py [szenario.json] [--agents 200] [--groups 4] [--rounds 50] [--set KEY=VALUE ...]
+"""
+import argparse
+import sys
+import time
+import numpy as np
+from settings import GRID_COLS, GRID_ROWS, STARVATION_TICKS, FLOWER_BONUS_TICKS
+from gridmodel import WALL, MINE, FLOWER
+from simulation import LayoutGame
+from encoding import PositionEncoder
+from qtable import QTable
+from replay import batch_td_update
+from vecenv import ACTIONS
+
+# Aktionsindex der Bewegung (d_row, d_col), nachgeschlagen über (d_row + 1) * 3 + d_col + 1; -1 = keine
+_ACTION_BY_DELTA = np.full(9, -1, dtype=np.intp)
+for _i, (_d_row, _d_col) in enumerate(ACTIONS.tolist()):
+    _ACTION_BY_DELTA[(_d_row + 1) * 3 + _d_col + 1] = _i
+
+class Arena(LayoutGame):
+    """
+    num_agents Agenten auf einer Karte, im Gleichschritt simuliert. Positionen, Lebendstatus
+    und Zähler liegen als Arrays vor; Aktionswahl, Fressen, Minen und Lernen sind pro Tick
+    wenige Array-Operationen über alle lebenden Agenten. Es gelten die Regeln von
+    HeadlessGame, mit zwei Ergänzungen für das gemeinsame Feld:
+
+      - Agenten blockieren sich nicht gegenseitig, mehrere dürfen auf einer Zelle stehen.
+      - Betreten mehrere Agenten im selben Tick dieselbe Blume, frisst sie ein zufällig
+        gewählter; die anderen gehen leer aus. Eine Mine tötet alle, die sie betreten.
+
+    Die Agenten sind reihum auf groups Gruppen verteilt, jede Gruppe hat eine eigene
+    Q-Tabelle (groups=1: alle teilen sich eine). Die Tabellen liegen gestapelt in Q; alle
+    Übergänge eines Ticks werden gemeinsam per batch_td_update eingespielt, Updates auf
+    dasselbe (Zustand, Aktion)-Paar werden dabei gemittelt.
+
+    Karte und Distanzfelder verwaltet wie bei HeadlessGame die Basisklasse LayoutGame.
+    Eine Runde beginnt mit allen Agenten am Haus und der Startbelegung und endet, wenn
+    alle tot sind. Der Encoder muss encode_batch unterstützen (siehe encoding.py).
+    """
+    def __init__(self, num_agents=100, groups=1, num_mines=100, num_flowers=150, seed=None, grid=None,
+                 rows=GRID_ROWS, cols=GRID_COLS, bunker_size=20, bunker_opening=4, encoder=None,
+                 epsilon=0.1, alpha=0.5, gamma=0.9):
+        self.num_agents = num_agents
+        self.groups = groups
+        self.rng = np.random.default_rng(seed)
+        self._init_layout(grid, rows, cols, bunker_size, bunker_opening, num_mines, num_flowers, seed)
+
+        self.encoder = encoder if encoder is not None else PositionEncoder(self.grid.rows, self.grid.cols)
+        self.Q = QTable((groups,) + tuple(self.encoder.shape))
+        self.num_states = int(np.prod(self.encoder.shape))
+        self.epsilon = epsilon
+        self.alpha = alpha
+        self.gamma = gamma
+
+        self.group = np.arange(num_agents) % groups
+        self.pos = np.empty((num_agents, 2), dtype=np.int32)
+        self.prev_pos = np.empty((num_agents, 2), dtype=np.int32)
+        self.alive = np.empty(num_agents, dtype=bool)
+        self.steps = np.empty(num_agents, dtype=np.int32)
+        self.last_food_step = np.empty(num_agents, dtype=np.int32)
+        self.state = np.empty(num_agents, dtype=np.intp)
+
+        self.round = 0
+        self.record_survival = 0
+        self.record_round = 0
+        self.reset()
+
+    def _random_map_seed(self):
+        return int(self.rng.integers(1 << 32))
+
+    def _remove_sources(self, bit, indices):
+        """Wie _remove_source für mehrere flache Zellindizes."""
+        if bit in self.distance_fields:
+            for index in indices.tolist():
+                self._remove_source(bit, divmod(index, self.grid.cols))
+
+    def table(self, group=0):
+        """Q-Tabelle einer Gruppe als QTable (Sicht, keine Kopie)."""
+        return QTable(values=self.Q.values[group], visited=self.Q.visited[group])
+
+    def reset(self):
+        """Neue Runde: Startbelegung wiederherstellen, alle Agenten ans Haus."""
+        self._restore_layout()
+        self.pos[:] = self.house_pos
+        self.prev_pos[:] = self.house_pos
+        self.alive[:] = True
+        self.steps[:] = 0
+        self.last_food_step[:] = 0
+        self.state[:] = self.observe(np.arange(self.num_agents))
+
+    def observe(self, agents):
+        """Flache Zustandsindizes (inklusive Gruppen-Offset) der angegebenen Agenten."""
+        states = self.encoder.encode_batch(self, self.pos[agents], self.steps[agents] - self.last_food_step[agents])
+        return self.group[agents] * self.num_states + states
+
+    def choose_actions(self, agents):
+        """
+        Epsilon-greedy wie PacManAgent.get_action_index: Die Exploration meidet den direkten
+        Rückweg, die gierige Wahl löst Gleichstände zufällig und nimmt den Rückweg nur,
+        wenn er allein der beste ist.
+        """
+        n = len(agents)
+        delta = self.prev_pos[agents] - self.pos[agents]
+        reverse = _ACTION_BY_DELTA[(delta[:, 0] + 1) * 3 + delta[:, 1] + 1]
+        draw = self.rng.random((n, 6))
+
+        q = self.flat_values()[self.state[agents]]
+        scores = np.where(q == q.max(axis=1, keepdims=True), draw[:, :4], -2.0)
+        has_reverse = reverse >= 0
+        scores[has_reverse, reverse[has_reverse]] -= 1.0
+        actions = scores.argmax(axis=1)
+
+        explore = draw[:, 4] < self.epsilon
+        random_actions = np.where(has_reverse, (draw[:, 5] * 3).astype(np.intp), (draw[:, 5] * 4).astype(np.intp))
+        random_actions += has_reverse & (random_actions >= reverse)
+        actions[explore] = random_actions[explore]
+        return actions
+
+    def flat_values(self):
+        """Alle Q-Tabellen als (Gruppen * Zustände, 4)-Sicht ohne Kopie."""
+        q = self.Q.values.view()
+        q.shape = (-1, self.Q.values.shape[-1])
+        return q
+
+    def step(self):
+        """
+        Ein Tick für alle lebenden Agenten. Gibt die Indizes der Agenten zurück, die in
+        diesem Tick gestorben sind.
+        """
+        agents = np.flatnonzero(self.alive)
+        if len(agents) == 0:
+            return agents
+        grid = self.grid
+        actions = self.choose_actions(agents)
+        states = self.state[agents]
+
+        old_pos = self.pos[agents]
+        new_pos = old_pos + ACTIONS[actions]
+        inside = ((new_pos[:, 0] >= 0) & (new_pos[:, 0] < grid.rows) &
+                  (new_pos[:, 1] >= 0) & (new_pos[:, 1] < grid.cols))
+        # Verlassen des Spielfelds tötet den Agenten, die Position bleibt stehen
+        new_pos[~inside] = old_pos[~inside]
+        self.prev_pos[agents] = old_pos
+        self.pos[agents] = new_pos
+        self.steps[agents] += 1
+
+        rewards = np.full(len(agents), -1.0, dtype=np.float32)
+        index = new_pos[:, 0] * grid.cols + new_pos[:, 1]
+        cell_type = grid.cell_type.reshape(-1)
+        cells = cell_type[index]
+
+        # Blumen: je Zelle frisst der erste in einer zufälligen Reihenfolge
+        eating = np.flatnonzero(((cells & FLOWER) != 0) & inside)
+        if len(eating):
+            eating = self.rng.permutation(eating)
+            eaten, first = np.unique(index[eating], return_index=True)
+            winners = eating[first]
+            rewards[winners] = 10.0
+            self.last_food_step[agents[winners]] += FLOWER_BONUS_TICKS
+            cell_type[eaten] &= ~FLOWER & 0xFF
+            self._remove_sources(FLOWER, eaten)
+
+        mined = ((cells & MINE) != 0) & inside
+        if mined.any():
+            exploded = np.unique(index[mined])
+            cell_type[exploded] &= ~MINE & 0xFF
+            self._remove_sources(MINE, exploded)
+        dead = ~inside | mined | ((cells & WALL) != 0)
+        rewards[dead] = -100.0
+
+        next_states = self.observe(agents)
+        batch_td_update(self.flat_values(), states, actions, rewards, next_states, dead, self.alpha, self.gamma)
+        self.Q.visited.reshape(-1)[states] = True
+        self.Q.visited.reshape(-1)[next_states] = True
+        self.state[agents] = next_states
+
+        # Verhungern wie in HeadlessGame erst nach dem Lernschritt
+        dead |= self.steps[agents] - self.last_food_step[agents] >= STARVATION_TICKS
+        died = agents[dead]
+        self.alive[died] = False
+        return died
+
+    def run_round(self, max_steps=None):
+        """
+        Spielt eine Runde bis alle tot sind (oder max_steps) und setzt danach zurück.
+        Gibt die Überlebenszeiten aller Agenten in Ticks zurück.
+        """
+        ticks = 0
+        while self.alive.any() and (max_steps is None or ticks < max_steps):
+            self.step()
+            ticks += 1
+        survival = self.steps.copy()
+        self.round += 1
+        best = int(survival.max())
+        if best > self.record_survival:
+            self.record_survival = best
+            self.record_round = self.round
+        self.reset()
+        return survival
+
+    def group_survival(self, survival):
+        """Mittlere Überlebenszeit je Gruppe."""
+        return np.bincount(self.group, weights=survival, minlength=self.groups) / np.bincount(self.group, minlength=self.groups)
+
+def main(argv=None):
+    from scenario import load_scenarios, parse_overrides
+    parser = argparse.ArgumentParser(description="Viele Agenten auf einem Spielfeld mit gemeinsamer Q-Tabelle")
+    parser.add_argument("scenario", nargs="?", help="Szenario-Datei (JSON)")
+    parser.add_argument("--set", action="append", metavar="KEY=VALUE", help="Szenario-Wert überschreiben")
+    parser.add_argument("--agents", type=int, help="Anzahl Agenten (überschreibt das Szenario)")
+    parser.add_argument("--groups", type=int, help="Anzahl Q-Tabellen, auf die die Agenten verteilt werden")
+    parser.add_argument("--rounds", type=int, help="Anzahl Runden (Standard: generations des Szenarios)")
+    args = parser.parse_args(argv)
+
+    scenario = load_scenarios([args.scenario] if args.scenario else [], parse_overrides(args.set))[0]
+    arena = scenario.make_arena(args.agents, args.groups)
+    rounds = args.rounds if args.rounds is not None else scenario["generations"]
+    for _ in range(rounds):
+        start = time.perf_counter()
+        survival = arena.run_round()
+        elapsed = time.perf_counter() - start
+        print(f"Runde {arena.round}: best {survival.max()} ticks, mean {survival.mean():.1f} ticks, "
+              f"{survival.sum() / elapsed:.0f} Agentenschritte/s")
+        if scenario["fresh_layouts"]:
+            arena.new_layout()
+    print(f"Record: Runde {arena.record_round} mit {arena.record_survival} Ticks")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
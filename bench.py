@@ -0,0 +1,270 @@
+"""
+Reproduzierbare Benchmarks für Simulation, Lernen und Rendering.
+
+    python bench.py                          # alle Benchmarks, Ergebnis als JSON auf stdout
+    python bench.py --output results.json    # zusätzlich in Datei schreiben
+    python bench.py --save-baseline base.json
+    python bench.py --baseline base.json     # Exit-Code 1 bei Regression
+
+Gezeichnet wird mit dem Dummy-Videotreiber von SDL, es öffnet sich kein Fenster.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import numpy as np
+
+GRID_SIZES = [(100, 100), (250, 250), (500, 500)]
+POPULATION_SIZES = [3, 10, 50]
+SCREEN_SIZE = (1920, 1080)
+SEED = 1234
+
+def measure(func, min_time=0.2, repeat=3):
+    """
+    Führt func so oft aus, bis min_time Sekunden vergangen sind, und wiederholt das
+    repeat-mal. Zurück kommt die beste Zeit pro Aufruf in Sekunden.
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        calls = 0
+        start = time.perf_counter()
+        while True:
+            func()
+            calls += 1
+            elapsed = time.perf_counter() - start
+            if elapsed >= min_time:
+                break
+        best = min(best, elapsed / calls)
+    return best
+
+def result(value, unit, higher_is_better):
+    return {"value": value, "unit": unit, "higher_is_better": higher_is_better}
+
+def bench_simulation(results, min_time):
+    from simulation import HeadlessGame
+    random.seed(SEED)
+    game = HeadlessGame(seed=SEED)
+
+    def step():
+        if not game.pacman.alive:
+            game.reset()
+        game.step()
+    results["headless.steps_per_sec"] = result(1 / measure(step, min_time), "steps/s", True)
+
+    pacman = game.pacman
+    pacman.prev_state = (10, 10)
+    pacman.prev_action = (0, 1)
+    results["agent.td_updates_per_sec"] = result(
+        1 / measure(lambda: pacman.learn(-1, (10, 11)), min_time), "updates/s", True)
+    results["agent.get_action_per_sec"] = result(
+        1 / measure(lambda: pacman.get_action((10, 11)), min_time), "calls/s", True)
+
+    from vecenv import VecPacManEnv
+    env = VecPacManEnv(1024, seed=SEED)
+    actions = env.rng.integers(0, 4, env.num_envs)
+
+    def vec_step():
+        _, dones = env.step(actions)
+        env.reset(dones)
+    results["vecenv.us_per_env_step"] = result(
+        measure(vec_step, min_time) / env.num_envs * 1e6, "µs", False)
+
+def _random_layout(grid, rng):
+    from gridmodel import WALL, MINE, FLOWER
+    cells = grid.rows * grid.cols
+    picks = rng.choice(cells, size=cells // 20, replace=False)
+    third = len(picks) // 3
+    for bit, part in ((WALL, picks[:third]), (MINE, picks[third:2 * third]), (FLOWER, picks[2 * third:])):
+        grid.cell_type.reshape(-1)[part] |= bit
+
+def bench_grid(results, min_time):
+    import pygame
+    from gridmodel import GridModel, WALL, MINE, FLOWER
+    from field import draw_full_grid_with_lines, overpaint_walls, draw_house_marker, VisitDecay
+    from mines import draw_mines
+    from food import draw_flowers
+    from renderer import GridRenderer
+    from heatmap import Heatmap, overlay_levels
+    from qtable import QTable
+
+    pygame.display.init()
+    screen = pygame.display.set_mode(SCREEN_SIZE)
+    for rows, cols in GRID_SIZES:
+        key = f"{rows}x{cols}"
+        rng = np.random.default_rng(SEED)
+        grid = GridModel(rows, cols, *SCREEN_SIZE)
+        _random_layout(grid, rng)
+        grid.visit_count[...] = rng.integers(0, 6, grid.shape)
+        walls, mines, flowers = grid.layer(WALL), grid.layer(MINE), grid.layer(FLOWER)
+        house = (rows // 2, cols // 2)
+
+        draw_times = {
+            "draw_full_grid_with_lines": lambda: draw_full_grid_with_lines(screen, grid),
+            "overpaint_walls": lambda: overpaint_walls(screen, grid, walls),
+            "draw_house_marker": lambda: draw_house_marker(screen, grid, house),
+            "draw_mines": lambda: draw_mines(screen, grid, mines),
+            "draw_flowers": lambda: draw_flowers(screen, grid, flowers),
+        }
+        for name, func in draw_times.items():
+            results[f"draw.{name}.{key}.ms"] = result(measure(func, min_time, repeat=1) * 1e3, "ms", False)
+
+        # Diagnoseansicht: Stufen berechnen, einfärben, skalieren (ohne Pfeile ein Blit)
+        q_table = QTable(grid.shape)
+        q_table.values[...] = rng.standard_normal(q_table.values.shape)
+        q_table.visited[...] = rng.random(grid.shape) < 0.5
+        heatmap = Heatmap(SCREEN_SIZE, grid.shape)
+        for overlay in ("q_max", "policy"):
+            results[f"heatmap.{overlay}.{key}.ms"] = result(measure(
+                lambda: heatmap.update(*overlay_levels(overlay, grid, q_table)), min_time, repeat=1) * 1e3, "ms", False)
+
+        renderer = GridRenderer(screen, grid, walls, house)
+        renderer.redraw_all(mines, flowers)
+        renderer.begin_frame(mines, flowers)
+        renderer.present()
+        positions = [tuple(p) for p in rng.integers(0, [rows, cols], (64, 2))]
+
+        def incremental_frame():
+            renderer.mark_cells(positions[:4])
+            positions.append(positions.pop(0))
+            renderer.begin_frame(mines, flowers)
+            renderer.add_rect(grid.rect(positions[0]))
+            renderer.present()
+        results[f"render.incremental_frame.{key}.ms"] = result(measure(incremental_frame, min_time) * 1e3, "ms", False)
+
+        decay = VisitDecay(grid)
+        active = [tuple(p) for p in rng.integers(0, [rows, cols], (200, 2))]
+
+        def decay_frame():
+            for pos in active[:2]:
+                decay.visit(pos)
+            active.append(active.pop(0))
+            decay.update(1 / 60, speed_factor=10)
+        results[f"visit_decay.update.{key}.us"] = result(measure(decay_frame, min_time) * 1e6, "µs", False)
+    pygame.display.quit()
+
+def bench_fields(results, min_time):
+    from gridmodel import GridModel, FLOWER
+    from distfield import DistanceField
+    for rows, cols in GRID_SIZES:
+        key = f"{rows}x{cols}"
+        rng = np.random.default_rng(SEED)
+        grid = GridModel(rows, cols, *SCREEN_SIZE)
+        _random_layout(grid, rng)
+        field = DistanceField(grid, FLOWER)
+        results[f"distfield.compute.{key}.ms"] = result(measure(field.compute, min_time, repeat=1) * 1e3, "ms", False)
+
+        initial = field.state()
+        flowers = np.argwhere(grid.cell_type & FLOWER)
+        picks = [tuple(p) for p in flowers[rng.choice(len(flowers), 32, replace=False)].tolist()]
+
+        def remove_flowers():
+            for pos in picks:
+                field.remove_source(pos)
+            field.restore(initial)
+        field.remove_source(picks[0])
+        field.restore(initial)
+        results[f"distfield.remove_source.{key}.us"] = result(
+            measure(remove_flowers, min_time, repeat=1) / len(picks) * 1e6, "µs", False)
+
+        positions = [tuple(p) for p in rng.integers(0, [rows, cols], (64, 2)).tolist()]
+        results[f"distfield.step_towards.{key}.us"] = result(
+            measure(lambda: [field.step_towards(pos) for pos in positions], min_time) / len(positions) * 1e6, "µs", False)
+
+def bench_merge(results, min_time):
+    from evolution import Recombiner
+    variants = {
+        "mean": Recombiner(seed=SEED),
+        "weighted": Recombiner("weighted", seed=SEED),
+        "uniform": Recombiner("uniform", seed=SEED),
+        "blockwise": Recombiner("blockwise", seed=SEED),
+        "mean_gaussian": Recombiner(mutation="gaussian", seed=SEED),
+    }
+    for rows, cols in GRID_SIZES:
+        rng = np.random.default_rng(SEED)
+        for population in POPULATION_SIZES:
+            values = rng.standard_normal((population, rows, cols, 4)).astype(np.float32)
+            visited = rng.random((population, rows, cols)) < 0.3
+            fitness = rng.integers(1, 500, population)
+            for name, recombiner in variants.items():
+                results[f"merge.{name}.{rows}x{cols}.elite{population}.ms"] = result(
+                    measure(lambda: recombiner.combine(values, visited, fitness), min_time, repeat=1) * 1e3, "ms", False)
+
+ARENA_SIZES = [10, 100, 1000]
+
+def bench_arena(results, min_time):
+    from arena import Arena
+    from encoding import LocalEncoder
+    for encoder in ("position", "local"):
+        for agents in ARENA_SIZES:
+            arena = Arena(agents, seed=SEED, encoder=LocalEncoder() if encoder == "local" else None)
+
+            def tick():
+                if not arena.alive.any():
+                    arena.reset()
+                arena.step()
+            results[f"arena.{encoder}.agents{agents}.agent_steps_per_sec"] = result(
+                agents / measure(tick, min_time), "steps/s", True)
+
+def compare(results, baseline, tolerance):
+    """
+    Vergleicht mit einer gespeicherten Baseline. Gibt die Liste der Regressionen zurück
+    (Messwerte, die um mehr als tolerance relativ schlechter sind).
+    """
+    regressions = []
+    for name, entry in baseline.items():
+        if name not in results:
+            continue
+        old = entry["value"]
+        new = results[name]["value"]
+        if entry["higher_is_better"]:
+            worse = new < old * (1 - tolerance)
+        else:
+            worse = new > old * (1 + tolerance)
+        if worse:
+            regressions.append(f"{name}: {old:.4g} -> {new:.4g} {entry['unit']}")
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks für die Hot Paths von Learning-Pac")
+    parser.add_argument("--output", help="Ergebnisse als JSON in diese Datei schreiben")
+    parser.add_argument("--baseline", help="mit dieser Baseline vergleichen, Exit-Code 1 bei Regression")
+    parser.add_argument("--save-baseline", help="Ergebnisse als neue Baseline speichern")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="erlaubte relative Verschlechterung (Standard 0.2)")
+    parser.add_argument("--min-time", type=float, default=0.2, help="Mindestmessdauer pro Benchmark in Sekunden")
+    parser.add_argument("--only", choices=["simulation", "grid", "fields", "merge", "arena"], action="append",
+                        help="nur diese Gruppe(n) ausführen")
+    args = parser.parse_args(argv)
+
+    groups = {"simulation": bench_simulation, "grid": bench_grid, "fields": bench_fields, "merge": bench_merge,
+              "arena": bench_arena}
+    results = {}
+    for name in args.only or groups:
+        groups[name](results, args.min_time)
+
+    report = {"seed": SEED, "python": sys.version.split()[0], "numpy": np.__version__, "results": results}
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    print(text)
+    for path in (args.output, args.save_baseline):
+        if path:
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(text)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)["results"]
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print("Performance-Regressionen:", file=sys.stderr)
+            for line in regressions:
+                print("  " + line, file=sys.stderr)
+            return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,109 +1,146 @@
-import pygame
 import random
-import time
 import math
+import numpy as np
+from settings import GRID_ROWS, GRID_COLS
+from qtable import QTable, ACTIONS, ACTION_INDEX
+from replay import ReplayBuffer
+from encoding import PositionEncoder
+from evolution import mutate as mutate_q
+from gridmodel import load_pygame
 
 class PacManAgent:
-    def __init__(self, start_pos, cell_size, generation=1):
+    def __init__(self, start_pos, cell_size, generation=1, encoder=None, grid_shape=(GRID_ROWS, GRID_COLS)):
         """
         start_pos: Tuple (row, col) – Startposition im Grid.
         cell_size: Pixelgröße einer Zelle.
         generation: Startgeneration (standardmäßig 1).
+        encoder: Zustandskodierung (siehe encoding.py), standardmäßig die Position.
+        grid_shape: (rows, cols) des Spielfelds; außerhalb stirbt der Agent.
         """
         self.pos = start_pos
+        self.rows, self.cols = grid_shape
         self.cell_size = cell_size
         self.generation = generation
 
-        self.start_time = time.time()
-        self.last_food_time = self.start_time
         self.alive = True
         self.survival_time = 0.0
 
-        # Q-Tabelle: Zustand (Position) -> { Aktion: Q-Wert }
-        # Wir verwenden als Zustand einfach die Position (row, col).
-        self.Q = {}
-        self.actions = [(0, 1), (0, -1), (1, 0), (-1, 0)]
-        self._initialize_state(self.pos)
+        # Schrittzähler: Überlebens- und Hungerzeit werden in Ticks gemessen
+        self.steps = 0
+        self.last_food_step = 0
+
+        # Q-Tabelle: Zustand -> 4 Q-Werte (Index wie in self.actions)
+        # Ohne Encoder ist der Zustand einfach die Position (row, col).
+        self.encoder = encoder if encoder is not None else PositionEncoder(self.rows, self.cols)
+        self.Q = QTable(self.encoder.shape)
+        self.actions = list(ACTIONS)
+        self.state = self.encoder.default_state(self)
+        self._initialize_state(self.state)
 
         # Parameter für Q-Learning
         self.epsilon = 0.1    # Explorationsrate (epsilon-greedy)
         self.alpha = 0.5      # Lernrate
         self.gamma = 0.9      # Diskontfaktor
 
-        self.last_move_time = self.start_time
-        self.move_delay = 0.4  # Zeit zwischen Bewegungen (in Sekunden)
-
         self.prev_state = None
         self.prev_action = None
 
         self.prev_pos = start_pos  # Verhindert direkten Rückweg
 
+        # Optionaler Replay-Speicher (siehe enable_replay)
+        self.replay = None
+        self.replay_batch_size = 32
+        self.replay_every = 4
+        self._replay_counter = 0
+
+    def enable_replay(self, capacity=100000, batch_size=32, replay_every=4, prioritized=False, seed=None):
+        """
+        Speichert jeden Übergang in einem Replay-Speicher und führt alle replay_every
+        Schritte ein vektorisiertes Mini-Batch-Update auf der Q-Tabelle aus.
+        Ohne seed wird der Seed des Speichers aus dem globalen Zufallsgenerator gezogen.
+        """
+        seed = seed if seed is not None else random.getrandbits(32)
+        self.replay = ReplayBuffer(capacity, prioritized=prioritized, seed=seed)
+        self.replay_batch_size = batch_size
+        self.replay_every = replay_every
+        self._replay_counter = 0
+
     def _initialize_state(self, state):
-        if state not in self.Q:
-            self.Q[state] = {action: 0.0 for action in self.actions}
+        self.Q.initialize(state)
 
-    def get_action(self, state):
-        self._initialize_state(state)
+    def _reverse_index(self):
+        """Index der Aktion, die direkt zurück auf prev_pos führen würde (sonst -1)."""
+        if self.prev_pos is None:
+            return -1
+        return ACTION_INDEX.get((self.prev_pos[0] - self.pos[0], self.prev_pos[1] - self.pos[1]), -1)
+
+    def get_action_index(self, state):
+        self.Q.visited[state] = True
+        reverse = self._reverse_index()
         # Epsilon-greedy Auswahl:
         if random.random() < self.epsilon:
-            possible_actions = list(self.Q[state].keys())
             # Vermeide den unmittelbaren Rückweg, falls möglich:
-            if self.prev_pos is not None:
-                filtered = [a for a in possible_actions if (state[0] + a[0], state[1] + a[1]) != self.prev_pos]
-                if filtered:
-                    possible_actions = filtered
-            return random.choice(possible_actions)
-        else:
-            max_q = max(self.Q[state].values())
-            best_actions = [a for a, q in self.Q[state].items() if q == max_q]
-            if self.prev_pos is not None:
-                filtered = [a for a in best_actions if (state[0] + a[0], state[1] + a[1]) != self.prev_pos]
-                if filtered:
-                    best_actions = filtered
-            return random.choice(best_actions)
-
-    def update(self, grid, obstacles, food_positions, speed_factor=1):
-        current_time = time.time()
-        self.survival_time = current_time - self.start_time
-
-        # Tod, wenn 20 echte Sekunden ohne Nahrung vergangen sind:
-        if current_time - self.last_food_time >= 20:
-            self.alive = False
+            if reverse < 0:
+                return random.randrange(4)
+            index = random.randrange(3)
+            return index + 1 if index >= reverse else index
+        q = self.Q.values[state].tolist()
+        max_q = max(q)
+        # Gleichstände zufällig auflösen (Reservoir-Sampling), Rückweg nur als letzte Wahl
+        best = -1
+        ties = 0
+        for index in range(4):
+            if q[index] == max_q and index != reverse:
+                ties += 1
+                if random.random() * ties < 1:
+                    best = index
+        return best if best >= 0 else reverse
 
-        # Bewegung erfolgt beschleunigt über den speed_factor:
-        if current_time - self.last_move_time >= self.move_delay / speed_factor:
-            self.last_move_time = current_time
-            state = self.pos
-            action = self.get_action(state)
-            self.prev_state = state
-            self.prev_action = action
-            self.prev_pos = self.pos
-            self.move(action)
-
-        # Nahrung prüfen:
-        if self.pos in food_positions:
-            self.last_food_time = current_time
-
-        # Kollision mit Hindernissen:
-        if self.pos in obstacles:
-            self.alive = False
+    def get_action(self, state):
+        return self.actions[self.get_action_index(state)]
+
+    def observe(self, world):
+        """Kodiert den aktuellen Zustand mit dem Encoder und merkt ihn sich in self.state."""
+        self.state = self.encoder.encode(self, world)
+        return self.state
+
+    def step(self):
+        """
+        Führt genau einen Bewegungsschritt aus, unabhängig von der Wanduhr.
+        Wird pro Tick aufgerufen (HeadlessGame.step, simulate_tick); als Zustand dient
+        die zuletzt mit observe() kodierte Beobachtung.
+        """
+        state = self.state
+        action = self.get_action(state)
+        self.prev_state = state
+        self.prev_action = action
+        self.prev_pos = self.pos
+        self.move(action)
+        self.steps += 1
 
     def move(self, action):
         row, col = self.pos
         d_row, d_col = action
         new_state = (row + d_row, col + d_col)
-        from settings import GRID_ROWS, GRID_COLS
-        if not (0 <= new_state[0] < GRID_ROWS and 0 <= new_state[1] < GRID_COLS):
+        if not (0 <= new_state[0] < self.rows and 0 <= new_state[1] < self.cols):
             self.alive = False
         else:
-            self._initialize_state(new_state)
             self.pos = new_state
 
     def learn(self, reward, new_state):
-        self._initialize_state(new_state)
-        old_q = self.Q[self.prev_state][self.prev_action]
-        max_next = max(self.Q[new_state].values())
-        self.Q[self.prev_state][self.prev_action] = old_q + self.alpha * (reward + self.gamma * max_next - old_q)
+        values = self.Q.values
+        self.Q.visited[new_state] = True
+        row = values[self.prev_state]
+        index = ACTION_INDEX[self.prev_action]
+        old_q = row[index]
+        max_next = values[new_state].max()
+        row[index] = old_q + self.alpha * (reward + self.gamma * max_next - old_q)
+        if self.replay is not None:
+            self.replay.add(self.Q.flat_index(self.prev_state), index, reward,
+                            self.Q.flat_index(new_state), not self.alive)
+            self._replay_counter += 1
+            if self._replay_counter % self.replay_every == 0 and len(self.replay) >= self.replay_batch_size:
+                self.replay.train(self.Q, self.replay_batch_size, self.alpha, self.gamma)
 
     def compute_intelligence(self, record_survival):
         """
@@ -118,8 +155,8 @@ class PacManAgent:
             survival_factor = self.survival_time / record_survival
         else:
             survival_factor = 1
-        self._initialize_state(self.pos)
-        learning_factor = max(0, max(self.Q[self.pos].values()))
+        self._initialize_state(self.state)
+        learning_factor = max(0, self.Q.best_value(self.state))
         # Kombiniere beide Faktoren (0.5 * survival + 0.5 * learning), skaliere mit 100:
         intelligence = (0.5 * survival_factor + 0.5 * learning_factor) * 100
         return intelligence
@@ -131,16 +168,17 @@ class PacManAgent:
         Für eine sinnvolle Bewertung im Kontext des Lernens über Generationen sollte compute_intelligence(record_survival)
         verwendet werden.
         """
-        self._initialize_state(self.pos)
-        max_q = max(self.Q[self.pos].values())
+        self._initialize_state(self.state)
+        max_q = self.Q.best_value(self.state)
         return round(max_q * 100)
 
     def draw(self, screen, grid):
+        pygame = load_pygame()
         cell_rect = grid[self.pos]["rect"]
         center = cell_rect.center
         radius = cell_rect.width // 2
         # Zeichne den Körper als blauen Kreis
-        pygame.draw.circle(screen, (0, 0, 255), center, radius)
+        body_rect = pygame.draw.circle(screen, (0, 0, 255), center, radius)
         # Zeichne den Mund als weißen Keil (Bogen von -30° bis +30°)
         start_angle = -math.pi / 6
         end_angle = math.pi / 6
@@ -159,28 +197,26 @@ class PacManAgent:
         eye_center = (center[0] + eye_offset_x, center[1] + eye_offset_y)
         eye_radius = max(1, radius // 8)
         pygame.draw.circle(screen, (255, 255, 255), eye_center, eye_radius)
+        # Bemalter Bereich (für inkrementelles Neuzeichnen)
+        return body_rect.union(cell_rect)
 
     def reinforce(self, reward):
         if self.prev_state is not None and self.prev_action is not None:
-            self.learn(reward, self.pos)
+            self.learn(reward, self.state)
 
     def mutate(self, mutation_rate=0.05, mutation_strength=0.1):
-        for state in self.Q:
-            for action in self.Q[state]:
-                if random.random() < mutation_rate:
-                    factor = 1 + random.uniform(-mutation_strength, mutation_strength)
-                    self.Q[state][action] *= factor
-            total = sum(self.Q[state].values())
-            if total != 0:
-                for action in self.Q[state]:
-                    self.Q[state][action] /= total
+        rng = np.random.default_rng(random.getrandbits(32))
+        draw = rng.random((1,) + self.Q.values.shape)
+        mutate_q(self.Q.values, self.Q.visited, draw, mutation_rate, mutation_strength, normalize=True)
 
     def reset(self, new_start):
         self.pos = new_start
-        self.start_time = time.time()
-        self.last_food_time = self.start_time
+        # Wie in __init__: keine Rückweg-Sperre aus der vorigen Episode mitnehmen
+        self.prev_pos = new_start
+        self.state = self.encoder.default_state(self)
         self.alive = True
         self.survival_time = 0.0
         self.prev_state = None
         self.prev_action = None
-        self.last_move_time = self.start_time
+        self.steps = 0
+        self.last_food_step = 0
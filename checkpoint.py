@@ -0,0 +1,166 @@
+import json
+import os
+import random
+import struct
+import numpy as np
+from qtable import QTable
+
+# Dateiformat: MAGIC | Version (uint32) | Header-Länge (uint32) | JSON-Header | Arrays
+# Der Header enthält die Metadaten sowie Offset, Form und Datentyp jedes Arrays.
+# Die Arrays liegen 64-Byte-ausgerichtet dahinter und werden beim Laden per memmap
+# eingeblendet, sodass kein pygame und kein Parsen großer Datenmengen nötig ist.
+MAGIC = b"PACQ"
+VERSION = 1
+ALIGNMENT = 64
+
+def _align(offset):
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+def write_checkpoint(path, meta, arrays):
+    """
+    Schreibt Metadaten (JSON-serialisierbares Dict) und NumPy-Arrays in eine Datei.
+    Es wird zuerst in eine temporäre Datei geschrieben und dann atomar ersetzt,
+    damit ein Absturz während des Speicherns den letzten Checkpoint nicht zerstört.
+    """
+    arrays = {name: np.ascontiguousarray(array) for name, array in arrays.items()}
+    layout = {}
+    offset = 0
+    for name, array in arrays.items():
+        layout[name] = {"offset": offset, "shape": list(array.shape), "dtype": array.dtype.str}
+        offset = _align(offset + array.nbytes)
+    # Die Header-Länge hängt von den absoluten Offsets ab und umgekehrt;
+    # so lange vergrößern, bis der Header vor den Daten Platz hat.
+    data_start = 0
+    while True:
+        header = json.dumps({"meta": meta, "arrays": {
+            name: dict(entry, offset=entry["offset"] + data_start) for name, entry in layout.items()
+        }}).encode("utf-8")
+        needed = _align(len(MAGIC) + 8 + len(header))
+        if needed <= data_start:
+            break
+        data_start = needed
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(MAGIC)
+        f.write(struct.pack("<II", VERSION, len(header)))
+        f.write(header)
+        for name, array in arrays.items():
+            f.seek(data_start + layout[name]["offset"])
+            f.write(array.tobytes())
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+def read_checkpoint(path):
+    """
+    Liest einen Checkpoint. Gibt (meta, arrays) zurück; die Arrays sind schreibgeschützte
+    Memory-Maps auf die Datei.
+    """
+    with open(path, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} ist kein Checkpoint")
+        version, header_length = struct.unpack("<II", f.read(8))
+        if version != VERSION:
+            raise ValueError(f"Checkpoint-Version {version} wird nicht unterstützt")
+        header = json.loads(f.read(header_length).decode("utf-8"))
+    arrays = {}
+    for name, entry in header["arrays"].items():
+        shape = tuple(entry["shape"])
+        if int(np.prod(shape)) == 0:
+            arrays[name] = np.empty(shape, dtype=entry["dtype"])
+        else:
+            arrays[name] = np.memmap(path, dtype=entry["dtype"], mode="r", offset=entry["offset"], shape=shape)
+    return header["meta"], arrays
+
+def random_state(rng=random):
+    """Zustand eines random-Generators (Standard: der globale) als JSON-taugliche Liste."""
+    version, internal, gauss_next = rng.getstate()
+    return [version, list(internal), gauss_next]
+
+def restore_random_state(state, rng=random):
+    version, internal, gauss_next = state
+    rng.setstate((version, tuple(internal), gauss_next))
+
+def save_training(path, pacman, tracker, map_seed=None):
+    """
+    Speichert Agent (Q-Tabelle, Generation, Lernparameter) und GenerationTracker
+    (Rekord, Stillstandszähler, gesammelte Generationen für die nächste Elite-Mittelung)
+    sowie den Zustand der Zufallsgeneratoren (global und Recombiner), damit das
+    Fortsetzen genau wie ein ununterbrochener Lauf weiterspielt. map_seed ist die Karte
+    der nächsten Generation; beim Fortsetzen wird sie wieder geladen, damit eine
+    positionskodierte Q-Tabelle auf der Karte weiterspielt, die sie gelernt hat. Ein
+    aktiver Replay-Speicher wird samt Generatorzustand mitgespeichert.
+    """
+    meta = {
+        "generation": pacman.generation,
+        "epsilon": pacman.epsilon,
+        "alpha": pacman.alpha,
+        "gamma": pacman.gamma,
+        "encoder": pacman.encoder.name,
+        "record_generation": tracker.record_generation,
+        "record_survival": tracker.record_survival,
+        "no_improvement_counter": tracker.no_improvement_counter,
+        "generation_survival": [entry[0] for entry in tracker.generation_data],
+        "random_state": random_state(),
+        "recombiner_state": tracker.recombiner.rng.bit_generator.state,
+        "map_seed": map_seed,
+    }
+    tables = [entry[1] for entry in tracker.generation_data]
+    arrays = {
+        "q_values": pacman.Q.values,
+        "q_visited": pacman.Q.visited,
+        "generation_values": np.stack([t.values for t in tables]) if tables else np.empty((0,) + pacman.Q.values.shape, np.float32),
+        "generation_visited": np.stack([t.visited for t in tables]) if tables else np.empty((0,) + pacman.Q.visited.shape, bool),
+    }
+    if pacman.replay is not None:
+        replay_meta, replay_arrays = pacman.replay.state()
+        meta["replay"] = dict(replay_meta, counter=pacman._replay_counter)
+        arrays.update({f"replay_{name}": array for name, array in replay_arrays.items()})
+    write_checkpoint(path, meta, arrays)
+
+def resume_training(path, pacman, tracker):
+    """
+    Wie load_training, aber ohne Datei oder bei einem Checkpoint, der nicht zum Agenten
+    passt (anderer Encoder oder andere Feldgröße), beginnt das Training mit einer Meldung
+    neu, statt abzubrechen. Gibt die Metadaten oder None zurück.
+    """
+    if not os.path.exists(path):
+        return None
+    try:
+        return load_training(path, pacman, tracker)
+    except ValueError as e:
+        print(f"{e} – Training beginnt neu")
+        return None
+
+def load_training(path, pacman, tracker):
+    """
+    Stellt den mit save_training gespeicherten Zustand in pacman und tracker wieder her.
+    Checkpoints des PopulationTrainer (ohne Lernparameter und Generationsdaten) und
+    ältere Checkpoints ohne Zufallszustand werden ebenfalls akzeptiert.
+    """
+    meta, arrays = read_checkpoint(path)
+    if arrays["q_visited"].shape != pacman.Q.shape:
+        raise ValueError(f"Checkpoint {path} passt nicht zum Encoder {pacman.encoder.name!r} "
+                         f"(Zustandsform {arrays['q_visited'].shape} statt {pacman.Q.shape})")
+    pacman.Q = QTable(values=np.array(arrays["q_values"]), visited=np.array(arrays["q_visited"]))
+    pacman.generation = meta["generation"]
+    pacman.epsilon = meta["epsilon"]
+    pacman.alpha = meta.get("alpha", pacman.alpha)
+    pacman.gamma = meta.get("gamma", pacman.gamma)
+    tracker.record_generation = meta["record_generation"]
+    tracker.record_survival = meta["record_survival"]
+    tracker.no_improvement_counter = meta["no_improvement_counter"]
+    tracker.generation_data = [
+        (survival, QTable(values=np.array(arrays["generation_values"][i]), visited=np.array(arrays["generation_visited"][i])))
+        for i, survival in enumerate(meta.get("generation_survival", []))
+    ]
+    if "random_state" in meta:
+        restore_random_state(meta["random_state"])
+    if "recombiner_state" in meta:
+        tracker.recombiner.rng.bit_generator.state = meta["recombiner_state"]
+    if pacman.replay is not None and "replay" in meta:
+        pacman.replay.restore(meta["replay"], {name[len("replay_"):]: array for name, array in arrays.items()
+                                               if name.startswith("replay_")})
+        pacman._replay_counter = meta["replay"]["counter"]
+    return meta
@@ -0,0 +1,169 @@
+import heapq
+from collections import deque
+import numpy as np
+from gridmodel import WALL
+from qtable import ACTIONS
+
+# Distanz für Zellen, die von keiner Quelle aus erreichbar sind
+UNREACHABLE = np.iinfo(np.int32).max
+
+class DistanceField:
+    """
+    Schrittdistanz jeder Zelle zur nächsten Zelle mit dem Bit source_bit (Multi-Source-BFS,
+    4er-Nachbarschaft). Zellen mit blocked_bits werden nicht betreten – für Blumen und
+    Minen sind das die Bunkerwände. Neben der Distanz wird der flache Index der nächsten
+    Quelle gespeichert (label), damit beim Entfernen einer Quelle nur deren Einzugsgebiet
+    neu berechnet werden muss.
+
+    Abfragen (distance, nearest, step_towards) kosten O(1).
+    """
+    def __init__(self, grid, source_bit, blocked_bits=WALL):
+        self.grid = grid
+        self.source_bit = source_bit
+        self.blocked_bits = blocked_bits & ~source_bit
+        self.dist = np.full(grid.shape, UNREACHABLE, dtype=np.int32)
+        self.label = np.full(grid.shape, -1, dtype=np.int32)
+        # Flache Sichten für die inkrementellen Updates
+        self._dist = self.dist.reshape(-1)
+        self._label = self.label.reshape(-1)
+        self._table = None
+        self.compute()
+
+    def compute(self):
+        """Berechnet das ganze Feld neu; eine Distanzstufe pro Iteration, vektorisiert."""
+        grid = self.grid
+        cell_type = grid.cell_type
+        dist, label = self.dist, self.label
+        dist.fill(UNREACHABLE)
+        label.fill(-1)
+        frontier = (cell_type & self.source_bit) != 0
+        # Noch nicht erreichte, betretbare Zellen
+        candidates = ((cell_type & self.blocked_bits) == 0) & ~frontier
+        dist[frontier] = 0
+        label[frontier] = np.flatnonzero(frontier)
+        shifts = [((slice(max(d_row, 0), grid.rows + min(d_row, 0)), slice(max(d_col, 0), grid.cols + min(d_col, 0))),
+                   (slice(max(-d_row, 0), grid.rows + min(-d_row, 0)), slice(max(-d_col, 0), grid.cols + min(-d_col, 0))))
+                  for d_row, d_col in ACTIONS]
+        level = 0
+        while frontier.any():
+            level += 1
+            reached = np.zeros(grid.shape, dtype=bool)
+            for dst, src in shifts:
+                # Zielbereich dst wird vom verschobenen Bereich src aus erreicht
+                new = frontier[src] & candidates[dst]
+                candidates[dst] &= ~new
+                reached[dst] |= new
+                np.copyto(label[dst], label[src], where=new)
+            dist[reached] = level
+            frontier = reached
+
+    def state(self):
+        """Kopie von Distanz und Labels, z. B. für das Zurücksetzen auf die Startbelegung."""
+        return self.dist.copy(), self.label.copy()
+
+    def restore(self, state):
+        self.dist[...] = state[0]
+        self.label[...] = state[1]
+
+    def _neighbour_table(self):
+        """
+        Nachbarindizes jeder Zelle als (Zellen, 4)-Array (-1 außerhalb des Felds) und als
+        Liste von Tupeln für die Python-Schleifen der inkrementellen Updates.
+        """
+        if self._table is None:
+            rows, cols = self.grid.shape
+            index = np.arange(rows * cols, dtype=np.int32).reshape(rows, cols)
+            table = np.full((rows, cols, 4), -1, dtype=np.int32)
+            table[:, :-1, 0] = index[:, 1:]
+            table[:, 1:, 1] = index[:, :-1]
+            table[:-1, :, 2] = index[1:, :]
+            table[1:, :, 3] = index[:-1, :]
+            table = table.reshape(-1, 4)
+            self._table = (table, [tuple(n for n in row if n >= 0) for row in table.tolist()])
+        return self._table
+
+    def add_source(self, pos):
+        """Neue Quelle: BFS ab pos, die nur Zellen verbessert, die jetzt näher liegen."""
+        dist, label = self._dist, self._label
+        cells, blocked = self.grid.cells, self.blocked_bits
+        neighbours = self._neighbour_table()[1]
+        source = pos[0] * self.grid.cols + pos[1]
+        dist[source] = 0
+        label[source] = source
+        queue = deque([(source, 0)])
+        while queue:
+            index, d = queue.popleft()
+            d += 1
+            for neighbour in neighbours[index]:
+                if d < dist[neighbour] and not cells[neighbour] & blocked:
+                    dist[neighbour] = d
+                    label[neighbour] = source
+                    queue.append((neighbour, d))
+
+    def remove_source(self, pos):
+        """
+        Entfernt die Quelle an pos. Betroffen sind nur die Zellen, deren nächste Quelle pos
+        war; sie werden vom Rand ihres Einzugsgebiets aus (Dijkstra mit den dort gültigen
+        Distanzen als Startwerten) neu gefüllt. Alle anderen Zellen bleiben unverändert.
+        """
+        dist, label = self._dist, self._label
+        table, neighbours = self._neighbour_table()
+        source = pos[0] * self.grid.cols + pos[1]
+        affected = np.flatnonzero(label == source)
+        if len(affected) == 0:
+            return
+        dist[affected] = UNREACHABLE
+        label[affected] = -1
+
+        # Startwerte vektorisiert: Nachbarn außerhalb des Gebiets mit gültiger Distanz
+        outside = table[affected]
+        valid = outside >= 0
+        valid[valid] = dist[outside[valid]] != UNREACHABLE
+        inner, slot = np.nonzero(valid)
+        boundary = outside[inner, slot]
+        heap = list(zip((dist[boundary] + 1).tolist(), affected[inner].tolist(), label[boundary].tolist()))
+        heapq.heapify(heap)
+
+        # Dijkstra nur innerhalb des Gebiets; alle Gebietszellen waren erreichbar, also betretbar
+        best = dict.fromkeys(affected.tolist(), UNREACHABLE)
+        nearest_of = {}
+        while heap:
+            d, index, nearest = heapq.heappop(heap)
+            if d >= best[index]:
+                continue
+            best[index] = d
+            nearest_of[index] = nearest
+            d += 1
+            for neighbour in neighbours[index]:
+                if d < best.get(neighbour, 0):
+                    heapq.heappush(heap, (d, neighbour, nearest))
+        if nearest_of:
+            indices = np.fromiter(nearest_of, dtype=np.intp, count=len(nearest_of))
+            dist[indices] = [best[i] for i in nearest_of]
+            label[indices] = list(nearest_of.values())
+
+    def distance(self, pos):
+        """Schritte bis zur nächsten Quelle (UNREACHABLE, wenn keine erreichbar ist)."""
+        return int(self.dist[pos])
+
+    def nearest(self, pos):
+        """Position der nächsten Quelle oder None."""
+        index = int(self.label[pos])
+        if index < 0:
+            return None
+        return divmod(index, self.grid.cols)
+
+    def step_towards(self, pos):
+        """
+        Index der Aktion (Reihenfolge wie ACTIONS), die der nächsten Quelle einen Schritt
+        näher kommt; -1, wenn pos selbst eine Quelle ist oder keine erreichbar ist.
+        """
+        d = self.dist[pos]
+        if d == 0 or d == UNREACHABLE:
+            return -1
+        row, col = pos
+        for i, (d_row, d_col) in enumerate(ACTIONS):
+            r, c = row + d_row, col + d_col
+            if 0 <= r < self.grid.rows and 0 <= c < self.grid.cols and self.dist[r, c] == d - 1:
+                return i
+        return -1
@@ -0,0 +1,75 @@
+from gridmodel import load_pygame
+
+class SoundCache:
+    """
+    Lädt jede Sounddatei nur einmal. Fehlgeschlagene Ladeversuche werden ebenfalls
+    gemerkt, damit die Fehlermeldung nicht bei jedem Ereignis erneut erscheint.
+    """
+    def __init__(self):
+        self.sounds = {}
+
+    def get(self, path):
+        if path not in self.sounds:
+            pygame = load_pygame()
+            try:
+                self.sounds[path] = pygame.mixer.Sound(path)
+            except Exception as e:
+                print(f"Sound {path} konnte nicht geladen werden:", e)
+                self.sounds[path] = None
+        return self.sounds[path]
+
+    def preload(self, *paths):
+        """Lädt die Sounds vorab (beim Start), damit das erste Ereignis nicht auf die Platte wartet."""
+        for path in paths:
+            self.get(path)
+
+    def play(self, path):
+        sound = self.get(path)
+        if sound is not None:
+            sound.play()
+
+sound_cache = SoundCache()
+
+class Effect:
+    """
+    Zeitbasierte Animation mit fester Dauer. update(dt) schiebt die Animation um dt
+    Sekunden weiter, draw(screen) zeichnet den aktuellen Zustand und gibt den bemalten
+    Bereich zurück.
+    """
+    duration = 0.5
+
+    def __init__(self):
+        self.elapsed = 0.0
+
+    @property
+    def progress(self):
+        return min(1.0, self.elapsed / self.duration)
+
+    @property
+    def finished(self):
+        return self.elapsed >= self.duration
+
+    def update(self, dt):
+        self.elapsed += dt
+
+    def draw(self, screen):
+        raise NotImplementedError
+
+class EffectScheduler:
+    """
+    Verwaltet laufende Effekte. Die Hauptschleife ruft einmal pro Frame update(dt)
+    und draw(screen) auf; nichts davon blockiert die Simulation.
+    """
+    def __init__(self):
+        self.effects = []
+
+    def add(self, effect):
+        self.effects.append(effect)
+
+    def update(self, dt):
+        for effect in self.effects:
+            effect.update(dt)
+        self.effects = [effect for effect in self.effects if not effect.finished]
+
+    def draw(self, screen):
+        return [effect.draw(screen) for effect in self.effects]
@@ -0,0 +1,109 @@
+import numpy as np
+from settings import GRID_COLS, GRID_ROWS, STARVATION_TICKS
+from gridmodel import WALL, MINE, FLOWER
+from distfield import UNREACHABLE
+from qtable import ACTIONS
+
+class PositionEncoder:
+    """
+    Bisheriges Verhalten: Der Zustand ist die Position (row, col). Die Q-Tabelle hat
+    eine Zeile pro Zelle und gilt nur für genau eine Karte.
+    """
+    name = "position"
+
+    def __init__(self, rows=GRID_ROWS, cols=GRID_COLS):
+        self.shape = (rows, cols)
+
+    def default_state(self, pacman):
+        return pacman.pos
+
+    def encode(self, pacman, world):
+        return pacman.pos
+
+    def encode_batch(self, world, pos, hungry):
+        """Flache Zustandsindizes für viele Agenten auf einmal (pos: (n, 2)-Array)."""
+        return pos[:, 0] * self.shape[1] + pos[:, 1]
+
+class LocalEncoder:
+    """
+    Kartenunabhängiger Zustand aus lokalen Merkmalen, gepackt in eine kleine Ganzzahl:
+      - 4 Gefahrenbits: Nachbarzelle ist Rand, Wand oder Mine (16 Werte)
+      - erster Schritt zur nächsten Blume im Umkreis radius (keiner oder eine der 4 Aktionen, 5 Werte)
+      - Hungerstufe: Anteil der verstrichenen STARVATION_TICKS (hunger_buckets Werte)
+    Die Q-Tabelle hat damit 16 * 5 * hunger_buckets Zeilen statt einer pro Zelle und
+    bleibt auf zufällig neu erzeugten Karten gültig.
+    """
+    name = "local"
+
+    def __init__(self, radius=10, hunger_buckets=3):
+        self.radius = radius
+        self.hunger_buckets = hunger_buckets
+        self.shape = (16 * 5 * hunger_buckets,)
+
+    def default_state(self, pacman):
+        return 0
+
+    def pack(self, hazards, direction, hunger):
+        return (hunger * 5 + direction) * 16 + hazards
+
+    def hazard_bits(self, grid, pos):
+        row, col = pos
+        cells = grid.cells
+        bits = 0
+        for i, (d_row, d_col) in enumerate(ACTIONS):
+            r, c = row + d_row, col + d_col
+            if not (0 <= r < grid.rows and 0 <= c < grid.cols) or cells[r * grid.cols + c] & (WALL | MINE):
+                bits |= 1 << i
+        return bits
+
+    def flower_direction(self, world, pos):
+        """
+        0 = keine Blume im Umkreis, sonst 1 + Index der Aktion, die der nächsten Blume
+        (Schrittdistanz um die Wände herum) näher kommt. O(1) über das Distanzfeld der Welt.
+        """
+        field = world.distance_field(FLOWER)
+        if field.distance(pos) > self.radius:
+            return 0
+        return field.step_towards(pos) + 1
+
+    def hunger(self, pacman):
+        hungry = (pacman.steps - pacman.last_food_step) / STARVATION_TICKS
+        return min(self.hunger_buckets - 1, max(0, int(hungry * self.hunger_buckets)))
+
+    def encode(self, pacman, world):
+        grid = world.grid
+        return self.pack(self.hazard_bits(grid, pacman.pos),
+                         self.flower_direction(world, pacman.pos),
+                         self.hunger(pacman))
+
+    def encode_batch(self, world, pos, hungry):
+        """
+        Wie encode, aber für viele Agenten auf einmal: pos ist ein (n, 2)-Array, hungry die
+        Ticks seit der letzten Nahrung je Agent. Rand und Distanzfeld werden dafür einmal
+        um eine Zelle aufgefüllt, danach ist jedes Merkmal ein einziger Array-Zugriff.
+        """
+        rows, cols = pos[:, 0] + 1, pos[:, 1] + 1
+        blocked = np.pad((world.grid.cell_type & (WALL | MINE)) != 0, 1, constant_values=True)
+        hazards = np.zeros(len(pos), dtype=np.intp)
+        for i, (d_row, d_col) in enumerate(ACTIONS):
+            hazards |= blocked[rows + d_row, cols + d_col].astype(np.intp) << i
+
+        dist = np.pad(world.distance_field(FLOWER).dist, 1, constant_values=UNREACHABLE)
+        here = dist[rows, cols]
+        direction = np.zeros(len(pos), dtype=np.intp)
+        # Rückwärts, damit bei mehreren passenden Nachbarn der erste gewinnt (wie step_towards)
+        for i in reversed(range(len(ACTIONS))):
+            d_row, d_col = ACTIONS[i]
+            direction[dist[rows + d_row, cols + d_col] == here - 1] = i + 1
+        direction[(here > self.radius) | (here == 0)] = 0
+
+        hunger = np.clip(hungry * self.hunger_buckets // STARVATION_TICKS, 0, self.hunger_buckets - 1)
+        return self.pack(hazards, direction, hunger)
+
+ENCODERS = {
+    PositionEncoder.name: PositionEncoder,
+    LocalEncoder.name: LocalEncoder,
+}
+
+def make_encoder(name, **kwargs):
+    return ENCODERS[name](**kwargs)
@@ -0,0 +1,153 @@
+import numpy as np
+from qtable import QTable
+
+MERGE_METHODS = ("mean", "weighted", "uniform", "blockwise")
+MUTATION_KINDS = ("multiplicative", "gaussian")
+
+def merge(values, visited, method="mean", weights=None, draw=None, block_size=8):
+    """
+    Kombiniert gestapelte Q-Tabellen values (Form (k,) + shape + (4,)) mit ihren
+    Besuchsmasken visited (Form (k,) + shape) zu einer Tabelle. Für jeden Zustand
+    zählen nur die Eltern, die ihn kennen; Zustände, die keiner kennt, bleiben 0.
+
+      - "mean":      zustandsweiser Mittelwert (wie bisher average_q_tables)
+      - "weighted":  Mittelwert mit Gewicht weights[i] je Elternteil (z. B. Überlebenszeit)
+      - "uniform":   jeder Zustand kommt von einem zufälligen Elternteil
+      - "blockwise": wie "uniform", aber je Block von block_size x block_size Zuständen
+
+    Für die Kreuzungen liefert draw gleichverteilte Zufallszahlen der Form
+    (k, Zustände) bzw. (k, Blöcke), siehe draw_size.
+    Gibt (values, visited) der neuen Tabelle zurück.
+    """
+    k = values.shape[0]
+    shape = visited.shape[1:]
+    flat_values = values.reshape(k, -1, values.shape[-1])
+    flat_visited = visited.reshape(k, -1)
+    known = flat_visited.any(axis=0)
+
+    if method in ("mean", "weighted"):
+        if method == "weighted" and weights is not None:
+            weights = np.asarray(weights, dtype=np.float32)
+            if not weights.any():
+                weights = np.ones(k, dtype=np.float32)
+        else:
+            weights = np.ones(k, dtype=np.float32)
+        state_weights = flat_visited * weights[:, None]
+        totals = state_weights.sum(axis=0)
+        sums = np.einsum("ks,ksa->sa", state_weights, flat_values)
+        merged = np.divide(sums, totals[:, None], out=np.zeros_like(sums), where=totals[:, None] > 0)
+    elif method in ("uniform", "blockwise"):
+        scores = draw if method == "uniform" else draw[:, block_ids(shape, block_size)]
+        # Der Elternteil mit der höchsten Zufallszahl unter denen, die den Zustand kennen
+        parent = np.where(flat_visited, scores, -1.0).argmax(axis=0)
+        merged = flat_values[parent, np.arange(flat_values.shape[1])]
+        merged[~known] = 0
+    else:
+        raise ValueError(f"Unbekannte Kreuzungsmethode {method!r} (erlaubt: {', '.join(MERGE_METHODS)})")
+    return merged.reshape(values.shape[1:]), known.reshape(shape)
+
+_BLOCK_IDS = {}
+
+def block_ids(shape, block_size):
+    """Blocknummer je Zustand (flach); zweidimensionale Zustände werden in Quadrate geteilt."""
+    key = (shape, block_size)
+    if key not in _BLOCK_IDS:
+        if len(shape) >= 2:
+            rows, cols = np.indices(shape[:2])
+            blocks_per_row = -(-shape[1] // block_size)
+            ids = (rows // block_size) * blocks_per_row + cols // block_size
+            ids = np.broadcast_to(ids.reshape(shape[:2] + (1,) * (len(shape) - 2)), shape)
+        else:
+            ids = np.arange(shape[0]) // block_size
+        _BLOCK_IDS[key] = np.ascontiguousarray(ids).reshape(-1)
+    return _BLOCK_IDS[key]
+
+def mutate(values, visited, draw, rate, strength, kind="multiplicative", normalize=False):
+    """
+    Mutiert die Q-Werte besuchter Zustände in place. draw enthält gleichverteilte
+    Zufallszahlen der Form (n,) + values.shape: draw[0] entscheidet mit Wahrscheinlichkeit
+    rate, ob ein Eintrag mutiert wird (und liefert, durch rate geteilt, gleich die Stärke);
+    draw[1] wird nur für die Gauß-Variante gebraucht (n = 2, sonst genügt n = 1).
+
+      - "multiplicative": Faktor gleichverteilt in [1 - strength, 1 + strength)
+      - "gaussian":       additives Rauschen mit Standardabweichung strength (Box-Muller)
+
+    Mit normalize werden die Werte jedes besuchten Zustands anschließend auf Summe 1
+    normiert (sofern die Summe nicht 0 ist) – das frühere Verhalten von PacManAgent.mutate.
+    """
+    selector = draw[0]
+    mask = (selector < rate) & visited[..., None]
+    # Unter der Bedingung selector < rate ist selector / rate wieder gleichverteilt
+    u = selector[mask] / rate
+    if kind == "multiplicative":
+        values[mask] *= 1 + strength * (2 * u - 1)
+    elif kind == "gaussian":
+        values[mask] += strength * np.sqrt(-2 * np.log1p(-u)) * np.cos(2 * np.pi * draw[1][mask])
+    else:
+        raise ValueError(f"Unbekannte Mutationsart {kind!r} (erlaubt: {', '.join(MUTATION_KINDS)})")
+    if normalize:
+        states = values[visited]
+        totals = states.sum(axis=1, keepdims=True)
+        values[visited] = np.divide(states, totals, out=states, where=totals != 0)
+
+def mutation_draws(kind):
+    """Anzahl Zufallszahlen je Q-Wert, die mutate für diese Mutationsart braucht."""
+    return 2 if kind == "gaussian" else 1
+
+def draw_size(values_shape, method="mean", block_size=8, mutation=None):
+    """Anzahl Zufallszahlen, die Recombiner.combine für diese Form in einem Zug zieht."""
+    k = values_shape[0]
+    shape = values_shape[1:-1]
+    size = 0
+    if method == "uniform":
+        size += k * int(np.prod(shape))
+    elif method == "blockwise":
+        size += k * (int(block_ids(shape, block_size).max()) + 1)
+    if mutation is not None:
+        size += mutation_draws(mutation) * int(np.prod(values_shape[1:]))
+    return size
+
+class Recombiner:
+    """
+    Erzeugt aus den Eliten einer Generation die neue Q-Tabelle: Kreuzung (merge) und
+    anschließend optional Mutation. Alle Zufallszahlen einer Generation stammen aus
+    einem einzigen Aufruf des NumPy-Generators.
+    """
+    def __init__(self, method="mean", mutation=None, mutation_rate=0.05, mutation_strength=0.1,
+                 block_size=8, seed=None):
+        if method not in MERGE_METHODS:
+            raise ValueError(f"Unbekannte Kreuzungsmethode {method!r} (erlaubt: {', '.join(MERGE_METHODS)})")
+        if mutation is not None and mutation not in MUTATION_KINDS:
+            raise ValueError(f"Unbekannte Mutationsart {mutation!r} (erlaubt: {', '.join(MUTATION_KINDS)})")
+        self.method = method
+        self.mutation = mutation
+        self.mutation_rate = mutation_rate
+        self.mutation_strength = mutation_strength
+        self.block_size = block_size
+        self.rng = np.random.default_rng(seed)
+
+    def combine(self, values, visited, fitness=None):
+        """
+        values/visited: gestapelte Eltern (siehe merge), fitness: Gewichte für "weighted".
+        Gibt die neue QTable zurück.
+        """
+        k = values.shape[0]
+        shape = visited.shape[1:]
+        draw = self.rng.random(draw_size(values.shape, self.method, self.block_size, self.mutation))
+
+        crossover_draw = None
+        if self.method in ("uniform", "blockwise"):
+            columns = int(np.prod(shape)) if self.method == "uniform" else int(block_ids(shape, self.block_size).max()) + 1
+            crossover_draw = draw[:k * columns].reshape(k, columns)
+            draw = draw[k * columns:]
+        merged, known = merge(values, visited, self.method, fitness, crossover_draw, self.block_size)
+
+        if self.mutation is not None:
+            mutate(merged, known, draw.reshape((mutation_draws(self.mutation),) + merged.shape),
+                   self.mutation_rate, self.mutation_strength, self.mutation)
+        return QTable(values=merged, visited=known)
+
+    def combine_tables(self, tables, fitness=None):
+        """Wie combine, aber für eine Liste von QTable-Objekten."""
+        return self.combine(np.stack([table.values for table in tables]),
+                            np.stack([table.visited for table in tables]), fitness)
@@ -1,27 +1,16 @@
-import pygame
-import time
+import heapq
+from functools import lru_cache
+import numpy as np
+from gridmodel import GridModel, load_pygame
 from settings import GRID_COLS, GRID_ROWS, LIGHT_GRAY, WALL_COLOR, WHITE, BLACK
 
-def create_grid(width, height):
-    cell_width = width / GRID_COLS
-    cell_height = height / GRID_ROWS
-    grid = {}
-    for row in range(GRID_ROWS):
-        for col in range(GRID_COLS):
-            cell_id = row * GRID_COLS + col
-            x = int(col * cell_width)
-            y = int(row * cell_height)
-            w = int(cell_width)
-            h = int(cell_height)
-            rect = pygame.Rect(x, y, w, h)
-            grid[(row, col)] = {
-                "id": cell_id,
-                "rect": rect,
-                "visit_count": 0,
-                "last_visit": None,
-                "last_decrement": None
-            }
-    return grid
+def create_grid(width, height, rows=GRID_ROWS, cols=GRID_COLS):
+    """
+    Erzeugt das Spielfeld als GridModel (Arrays statt Dict pro Zelle).
+    grid[(row, col)] liefert weiterhin eine Zelle mit "id", "rect", "visit_count",
+    "last_visit" und "last_decrement".
+    """
+    return GridModel(rows, cols, width, height)
 
 def create_bunker(top_left, size, opening_side, opening_width):
     """
@@ -49,29 +38,105 @@ def create_bunker(top_left, size, opening_side, opening_width):
 
     return bunker_walls
 
+def create_bunkers(bunker_size=20, opening_width=4, rows=GRID_ROWS, cols=GRID_COLS):
+    """
+    Erzeugt die vier Eckbunker (oben mit Öffnung nach unten, unten mit Öffnung nach oben)
+    und gibt die Vereinigung aller Wandzellen zurück. Mit bunker_size 0 gibt es keine Bunker.
+    """
+    if bunker_size <= 0:
+        return set()
+    top_left_bunker = create_bunker((0, 0), bunker_size, "bottom", opening_width)
+    top_right_bunker = create_bunker((0, cols - bunker_size), bunker_size, "bottom", opening_width)
+    bottom_left_bunker = create_bunker((rows - bunker_size, 0), bunker_size, "top", opening_width)
+    bottom_right_bunker = create_bunker((rows - bunker_size, cols - bunker_size), bunker_size, "top", opening_width)
+    return top_left_bunker.union(top_right_bunker, bottom_left_bunker, bottom_right_bunker)
+
+@lru_cache(maxsize=32)
+def bunker_mask(rows=GRID_ROWS, cols=GRID_COLS, bunker_size=20, opening_width=4):
+    """Wände aus create_bunkers als schreibgeschützte boolesche (rows, cols)-Maske."""
+    mask = np.zeros((rows, cols), dtype=bool)
+    walls = create_bunkers(bunker_size, opening_width, rows, cols)
+    if walls:
+        cells = np.array(list(walls), dtype=np.intp)
+        mask[cells[:, 0], cells[:, 1]] = True
+    mask.flags.writeable = False
+    return mask
+
+class MapLayout:
+    """
+    Eine erzeugte Karte: Wände, Minen und Blumen als schreibgeschützte boolesche Masken
+    plus die Hausposition. Wird von generate_layout je Seed zwischengespeichert.
+    """
+    def __init__(self, walls, mines, flowers, house_pos, seed):
+        self.walls = walls
+        self.mines = mines
+        self.flowers = flowers
+        self.house_pos = house_pos
+        self.seed = seed
+
+@lru_cache(maxsize=256)
+def generate_layout(seed, rows=GRID_ROWS, cols=GRID_COLS, bunker_size=20, opening_width=4,
+                    num_mines=100, num_flowers=150):
+    """
+    Erzeugt Minen und Blumen für einen Seed. Gezogen wird in einem Zug ohne Zurücklegen
+    aus dem Index der freien Zellen (weder Wand noch Haus); die ersten num_mines Zellen
+    werden Minen, der Rest Blumen. Gleiche Parameter liefern dieselbe (gecachte) Karte.
+    """
+    walls = bunker_mask(rows, cols, bunker_size, opening_width)
+    house_pos = (rows // 2, cols // 2)
+    free = ~walls
+    free[house_pos] = False
+    free_cells = np.flatnonzero(free)
+    num_mines = min(num_mines, len(free_cells))
+    num_flowers = min(num_flowers, len(free_cells) - num_mines)
+    chosen = np.random.default_rng(seed).choice(free_cells, num_mines + num_flowers, replace=False)
+    mines = np.zeros(rows * cols, dtype=bool)
+    flowers = np.zeros(rows * cols, dtype=bool)
+    mines[chosen[:num_mines]] = True
+    flowers[chosen[num_mines:]] = True
+    mines, flowers = mines.reshape(rows, cols), flowers.reshape(rows, cols)
+    mines.flags.writeable = False
+    flowers.flags.writeable = False
+    return MapLayout(walls, mines, flowers, house_pos, seed)
+
+# Farbwerte für Besuchsstufen (rosa, von leicht bis intensiv)
+VISIT_COLORS = {
+    1: (255, 230, 230),
+    2: (255, 204, 204),
+    3: (255, 178, 178),
+    4: (255, 153, 153),
+    5: (255, 128, 128)
+}
+
+def draw_cell(screen, cell_data):
+    """
+    Zeichnet eine einzelne Zelle: Hintergrund je nach Besuchszahl und Grid-Linie.
+    """
+    pygame = load_pygame()
+    rect = cell_data["rect"]
+    if cell_data["visit_count"] > 0:
+        level = min(cell_data["visit_count"], 5)
+        pygame.draw.rect(screen, VISIT_COLORS[level], rect)
+    else:
+        pygame.draw.rect(screen, WHITE, rect)
+    pygame.draw.rect(screen, LIGHT_GRAY, rect, 1)
+
 def draw_full_grid_with_lines(screen, grid):
-    # Farbwerte für Besuchsstufen (rosa, von leicht bis intensiv)
-    visit_colors = {
-        1: (255, 230, 230),
-        2: (255, 204, 204),
-        3: (255, 178, 178),
-        4: (255, 153, 153),
-        5: (255, 128, 128)
-    }
-    for pos, cell_data in grid.items():
-        rect = cell_data["rect"]
-        if cell_data["visit_count"] > 0:
-            level = min(cell_data["visit_count"], 5)
-            pygame.draw.rect(screen, visit_colors[level], rect)
-        else:
-            pygame.draw.rect(screen, WHITE, rect)
-        pygame.draw.rect(screen, LIGHT_GRAY, rect, 1)
+    """
+    Alle Zellen mit Besuchsfarbe und Grid-Linien. Statt eines draw_cell-Aufrufs pro Zelle
+    werden die Besuchszahlen über heatmap.Heatmap eingefärbt und skaliert (ein Blit).
+    """
+    from heatmap import cached_heatmap, VISIT_PALETTE
+    heatmap = cached_heatmap(screen.get_size(), grid.shape)
+    heatmap.update(grid.visit_count, VISIT_PALETTE)
+    return heatmap.draw(screen)
 
 def overpaint_walls(screen, grid, walls):
     """
     Übermalt alle Wandzellen (Bunkerwände) mit einem etwas vergrößerten Rechteck,
     sodass keine Grid-Linien mehr sichtbar sind.
     """
+    pygame = load_pygame()
     for (row, col) in walls:
         if (row, col) in grid:
             rect = grid[(row, col)]["rect"]
@@ -79,15 +144,24 @@ def overpaint_walls(screen, grid, walls):
             pygame.draw.rect(screen, WALL_COLOR, bigger_rect)
 
 def draw_hovered_cell(screen, grid, mouse_pos, font):
-    for cell in grid.values():
-        if cell["rect"].collidepoint(mouse_pos):
-            pygame.draw.rect(screen, (200, 200, 200), cell["rect"])
-            text_surface = font.render(str(cell["id"]), True, BLACK)
-            text_rect = text_surface.get_rect(center=cell["rect"].center)
-            screen.blit(text_surface, text_rect)
-            break
+    """
+    Hebt die Zelle unter dem Mauszeiger hervor und gibt den bemalten Bereich zurück
+    (None, wenn der Mauszeiger über keiner Zelle steht).
+    """
+    pygame = load_pygame()
+    pos = grid.cell_at_pixel(mouse_pos)
+    if pos is None:
+        return None
+    cell = grid[pos]
+    rect = cell["rect"]
+    pygame.draw.rect(screen, (200, 200, 200), rect)
+    text_surface = font.render(str(cell["id"]), True, BLACK)
+    text_rect = text_surface.get_rect(center=rect.center)
+    screen.blit(text_surface, text_rect)
+    return rect.union(text_rect)
 
 def draw_house_marker(screen, grid, house_pos):
+    pygame = load_pygame()
     cell_rect = grid[house_pos]["rect"]
     pygame.draw.rect(screen, (0, 0, 255), cell_rect)
     top_center = (cell_rect.centerx, cell_rect.top)
@@ -95,13 +169,65 @@ def draw_house_marker(screen, grid, house_pos):
     bottom_right = (cell_rect.right, cell_rect.centery)
     pygame.draw.polygon(screen, (255, 0, 0), [top_center, bottom_left, bottom_right])
 
-def update_cell_visits(grid, speed_factor):
-    current_time = time.time()
-    for pos, cell in grid.items():
-        if cell["visit_count"] > 0 and cell["last_visit"] is not None:
-            if current_time - cell["last_visit"] >= 60 / speed_factor:
-                if cell["last_decrement"] is None:
-                    cell["last_decrement"] = cell["last_visit"] + 60 / speed_factor
-                while current_time - cell["last_decrement"] >= 30 / speed_factor and cell["visit_count"] > 0:
-                    cell["visit_count"] -= 1
-                    cell["last_decrement"] += 30 / speed_factor
+class VisitDecay:
+    """
+    Verwaltet das Abklingen der Besuchszahlen. Eine Zelle verliert 60 Sekunden nach
+    dem letzten Besuch eine Stufe und danach alle 30 Sekunden eine weitere (jeweils
+    geteilt durch den Geschwindigkeitsfaktor).
+
+    Statt jedes Frame alle Zellen zu prüfen, liegt jede Zelle mit ausstehendem Abbau
+    genau einmal in einem Min-Heap, sortiert nach dem nächsten Fälligkeitszeitpunkt.
+    Die Zeit läuft als Spielzeit (Sekunden * Geschwindigkeitsfaktor), sodass sich ein
+    Wechsel des Sliders nicht rückwirkend auf bereits geplante Zeitpunkte auswirkt.
+    """
+    def __init__(self, grid, first_delay=60, interval=30, max_count=5):
+        self.grid = grid
+        self.first_delay = first_delay
+        self.interval = interval
+        self.max_count = max_count
+        self.clock = 0.0
+        self.heap = []
+        self.pending = set()
+
+    def visit(self, pos):
+        """
+        Registriert einen Besuch. Gibt True zurück, wenn sich die Besuchszahl geändert hat.
+        """
+        cell = self.grid[pos]
+        changed = cell["visit_count"] < self.max_count
+        cell["visit_count"] = min(self.max_count, cell["visit_count"] + 1)
+        cell["last_visit"] = self.clock
+        cell["last_decrement"] = None
+        if pos not in self.pending:
+            self.pending.add(pos)
+            heapq.heappush(self.heap, (self.clock + self.first_delay, pos))
+        return changed
+
+    def update(self, dt, speed_factor=1):
+        """
+        Schreibt die Spielzeit um dt Sekunden fort und baut fällige Besuchszahlen ab.
+        Gibt die Positionen zurück, deren Besuchszahl sich geändert hat.
+        """
+        self.clock += dt * speed_factor
+        changed = []
+        heap = self.heap
+        while heap and heap[0][0] <= self.clock:
+            _, pos = heapq.heappop(heap)
+            cell = self.grid[pos]
+            if cell["last_decrement"] is None:
+                # Zwischenzeitliche Besuche verschieben den ersten Abbau nach hinten.
+                due = cell["last_visit"] + self.first_delay
+            else:
+                due = cell["last_decrement"] + self.interval
+            before = cell["visit_count"]
+            while due <= self.clock and cell["visit_count"] > 0:
+                cell["visit_count"] -= 1
+                cell["last_decrement"] = due
+                due += self.interval
+            if cell["visit_count"] != before:
+                changed.append(pos)
+            if cell["visit_count"] > 0:
+                heapq.heappush(heap, (due, pos))
+            else:
+                self.pending.discard(pos)
+        return changed
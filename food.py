@@ -1,25 +1,21 @@
-import random
-import pygame
-import time
+from gridmodel import sample_free_cells, load_pygame
+from effects import Effect, sound_cache
+
+EATING_SOUND = "eating.wav"
 
 def generate_flowers(grid, walls, house_pos, mines_positions, num_flowers):
     """
     Generiert num_flowers zufällig platzierte Blumen auf dem Grid.
     Nur Zellen, die nicht zu den Wänden, Minen oder dem Haus gehören.
     """
-    available_positions = [
-        pos for pos in grid.keys()
-        if pos not in walls and pos not in mines_positions and pos != house_pos
-    ]
-    if num_flowers > len(available_positions):
-        num_flowers = len(available_positions)
-    return set(random.sample(available_positions, num_flowers))
+    return sample_free_cells(grid, (walls, mines_positions, [house_pos]), num_flowers)
 
 def draw_flowers(screen, grid, flowers):
     """
     Zeichnet die Blumen als grüne Blume:
     Ein grüner Kreis (Blütenblatt) mit einem kleineren gelben Kreis (Blütenmitte).
     """
+    pygame = load_pygame()
     for pos in flowers:
         rect = grid[pos]["rect"]
         center = rect.center
@@ -28,25 +24,23 @@ def draw_flowers(screen, grid, flowers):
         inner_radius = max(1, radius // 2)
         pygame.draw.circle(screen, (255, 255, 0), center, inner_radius)
 
-def eating_animation(screen, grid, pos, pacman):
+class EatingAnimation(Effect):
     """
-    Führt eine Essensanimation an der Zelle pos aus.
-    Simuliert, dass Pac-Man seinen Mund dreimal auf- und zuklappt.
+    Essensanimation an der Zelle pos: Pac-Man klappt seinen Mund dreimal auf und zu
+    (je 100 ms zu, 100 ms auf). Wird vom EffectScheduler pro Frame fortgeschrieben.
     """
-    rect = grid[pos]["rect"]
-    center = rect.center
-    radius = rect.width // 2
-    for _ in range(3):
-        pygame.draw.circle(screen, (0, 0, 255), center, radius)
-        pygame.display.flip()
-        pygame.time.delay(100)
-        pacman.draw(screen, grid)
-        pygame.display.flip()
-        pygame.time.delay(100)
+    duration = 0.6
+
+    def __init__(self, grid, pos):
+        super().__init__()
+        self.rect = grid[pos]["rect"]
+
+    def draw(self, screen):
+        pygame = load_pygame()
+        # In der ersten Hälfte jedes 200-ms-Zyklus ist der Mund geschlossen.
+        if (self.elapsed % 0.2) < 0.1:
+            return pygame.draw.circle(screen, (0, 0, 255), self.rect.center, self.rect.width // 2)
+        return None
 
 def play_eating_sound():
-    try:
-        eating_sound = pygame.mixer.Sound("eating.wav")
-        eating_sound.play()
-    except Exception as e:
-        print("Eating sound konnte nicht geladen werden:", e)
+    sound_cache.play(EATING_SOUND)
@@ -0,0 +1,216 @@
+import math
+import random
+from collections.abc import MutableSet
+import numpy as np
+
+_pygame = None
+
+def load_pygame():
+    """
+    Gibt das pygame-Modul zurück. Importiert wird erst beim ersten Aufruf (Headless-Läufe
+    laden pygame nie), danach ist es nur noch ein Zugriff auf eine globale Variable.
+    """
+    global _pygame
+    if _pygame is None:
+        import pygame
+        _pygame = pygame
+    return _pygame
+
+# Zelltypen als Bits im cell_type-Layer
+WALL = 1
+MINE = 2
+FLOWER = 4
+HOUSE = 8
+
+class CellView:
+    """
+    Dünne Sicht auf eine Zelle mit der alten Dict-Schnittstelle
+    (cell["rect"], cell["visit_count"], ...). Die Daten liegen in den Arrays des GridModel.
+    """
+    __slots__ = ("grid", "pos")
+
+    def __init__(self, grid, pos):
+        self.grid = grid
+        self.pos = pos
+
+    def __getitem__(self, key):
+        grid = self.grid
+        if key == "visit_count":
+            return int(grid.visit_count[self.pos])
+        if key == "rect":
+            return grid.rect(self.pos)
+        if key == "id":
+            return self.pos[0] * grid.cols + self.pos[1]
+        if key in ("last_visit", "last_decrement"):
+            value = float(getattr(grid, key)[self.pos])
+            return None if math.isnan(value) else value
+        raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        if key == "visit_count":
+            self.grid.visit_count[self.pos] = value
+        elif key in ("last_visit", "last_decrement"):
+            getattr(self.grid, key)[self.pos] = np.nan if value is None else value
+        else:
+            raise KeyError(key)
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+class CellSet(MutableSet):
+    """
+    Mengen-Sicht auf ein Bit des cell_type-Layers (z. B. alle Minen). Unterstützt
+    die üblichen Set-Operationen; Mitgliedschaftstests sind reine Array-Zugriffe.
+    """
+    def __init__(self, grid, bit):
+        self.grid = grid
+        self.bit = bit
+
+    def __contains__(self, pos):
+        row, col = pos
+        grid = self.grid
+        return 0 <= row < grid.rows and 0 <= col < grid.cols and bool(grid.cells[row * grid.cols + col] & self.bit)
+
+    def __iter__(self):
+        cols = self.grid.cols
+        for index in np.flatnonzero(self.grid.cell_type & self.bit).tolist():
+            yield divmod(index, cols)
+
+    def __len__(self):
+        return int(np.count_nonzero(self.grid.cell_type & self.bit))
+
+    def add(self, pos):
+        self.grid.cells[pos[0] * self.grid.cols + pos[1]] |= self.bit
+
+    def discard(self, pos):
+        if pos in self:
+            self.grid.cells[pos[0] * self.grid.cols + pos[1]] &= ~self.bit & 0xFF
+
+    def remove(self, pos):
+        if pos not in self:
+            raise KeyError(pos)
+        self.discard(pos)
+
+    def clear(self):
+        self.grid.cell_type &= ~self.bit & 0xFF
+
+    def assign(self, positions):
+        """Ersetzt den Inhalt des Layers durch die angegebenen Positionen."""
+        self.clear()
+        self.grid.set_cells(positions, self.bit)
+
+    def assign_mask(self, mask):
+        """Ersetzt den Inhalt des Layers durch die Zellen einer booleschen (rows, cols)-Maske."""
+        self.clear()
+        np.bitwise_or(self.grid.cell_type, self.bit, out=self.grid.cell_type, where=mask)
+
+    @classmethod
+    def _from_iterable(cls, iterable):
+        # Ergebnisse von Set-Operationen (a - b, a | b, ...) sind normale Sets.
+        return set(iterable)
+
+    def mask(self):
+        return (self.grid.cell_type & self.bit) != 0
+
+    def copy(self):
+        return set(self)
+
+class GridModel:
+    """
+    Spielfeld als parallele Arrays statt Dict pro Zelle:
+      - cell_type:      uint8-Bitmaske (WALL, MINE, FLOWER, HOUSE)
+      - visit_count:    uint8
+      - last_visit / last_decrement: float32 (NaN = noch nie)
+    Die Pixelgeometrie wird nur bei Bedarf berechnet. Über grid[(row, col)] und
+    keys()/values()/items() bleibt die alte Dict-Schnittstelle erhalten.
+    """
+    def __init__(self, rows, cols, width, height):
+        self.rows = rows
+        self.cols = cols
+        self.width = width
+        self.height = height
+        self.cell_width = width / cols
+        self.cell_height = height / rows
+        # cells und cell_type teilen sich denselben Speicher: bytearray für schnelle
+        # Einzelzugriffe aus Python, NumPy-Sicht für Operationen über das ganze Feld.
+        self.cells = bytearray(rows * cols)
+        self.cell_type = np.frombuffer(self.cells, dtype=np.uint8).reshape(rows, cols)
+        self.visit_count = np.zeros((rows, cols), dtype=np.uint8)
+        self.last_visit = np.full((rows, cols), np.nan, dtype=np.float32)
+        self.last_decrement = np.full((rows, cols), np.nan, dtype=np.float32)
+
+    @property
+    def shape(self):
+        return (self.rows, self.cols)
+
+    def rect(self, pos):
+        row, col = pos
+        return (_pygame or load_pygame()).Rect(int(col * self.cell_width), int(row * self.cell_height),
+                           int(self.cell_width), int(self.cell_height))
+
+    def cell_at_pixel(self, pixel):
+        """Position der Zelle unter einem Bildschirmpunkt oder None."""
+        x, y = pixel
+        col = int(x // self.cell_width)
+        row = int(y // self.cell_height)
+        if 0 <= row < self.rows and 0 <= col < self.cols and self.rect((row, col)).collidepoint(pixel):
+            return (row, col)
+        return None
+
+    def layer(self, bit):
+        return CellSet(self, bit)
+
+    def set_cells(self, positions, bit):
+        positions = list(positions)
+        if positions:
+            cells = np.array(positions, dtype=np.intp)
+            self.cell_type[cells[:, 0], cells[:, 1]] |= bit
+
+    def free_mask(self, excluded_bits=WALL | MINE | FLOWER | HOUSE):
+        return (self.cell_type & excluded_bits) == 0
+
+    # Dict-kompatible Schnittstelle
+    def __getitem__(self, pos):
+        row, col = pos
+        if not (0 <= row < self.rows and 0 <= col < self.cols):
+            raise KeyError(pos)
+        return CellView(self, pos)
+
+    def __contains__(self, pos):
+        row, col = pos
+        return 0 <= row < self.rows and 0 <= col < self.cols
+
+    def __len__(self):
+        return self.rows * self.cols
+
+    def __iter__(self):
+        return self.keys()
+
+    def keys(self):
+        return ((row, col) for row in range(self.rows) for col in range(self.cols))
+
+    def values(self):
+        return (CellView(self, pos) for pos in self.keys())
+
+    def items(self):
+        return ((pos, CellView(self, pos)) for pos in self.keys())
+
+def sample_free_cells(grid, excluded, num):
+    """
+    Wählt num zufällige, verschiedene Zellen, die in keiner der Positionsmengen aus
+    excluded liegen. Die freien Zellen werden über eine Maske bestimmt, nicht über
+    eine Liste aller Positionen.
+    """
+    mask = np.ones(grid.shape, dtype=bool)
+    for positions in excluded:
+        if isinstance(positions, CellSet):
+            mask &= ~positions.mask()
+        elif positions:
+            cells = np.array(list(positions), dtype=np.intp).reshape(-1, 2)
+            mask[cells[:, 0], cells[:, 1]] = False
+    free = np.flatnonzero(mask)
+    num = min(num, len(free))
+    return {divmod(int(free[i]), grid.cols) for i in random.sample(range(len(free)), num)}
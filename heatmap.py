@@ -0,0 +1,184 @@
+"""
+Vollbild-Diagnoseansichten des Spielfelds als ein Blit pro Frame.
+
+Jede Ansicht ist ein kleines (rows, cols)-uint8-Array von Stufen, das über eine Palette
+(256 x RGB) eingefärbt, per surfarray in eine Surface mit einem Pixel pro Zelle geschrieben
+und mit transform.scale auf Bildschirmgröße gebracht wird. Grid-Linien liegen als
+gecachte Überlagerung darüber. Stufe 0 bedeutet immer "nichts" (weiß).
+
+Ansichten (overlay_levels):
+  - "visits":     abklingende Besuchszahlen des Spielfelds (wie die normale Anzeige)
+  - "visitation": alle Besuche seit Programmstart, logarithmisch skaliert
+  - "q_max":      höchster Q-Wert je Zelle (blau = niedrig, rot = hoch)
+  - "policy":     gierige Aktion je Zelle als Farbe, bei großen Zellen als Pfeil
+"""
+import numpy as np
+from settings import LIGHT_GRAY, WHITE
+from field import VISIT_COLORS
+from qtable import ACTIONS
+from gridmodel import load_pygame
+
+OVERLAYS = ("visits", "visitation", "q_max", "policy")
+# Ansichten, die eine Q-Tabelle mit einer Zeile pro Zelle brauchen (PositionEncoder)
+Q_OVERLAYS = ("q_max", "policy")
+
+def ramp_palette(colors):
+    """Palette mit Stufe 0 = weiß und einem linearen Verlauf über colors für die Stufen 1..255."""
+    colors = np.array(colors, dtype=np.float32)
+    t = np.linspace(0, len(colors) - 1, 255)
+    low = np.minimum(t.astype(np.intp), len(colors) - 2)
+    frac = (t - low)[:, None]
+    palette = np.empty((256, 3), dtype=np.uint8)
+    palette[0] = WHITE
+    palette[1:] = np.round(colors[low] * (1 - frac) + colors[low + 1] * frac)
+    return palette
+
+def _visit_palette():
+    palette = np.empty((256, 3), dtype=np.uint8)
+    palette[0] = WHITE
+    palette[1:] = VISIT_COLORS[max(VISIT_COLORS)]
+    for level, color in VISIT_COLORS.items():
+        palette[level] = color
+    return palette
+
+VISIT_PALETTE = _visit_palette()
+HEAT_PALETTE = ramp_palette([(255, 245, 235), (253, 174, 97), (215, 48, 39), (103, 0, 13)])
+Q_PALETTE = ramp_palette([(49, 54, 149), (171, 217, 233), (254, 224, 144), (215, 48, 39)])
+# Stufe 1 + Aktionsindex: rechts, links, unten, oben
+POLICY_PALETTE = np.zeros((256, 3), dtype=np.uint8)
+POLICY_PALETTE[0] = WHITE
+POLICY_PALETTE[1:5] = [(230, 159, 0), (86, 180, 233), (0, 158, 115), (204, 121, 167)]
+
+def scale_levels(values, mask):
+    """Werte unter mask linear auf die Stufen 1..255 abbilden, alles andere auf 0."""
+    levels = np.zeros(values.shape, dtype=np.uint8)
+    if mask.any():
+        selected = values[mask]
+        low, high = selected.min(), selected.max()
+        span = high - low if high > low else 1
+        levels[mask] = 1 + np.round((selected - low) / span * 254).astype(np.uint8)
+    return levels
+
+def overlay_levels(name, grid, q_table=None, visitation=None):
+    """
+    Stufen und Palette einer Ansicht: (levels, palette, actions). actions ist nur für
+    "policy" gesetzt (gierige Aktion je Zelle, -1 = unbesucht), sonst None.
+    """
+    if name == "visits":
+        return grid.visit_count, VISIT_PALETTE, None
+    if name == "visitation":
+        return scale_levels(np.log1p(visitation.astype(np.float32)), visitation > 0), HEAT_PALETTE, None
+    if name not in Q_OVERLAYS:
+        raise ValueError(f"Unbekannte Ansicht {name!r} (erlaubt: {', '.join(OVERLAYS)})")
+    if q_table.shape != grid.shape:
+        raise ValueError(f"Ansicht {name!r} braucht eine Q-Tabelle mit einer Zeile pro Zelle")
+    visited = q_table.visited
+    if name == "q_max":
+        return scale_levels(q_table.values.max(axis=-1), visited), Q_PALETTE, None
+    actions = np.where(visited, q_table.values.argmax(axis=-1), -1)
+    return (actions + 1).astype(np.uint8), POLICY_PALETTE, actions
+
+def line_pixels(cells, length):
+    """
+    Für eine Achse mit length Pixeln und cells Zellen: (Rand, Zelle) als boolesche Arrays.
+    Rand markiert die Kanten, die pygame.draw.rect(..., 1) auf GridModel.rect zeichnet,
+    Zelle alle Pixel, die überhaupt zu einer Zelle gehören (Rundungslücken nicht).
+    """
+    cell_size = length / cells
+    starts = (np.arange(cells) * cell_size).astype(np.intp)
+    ends = np.minimum(starts + int(cell_size), length)
+    edge = np.zeros(length, dtype=bool)
+    edge[starts] = True
+    edge[ends - 1] = True
+    inside = np.zeros(length + 1, dtype=np.intp)
+    np.add.at(inside, starts, 1)
+    np.add.at(inside, ends, -1)
+    return edge, np.cumsum(inside[:-1]) > 0
+
+class Heatmap:
+    """
+    Zeichnet Stufen-Arrays über eine Palette als Vollbild. update() baut das skalierte Bild
+    (inklusive Grid-Linien) neu auf, draw() ist danach ein einziger Blit und kann jedes
+    Frame aufgerufen werden. Grid-Linien erscheinen erst ab min_line_cell Pixeln pro Zelle,
+    Pfeile für "policy" ab min_arrow_cell.
+    """
+    def __init__(self, size, grid_shape, min_line_cell=4, min_arrow_cell=10):
+        pygame = load_pygame()
+        self.size = size
+        self.rows, self.cols = grid_shape
+        self.cell_width = size[0] / self.cols
+        self.cell_height = size[1] / self.rows
+        self.image = pygame.Surface(size).convert()
+        # Gleiches Pixelformat wie image, sonst lehnt transform.scale das Ziel ab
+        self.cells = pygame.Surface((self.cols, self.rows), 0, self.image)
+        self.lines = None
+        if min(self.cell_width, self.cell_height) >= min_line_cell:
+            self.lines = grid_lines(size, grid_shape)
+        self.arrows = None
+        if min(self.cell_width, self.cell_height) >= min_arrow_cell:
+            self.arrows = [arrow_tile(action, (int(self.cell_width), int(self.cell_height))) for action in ACTIONS]
+
+    def update(self, levels, palette, actions=None):
+        pygame = load_pygame()
+        # surfarray erwartet (Breite, Höhe, 3), also Spalten zuerst
+        pygame.surfarray.blit_array(self.cells, palette[levels.T])
+        pygame.transform.scale(self.cells, self.size, self.image)
+        if actions is not None and self.arrows is not None:
+            rows, cols = np.nonzero(actions >= 0)
+            xs = (cols * self.cell_width).astype(np.intp).tolist()
+            ys = (rows * self.cell_height).astype(np.intp).tolist()
+            tiles = [self.arrows[action] for action in actions[rows, cols].tolist()]
+            self.image.blits(list(zip(tiles, zip(xs, ys))), doreturn=False)
+        if self.lines is not None:
+            self.image.blit(self.lines, (0, 0))
+
+    def draw(self, screen, dest=(0, 0)):
+        return screen.blit(self.image, dest)
+
+_HEATMAPS = {}
+
+def cached_heatmap(size, grid_shape):
+    """Eine Heatmap je (Bildgröße, Gridform), z. B. für field.draw_full_grid_with_lines."""
+    key = (tuple(size), tuple(grid_shape))
+    if key not in _HEATMAPS:
+        _HEATMAPS[key] = Heatmap(size, grid_shape)
+    return _HEATMAPS[key]
+
+_GRID_LINES = {}
+
+def grid_lines(size, grid_shape, color=LIGHT_GRAY):
+    """
+    Grid-Linien als transparente Surface, je (Größe, Form) nur einmal erzeugt. Die Linien
+    sitzen genau dort, wo field.draw_cell die Zellränder zeichnet.
+    """
+    pygame = load_pygame()
+    key = (tuple(size), tuple(grid_shape), tuple(color))
+    if key not in _GRID_LINES:
+        rows, cols = grid_shape
+        width, height = size
+        surface = pygame.Surface(size, pygame.SRCALPHA)
+        surface.fill(tuple(color) + (0,))
+        edge_x, inside_x = line_pixels(cols, width)
+        edge_y, inside_y = line_pixels(rows, height)
+        alpha = pygame.surfarray.pixels_alpha(surface)
+        alpha[(edge_x[:, None] & inside_y[None, :]) | (inside_x[:, None] & edge_y[None, :])] = 255
+        del alpha
+        _GRID_LINES[key] = surface
+    return _GRID_LINES[key]
+
+def arrow_tile(action, size, color=(40, 40, 40)):
+    """Transparente Kachel mit einem Pfeil in Richtung action (d_row, d_col)."""
+    pygame = load_pygame()
+    width, height = size
+    tile = pygame.Surface(size, pygame.SRCALPHA)
+    d_row, d_col = action
+    cx, cy = width / 2, height / 2
+    length = 0.35 * min(width, height)
+    tip = (cx + d_col * length, cy + d_row * length)
+    tail = (cx - d_col * length, cy - d_row * length)
+    # Senkrecht zur Pfeilrichtung für die Spitze
+    px, py = -d_row * length * 0.5, d_col * length * 0.5
+    base = (cx + d_col * length * 0.2, cy + d_row * length * 0.2)
+    pygame.draw.line(tile, color, tail, base, max(1, int(min(width, height) / 10)))
+    pygame.draw.polygon(tile, color, [tip, (base[0] + px, base[1] + py), (base[0] - px, base[1] - py)])
+    return tile
@@ -0,0 +1,108 @@
+"""
+HUD-Bausteine ohne Allokationen pro Frame: Zeichen werden einmal gerastert (GlyphCache),
+Textzeilen nur bei geändertem Text neu zusammengesetzt (TextLine) und das Panel liegt in
+einem dauerhaften SRCALPHA-Puffer, der höchstens alle interval Sekunden (Wanduhr,
+unabhängig von der Simulationsgeschwindigkeit) neu aufgebaut wird.
+"""
+import time
+from settings import HUD_INTERVAL
+from gridmodel import load_pygame
+
+class GlyphCache:
+    """
+    Einmal gerenderte Zeichen je Schrift und Farbe. Zahlen und andere wechselnde Texte
+    werden daraus per Blit zusammengesetzt statt jedes Mal mit font.render.
+    """
+    def __init__(self, font, color=(255, 255, 255)):
+        self.font = font
+        self.color = color
+        self.height = font.get_height()
+        self.glyphs = {}
+
+    def glyph(self, char):
+        glyph = self.glyphs.get(char)
+        if glyph is None:
+            glyph = self.font.render(char, True, self.color)
+            self.glyphs[char] = glyph
+        return glyph
+
+    def width(self, text):
+        return sum(self.glyph(char).get_width() for char in text)
+
+    def draw(self, surface, text, pos):
+        """Zeichnet text ab pos und gibt die Breite zurück."""
+        x, y = pos
+        for char in text:
+            glyph = self.glyph(char)
+            surface.blit(glyph, (x, y))
+            x += glyph.get_width()
+        return x - pos[0]
+
+class TextLine:
+    """Dauerhafte Surface für eine Textzeile; set() setzt sie nur bei geändertem Text neu zusammen."""
+    def __init__(self, glyphs, width):
+        pygame = load_pygame()
+        self.glyphs = glyphs
+        self.surface = pygame.Surface((width, glyphs.height), pygame.SRCALPHA)
+        self.text = None
+
+    def set(self, text):
+        """Gibt True zurück, wenn sich der Text geändert hat."""
+        if text == self.text:
+            return False
+        self.text = text
+        self.surface.fill((0, 0, 0, 0))
+        self.glyphs.draw(self.surface, text, (0, 0))
+        return True
+
+class Panel:
+    """
+    Halbtransparentes Overlay aus Textzeilen in einem wiederverwendeten Puffer. Der Inhalt
+    wird über due()/set_lines() gedrosselt aktualisiert; draw() setzt den Puffer nur neu
+    zusammen, wenn sich etwas geändert hat, und ist sonst ein einziger Blit. Mit
+    extra(surface) kann obenauf noch etwas gezeichnet werden (z. B. ein Slider).
+    """
+    def __init__(self, size, font, num_lines, alpha=160, background=(0, 0, 0), padding=(10, 5), spacing=2,
+                 interval=HUD_INTERVAL, extra=None):
+        pygame = load_pygame()
+        self.surface = pygame.Surface(size, pygame.SRCALPHA)
+        self.surface.set_alpha(alpha)
+        self.background = background
+        self.padding = padding
+        self.spacing = spacing
+        self.interval = interval
+        self.extra = extra
+        self.glyphs = GlyphCache(font)
+        self.lines = [TextLine(self.glyphs, size[0] - padding[0]) for _ in range(num_lines)]
+        self.last_update = None
+        self.dirty = True
+
+    def due(self, now=None):
+        """True, wenn seit der letzten Aktualisierung mindestens interval Sekunden vergangen sind."""
+        now = time.perf_counter() if now is None else now
+        if self.last_update is not None and now - self.last_update < self.interval:
+            return False
+        self.last_update = now
+        return True
+
+    def set_lines(self, texts):
+        for line, text in zip(self.lines, texts):
+            if line.set(text):
+                self.dirty = True
+
+    def invalidate(self):
+        """Erzwingt das Neuzusammensetzen beim nächsten draw (z. B. wenn extra sich ändert)."""
+        self.dirty = True
+
+    def draw(self, screen, pos):
+        if self.dirty:
+            surface = self.surface
+            surface.fill(self.background)
+            x, y = self.padding
+            for line in self.lines:
+                surface.blit(line.surface, (x, y))
+                y += line.surface.get_height() + self.spacing
+            if self.extra is not None:
+                self.extra(surface)
+            self.dirty = False
+        return screen.blit(self.surface, pos)
@@ -1,15 +1,22 @@
 import pygame
+import argparse
 import sys
 import time
-from settings import FPS, WHITE, GRID_COLS, GRID_ROWS
-from field import (
-    create_grid, create_bunker,
-    draw_full_grid_with_lines, overpaint_walls, draw_hovered_cell,
-    draw_house_marker, update_cell_visits
+import numpy as np
+from settings import (
+    MOVE_DELAY, STARVATION_TICKS, MAX_TICKS_PER_FRAME, TURBO_FRAME_BUDGET,
+    CHECKPOINT_INTERVAL, TRACE_PATH, PROFILE_PATH, OVERLAY_INTERVAL
 )
-from character import PacManAgent
-from mines import generate_mines, draw_mines, explosion_animation, play_explosion_sound
-from food import generate_flowers, draw_flowers, eating_animation, play_eating_sound
+from field import create_grid, draw_hovered_cell, VisitDecay
+from mines import ExplosionAnimation, play_explosion_sound, EXPLOSION_SOUND
+from food import EatingAnimation, play_eating_sound, EATING_SOUND
+from scenario import Scenario, load_scenarios, parse_overrides
+from checkpoint import save_training, resume_training
+from profiling import StageTimer, ProfilerToggle
+from renderer import GridRenderer
+from effects import EffectScheduler, sound_cache
+from heatmap import Heatmap, OVERLAYS, Q_OVERLAYS, overlay_levels
+from hud import Panel
 
 # Einfacher Slider für die Spielgeschwindigkeit
 class Slider:
@@ -22,6 +29,8 @@ class Slider:
         self.knob_x = self.value_to_pos(self.value)
         self.dragging = False
         self.offset = (0, 0)
+        # Beschriftung nur bei geändertem Wert neu rendern: (Wert, Surface)
+        self._label = (None, None)
 
     def value_to_pos(self, value):
         ratio = (value - self.min_val) / (self.max_val - self.min_val)
@@ -33,6 +42,8 @@ class Slider:
         return max(self.min_val, min(self.max_val, int(round(value))))
 
     def handle_event(self, event):
+        """Gibt True zurück, wenn sich Wert oder Knopfposition geändert haben."""
+        before = (self.value, self.knob_x)
         if hasattr(event, 'pos'):
             rel_pos = (event.pos[0] - self.offset[0], event.pos[1] - self.offset[1])
         else:
@@ -47,6 +58,7 @@ class Slider:
             if self.dragging and rel_pos:
                 self.value = self.pos_to_value(rel_pos[0])
                 self.knob_x = self.value_to_pos(self.value)
+        return (self.value, self.knob_x) != before
 
     def get_knob_rect(self):
         return pygame.Rect(self.knob_x - self.knob_radius, self.rect.centery - self.knob_radius, self.knob_radius * 2, self.knob_radius * 2)
@@ -55,163 +67,236 @@ class Slider:
         pygame.draw.line(surface, (200, 200, 200), (self.rect.x, self.rect.centery),
                          (self.rect.x + self.rect.width, self.rect.centery), 4)
         pygame.draw.circle(surface, (100, 100, 100), (self.knob_x, self.rect.centery), self.knob_radius)
-        text_surface = font.render(f"Speed: {self.value}", True, (255, 255, 255))
+        value, text_surface = self._label
+        if value != self.value:
+            text_surface = font.render(f"Speed: {self.value}", True, (255, 255, 255))
+            self._label = (self.value, text_surface)
         surface.blit(text_surface, (self.rect.x, self.rect.y - text_surface.get_height() - 2))
 
-def draw_overlay(screen, pacman, font, width, record_generation, record_survival, slider):
-    overlay_width = 300
-    overlay_height = 110
-    overlay_surface = pygame.Surface((overlay_width, overlay_height), pygame.SRCALPHA)
-    overlay_surface.set_alpha(160)
-    overlay_surface.fill((0, 0, 0))
-    current_time = time.time()
-
-    time_left = 20 - (current_time - pacman.last_food_time)
-    if time_left < 0:
-        time_left = 0
-
-    intelligence = pacman.get_intelligence()
-    text_str = (f"Gen: {pacman.generation} | Time left: {int(time_left)}s\n"
-                f"Intelligence: {intelligence}\n"
-                f"Record: Gen {record_generation} survived {int(record_survival)}s")
-    lines = text_str.split("\n")
-    y_offset = 5
-    for line in lines:
-        text_surface = font.render(line, True, (255, 255, 255))
-        overlay_surface.blit(text_surface, (10, y_offset))
-        y_offset += text_surface.get_height() + 2
-
-    slider.offset = ((width - overlay_width) // 2, 10)
-    slider.draw(overlay_surface, font)
-
-    x_pos = (width - overlay_width) // 2
-    y_pos = 10
-    screen.blit(overlay_surface, (x_pos, y_pos))
-
-def main():
+class StatusOverlay:
+    """
+    Status-Overlay oben in der Mitte (Generation, Restzeit, Intelligenz, Rekord, Slider)
+    in einem dauerhaften Panel. Die Texte samt get_intelligence() werden nur alle
+    HUD_INTERVAL Sekunden neu berechnet, der Slider sofort bei einer Änderung.
+    """
+    size = (300, 110)
+
+    def __init__(self, font, width, slider):
+        self.font = font
+        self.slider = slider
+        self.pos = ((width - self.size[0]) // 2, 10)
+        slider.offset = self.pos
+        self.panel = Panel(self.size, font, 3, extra=lambda surface: slider.draw(surface, font))
+
+    def draw(self, screen, pacman, record_generation, record_survival):
+        if self.panel.due():
+            # Verbleibende Zeit bis zum Verhungern in Spielsekunden
+            ticks_left = max(0, STARVATION_TICKS - (pacman.steps - pacman.last_food_step))
+            time_left = ticks_left * MOVE_DELAY
+            self.panel.set_lines([
+                f"Gen: {pacman.generation} | Time left: {int(time_left)}s",
+                f"Intelligence: {pacman.get_intelligence()}",
+                f"Record: Gen {record_generation} survived {int(record_survival * MOVE_DELAY)}s",
+            ])
+        return self.panel.draw(screen, self.pos)
+
+def draw_stage_panel(screen, timer, font, width):
+    """
+    Zeigt die gleitenden Perzentile (p50/p95/p99 in ms) jeder gemessenen Phase
+    am rechten Bildschirmrand an.
+    """
+    summary = timer.summary()
+    if not summary:
+        return None
+    line_height = font.get_linesize()
+    panel_width = 330
+    panel = pygame.Surface((panel_width, (len(summary) + 1) * line_height + 10), pygame.SRCALPHA)
+    panel.fill((0, 0, 0, 160))
+    lines = ["Phase         p50    p95    p99"]
+    lines += [f"{stage:<12} {p50:6.2f} {p95:6.2f} {p99:6.2f}" for stage, (p50, p95, p99) in summary.items()]
+    for i, line in enumerate(lines):
+        panel.blit(font.render(line, True, (255, 255, 255)), (5, 5 + i * line_height))
+    return screen.blit(panel, (width - panel_width - 10, 10))
+
+def simulate_tick(game, tracker, renderer, visit_decay, effects, visitation, checkpoint_path, fresh_layouts=False):
+    """
+    Ein Simulationsschritt inklusive Generationswechsel. Geänderte Zellen werden dem
+    Renderer gemeldet; Effekte und Sounds nur, wenn effects übergeben wird. visitation
+    zählt alle Besuche seit Programmstart (für die Diagnoseansicht). Alle
+    CHECKPOINT_INTERVAL Generationen wird nach checkpoint_path gespeichert. Mit
+    fresh_layouts spielt jede Generation auf einer neuen Karte (wie im Headless-Training).
+    """
+    pacman = game.pacman
+    if not pacman.alive:
+        tracker.end_generation(pacman)
+        if pacman.generation % CHECKPOINT_INTERVAL == 0:
+            save_training(checkpoint_path, pacman, tracker, game.map_seed)
+        if fresh_layouts:
+            game.new_layout()
+            renderer.redraw_all(game.current_mines, game.current_flowers)
+        else:
+            renderer.mark_cells(game.removed_cells())
+            game.reset()
+
+    game.step()
+    if game.last_event == "flower":
+        renderer.mark_cell(pacman.pos)
+        if effects is not None:
+            play_eating_sound()
+            effects.add(EatingAnimation(game.grid, pacman.pos))
+    elif game.last_event == "mine":
+        renderer.mark_cell(pacman.pos)
+        if effects is not None:
+            play_explosion_sound()
+            effects.add(ExplosionAnimation(game.grid, pacman.pos))
+    visitation[pacman.pos] += 1
+    if visit_decay.visit(pacman.pos):
+        renderer.mark_cell(pacman.pos)
+
+def next_overlay(current, pacman, grid):
+    """Nächste verfügbare Diagnoseansicht nach current (None = normales Spielfeld)."""
+    available = [name for name in OVERLAYS if name not in Q_OVERLAYS or pacman.Q.shape == grid.shape]
+    if current is None:
+        return available[0]
+    index = available.index(current) + 1
+    return available[index] if index < len(available) else None
+
+def main(scenario=None, checkpoint_path=None):
+    """
+    Startet das Spiel; scenario (siehe scenario.py) legt Spielfeld, Belegung und Agent fest.
+    Ohne checkpoint_path wird der Checkpoint des Szenarios verwendet (Scenario.checkpoint_path).
+    """
+    if scenario is None:
+        scenario = Scenario()
+    if checkpoint_path is None:
+        checkpoint_path = scenario.checkpoint_path()
     pygame.init()
+    sound_cache.preload(EATING_SOUND, EXPLOSION_SOUND)
     screen = pygame.display.set_mode((0, 0), pygame.FULLSCREEN)
     info = pygame.display.Info()
     width, height = info.current_w, info.current_h
     pygame.display.set_caption("Pac-Man Survival with Elite Learning and Speed Slider")
     clock = pygame.time.Clock()
 
-    grid = create_grid(width, height)
-    bunker_size = 20
-    opening_width = 4
-    top_left_bunker = create_bunker((0, 0), bunker_size, "bottom", opening_width)
-    top_right_bunker = create_bunker((0, GRID_COLS - bunker_size), bunker_size, "bottom", opening_width)
-    bottom_left_bunker = create_bunker((GRID_ROWS - bunker_size, 0), bunker_size, "top", opening_width)
-    bottom_right_bunker = create_bunker((GRID_ROWS - bunker_size, GRID_COLS - bunker_size), bunker_size, "top", opening_width)
-    walls = top_left_bunker.union(top_right_bunker, bottom_left_bunker, bottom_right_bunker)
-    house_pos = (GRID_ROWS // 2, GRID_COLS // 2)
-    cell_size = int(width / GRID_COLS)
-    pacman = PacManAgent(house_pos, cell_size, generation=1)
-
-    obstacles = set()
-    food_positions = set()
-
-    initial_mines = generate_mines(grid, walls, house_pos, 100)
-    initial_flowers = generate_flowers(grid, walls, house_pos, initial_mines, 150)
-    current_mines = set(initial_mines)
-    current_flowers = set(initial_flowers)
+    grid = create_grid(width, height, scenario["rows"], scenario["cols"])
+    cell_size = int(width / scenario["cols"])
+    pacman = scenario.make_agent(cell_size)
+    # Die Simulation läuft in festen Ticks mit denselben Regeln wie im Headless-Training.
+    game = scenario.make_game(pacman, grid)
+    tracker = scenario.make_tracker()
+    meta = resume_training(checkpoint_path, pacman, tracker)
+    if meta is not None and meta.get("map_seed") is not None:
+        game.new_layout(meta["map_seed"])
+    house_pos = game.house_pos
+    walls = game.walls
+    current_mines = game.current_mines
+    current_flowers = game.current_flowers
 
     font = pygame.font.SysFont(None, 24)
+    renderer = GridRenderer(screen, grid, walls, house_pos)
+    renderer.redraw_all(current_mines, current_flowers)
+    effects = EffectScheduler()
+    visit_decay = VisitDecay(grid)
+    visitation = np.zeros(grid.shape, dtype=np.int64)
+    overlay = None
+    heatmap = None
+    overlay_age = 0.0
+    dt = 0.0
+    accumulator = 0.0  # noch nicht simulierte Ticks
+    turbo = False
 
-    record_generation = 0
-    record_survival = 0
-    no_improvement_counter = 0
-    generation_data = []
     slider = Slider(10, 70, 280, 20, min_val=1, max_val=10, initial=1)
+    status = StatusOverlay(font, width, slider)
+    timer = StageTimer()
+    profiler = ProfilerToggle(PROFILE_PATH)
+    panel_font = pygame.font.SysFont("monospace", 16)
 
     running = True
     while running:
+        timer.begin_frame()
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
                 running = False
-            slider.handle_event(event)
+            if slider.handle_event(event):
+                status.panel.invalidate()
             if event.type == pygame.KEYDOWN:
                 if event.key == pygame.K_ESCAPE:
                     running = False
+                elif event.key == pygame.K_F3:
+                    timer.toggle()
+                elif event.key == pygame.K_F4:
+                    timer.export(TRACE_PATH)
+                elif event.key == pygame.K_F5:
+                    profiler.toggle()
+                elif event.key == pygame.K_t:
+                    turbo = not turbo
+                    accumulator = 0.0
+                elif event.key == pygame.K_h:
+                    overlay = next_overlay(overlay, pacman, grid)
+                    overlay_age = OVERLAY_INTERVAL
+                    if heatmap is None:
+                        heatmap = Heatmap((width, height), grid.shape)
+
+        # Effekte laufen mit der eingestellten Spielgeschwindigkeit
+        effects.update(dt * slider.value)
+        timer.lap("events")
+
+        if turbo:
+            # Turbo: so viele Ticks wie in das Zeitbudget passen, dann ein Frame
+            deadline = time.perf_counter() + TURBO_FRAME_BUDGET
+            ticks = 0
+            while ticks % 64 or time.perf_counter() < deadline:
+                simulate_tick(game, tracker, renderer, visit_decay, None, visitation, checkpoint_path,
+                              scenario["fresh_layouts"])
+                ticks += 1
+        else:
+            # Fester Zeitschritt: slider.value / MOVE_DELAY Ticks pro Sekunde, unabhängig von der Framerate
+            accumulator += dt * slider.value / MOVE_DELAY
+            ticks = min(int(accumulator), MAX_TICKS_PER_FRAME)
+            accumulator = min(accumulator - ticks, 1.0)
+            for _ in range(ticks):
+                simulate_tick(game, tracker, renderer, visit_decay, effects, visitation, checkpoint_path,
+                              scenario["fresh_layouts"])
+        timer.lap("simulate")
 
-        if pacman.alive:
-            prev_state = pacman.pos
-            pacman.update(grid, obstacles, food_positions, speed_factor=slider.value)
-            new_state = pacman.pos
-            # Standard-Schrittpenalty
-            reward = -1
-            if pacman.pos in current_flowers:
-                play_eating_sound()
-                eating_animation(screen, grid, pacman.pos, pacman)
-                reward = 10
-                pacman.last_food_time += 10
-                current_flowers.remove(pacman.pos)
-            if pacman.pos in current_mines:
-                play_explosion_sound()
-                explosion_animation(screen, grid, pacman.pos)
-                reward = -100
-                current_mines.remove(pacman.pos)
-                pacman.alive = False
-            if pacman.pos in walls:
-                reward = -100
-                pacman.alive = False
-            if pacman.prev_state is not None and pacman.prev_action is not None:
-                pacman.learn(reward, new_state)
-            current_time = time.time()
-            cell = grid[pacman.pos]
-            cell["visit_count"] = min(5, cell["visit_count"] + 1)
-            cell["last_visit"] = current_time
-            cell["last_decrement"] = None
+        renderer.mark_cells(visit_decay.update(dt, speed_factor=slider.value))
+        timer.lap("visit_decay")
+        if overlay is None:
+            renderer.begin_frame(current_mines, current_flowers)
         else:
-            generation_data.append((pacman.survival_time, pacman.Q.copy()))
-            if pacman.survival_time > record_survival:
-                record_survival = pacman.survival_time
-                record_generation = pacman.generation
-                no_improvement_counter = 0
-            else:
-                no_improvement_counter += 1
-
-            pacman.generation += 1
-
-            if len(generation_data) >= 3:
-                elite = sorted(generation_data, key=lambda x: x[0], reverse=True)[:3]
-                new_Q = {}
-                all_states = set()
-                for entry in elite:
-                    all_states.update(entry[1].keys())
-                for state in all_states:
-                    new_Q[state] = {}
-                    for action in [(0, 1), (0, -1), (1, 0), (-1, 0)]:
-                        values = [entry[1][state][action] for entry in elite if state in entry[1] and action in entry[1][state]]
-                        if values:
-                            new_Q[state][action] = sum(values) / len(values)
-                        else:
-                            new_Q[state][action] = 0.0
-                pacman.Q = new_Q
-                if no_improvement_counter >= 5:
-                    pacman.epsilon = min(1.0, pacman.epsilon + 0.1)
-                    no_improvement_counter = 0
-                generation_data.clear()
-            pacman.reset(house_pos)
-            current_mines = set(initial_mines)
-            current_flowers = set(initial_flowers)
-
-        screen.fill(WHITE)
-        update_cell_visits(grid, speed_factor=slider.value)
-        draw_full_grid_with_lines(screen, grid)
-        overpaint_walls(screen, grid, walls)
-        draw_house_marker(screen, grid, house_pos)
-        draw_mines(screen, grid, current_mines)
-        draw_flowers(screen, grid, current_flowers)
-        pacman.draw(screen, grid)
-        draw_overlay(screen, pacman, font, width, record_generation, record_survival, slider)
-        draw_hovered_cell(screen, grid, pygame.mouse.get_pos(), font)
-
-        pygame.display.flip()
-        clock.tick(FPS * slider.value)
+            # Diagnoseansicht: gedrosselt neu aufbauen, sonst nur ein Blit
+            overlay_age += dt
+            if overlay_age >= OVERLAY_INTERVAL:
+                heatmap.update(*overlay_levels(overlay, grid, pacman.Q, visitation))
+                overlay_age = 0.0
+            heatmap.draw(screen)
+            renderer.invalidate()
+        timer.lap("draw_board")
+        renderer.add_rect(pacman.draw(screen, grid))
+        timer.lap("draw_agent")
+        for rect in effects.draw(screen):
+            renderer.add_rect(rect)
+        timer.lap("draw_effects")
+        renderer.add_rect(status.draw(screen, pacman, tracker.record_generation, tracker.record_survival))
+        if timer.enabled:
+            renderer.add_rect(draw_stage_panel(screen, timer, panel_font, width))
+        timer.lap("draw_overlay")
+        renderer.add_rect(draw_hovered_cell(screen, grid, pygame.mouse.get_pos(), font))
+        timer.lap("draw_hover")
+        renderer.present()
+        timer.lap("flip")
+        timer.end_frame()
+        dt = clock.tick(0 if turbo else scenario["fps"]) / 1000
 
+    save_training(checkpoint_path, pacman, tracker, game.map_seed)
     pygame.quit()
     sys.exit()
 
 if __name__ == '__main__':
-    main()
+    # python main.py [szenario.json] [--set KEY=VALUE ...] [--checkpoint PFAD]
+    parser = argparse.ArgumentParser(description="Learning-Pac mit Anzeige")
+    parser.add_argument("scenario", nargs="?", help="Szenario-Datei (JSON)")
+    parser.add_argument("--set", action="append", metavar="KEY=VALUE", help="Szenario-Wert überschreiben")
+    parser.add_argument("--checkpoint", help="Checkpoint-Datei (Standard: abgeleitet aus dem Szenario)")
+    args = parser.parse_args()
+    main(load_scenarios([args.scenario] if args.scenario else [], parse_overrides(args.set))[0], args.checkpoint)
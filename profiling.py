@@ -0,0 +1,114 @@
+import cProfile
+import csv
+import io
+import json
+import pstats
+import time
+from collections import deque
+
+class StageTimer:
+    """
+    Misst die Dauer der einzelnen Phasen eines Schleifendurchlaufs.
+
+    Die Hauptschleife ruft begin_frame() zu Beginn und lap(name) nach jeder Phase auf;
+    lap misst die Zeit seit dem vorherigen Aufruf. end_frame() schließt den Frame ab.
+    Ist der Timer deaktiviert, kehren alle Aufrufe nach einer einzigen Abfrage zurück.
+    Wird er mitten im Frame eingeschaltet, zählt erst der nächste begin_frame().
+    """
+    def __init__(self, enabled=False, window=300, trace_limit=100000):
+        self.enabled = enabled
+        self.window = window
+        self.samples = {}
+        self.trace = deque(maxlen=trace_limit)
+        self.frame = {}
+        self.frame_index = 0
+        # Zeitpunkt des letzten lap; None, solange seit dem Einschalten kein Frame begonnen hat
+        self._last = None
+
+    def toggle(self):
+        self.enabled = not self.enabled
+        self._last = None
+
+    def begin_frame(self):
+        if not self.enabled:
+            return
+        self.frame = {}
+        self._last = time.perf_counter()
+
+    def lap(self, stage):
+        if not self.enabled or self._last is None:
+            return
+        now = time.perf_counter()
+        self.frame[stage] = self.frame.get(stage, 0.0) + (now - self._last)
+        self._last = now
+
+    def end_frame(self):
+        if not self.enabled or self._last is None:
+            return
+        self.frame_index += 1
+        for stage, duration in self.frame.items():
+            if stage not in self.samples:
+                self.samples[stage] = deque(maxlen=self.window)
+            self.samples[stage].append(duration)
+        self.trace.append((self.frame_index, self.frame))
+
+    def percentiles(self, stage, points=(50, 95, 99)):
+        """Gleitende Perzentile einer Phase in Millisekunden."""
+        values = sorted(self.samples.get(stage, ()))
+        if not values:
+            return tuple(0.0 for _ in points)
+        return tuple(values[min(len(values) - 1, int(len(values) * p / 100))] * 1000 for p in points)
+
+    def summary(self):
+        return {stage: self.percentiles(stage) for stage in self.samples}
+
+    def export(self, path):
+        """
+        Schreibt die aufgezeichneten Frames als CSV (eine Spalte pro Phase, Millisekunden)
+        oder, bei Endung .json, als JSON mit Trace und Perzentil-Zusammenfassung.
+        """
+        stages = list(self.samples)
+        if path.endswith(".json"):
+            data = {
+                "stages": stages,
+                "summary_ms": {stage: dict(zip(("p50", "p95", "p99"), values))
+                               for stage, values in self.summary().items()},
+                "frames": [{"frame": index, **{stage: duration * 1000 for stage, duration in frame.items()}}
+                           for index, frame in self.trace],
+            }
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(data, f)
+            return
+        with open(path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(["frame"] + stages)
+            for index, frame in self.trace:
+                writer.writerow([index] + [f"{frame.get(stage, 0.0) * 1000:.4f}" for stage in stages])
+
+class ProfilerToggle:
+    """
+    Schaltet cProfile per Tastendruck ein und aus. Beim Ausschalten werden die Statistiken
+    in eine Datei geschrieben und die teuersten Funktionen ausgegeben.
+    """
+    def __init__(self, path="profile.pstats", top=20):
+        self.path = path
+        self.top = top
+        self.profile = None
+
+    @property
+    def active(self):
+        return self.profile is not None
+
+    def toggle(self):
+        if self.profile is None:
+            self.profile = cProfile.Profile()
+            self.profile.enable()
+            print("Profiler gestartet")
+            return
+        self.profile.disable()
+        self.profile.dump_stats(self.path)
+        stream = io.StringIO()
+        pstats.Stats(self.profile, stream=stream).sort_stats("cumulative").print_stats(self.top)
+        print(stream.getvalue())
+        print(f"Profil gespeichert in {self.path}")
+        self.profile = None
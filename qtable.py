@@ -0,0 +1,93 @@
+import numpy as np
+from settings import GRID_COLS, GRID_ROWS
+
+# Aktionen in derselben Reihenfolge wie PacManAgent.actions
+ACTIONS = [(0, 1), (0, -1), (1, 0), (-1, 0)]
+ACTION_INDEX = {action: i for i, action in enumerate(ACTIONS)}
+
+class ActionValues:
+    """
+    Sicht auf die vier Q-Werte eines Zustands mit der alten Dict-Schnittstelle
+    (Q[state][action], .values(), .items(), ...). Es wird nichts kopiert.
+    """
+    __slots__ = ("row",)
+
+    def __init__(self, row):
+        self.row = row
+
+    def __getitem__(self, action):
+        return float(self.row[ACTION_INDEX[action]])
+
+    def __setitem__(self, action, value):
+        self.row[ACTION_INDEX[action]] = value
+
+    def __contains__(self, action):
+        return action in ACTION_INDEX
+
+    def __iter__(self):
+        return iter(ACTIONS)
+
+    def __len__(self):
+        return len(ACTIONS)
+
+    def keys(self):
+        return list(ACTIONS)
+
+    def values(self):
+        return self.row.tolist()
+
+    def items(self):
+        return list(zip(ACTIONS, self.row.tolist()))
+
+class QTable:
+    """
+    Dichte Q-Tabelle: ein float32-Array der Form shape + (4,) mit Aktionsindizes
+    statt Aktions-Tupeln. Zusätzlich merkt sich eine boolesche Maske, welche Zustände
+    schon besucht wurden – das entspricht den Schlüsseln der früheren Dict-Tabelle
+    und wird für die Elite-Mittelung und die Mutation benötigt.
+    """
+    def __init__(self, shape=(GRID_ROWS, GRID_COLS), values=None, visited=None):
+        if values is None:
+            values = np.zeros(tuple(shape) + (len(ACTIONS),), dtype=np.float32)
+        if visited is None:
+            visited = np.zeros(values.shape[:-1], dtype=bool)
+        self.values = values
+        self.visited = visited
+
+    @property
+    def shape(self):
+        return self.visited.shape
+
+    def initialize(self, state):
+        self.visited[state] = True
+
+    def flat_index(self, state):
+        """Index des Zustands in values.reshape(-1, 4)."""
+        if isinstance(state, tuple):
+            index = 0
+            for value, size in zip(state, self.visited.shape):
+                index = index * size + value
+            return index
+        return state
+
+    def best_value(self, state):
+        return float(self.values[state].max())
+
+    # Dict-kompatible Schnittstelle
+    def __getitem__(self, state):
+        return ActionValues(self.values[state])
+
+    def __contains__(self, state):
+        return bool(self.visited[state])
+
+    def __len__(self):
+        return int(self.visited.sum())
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def keys(self):
+        return [tuple(index) if len(index) > 1 else int(index[0]) for index in np.argwhere(self.visited).tolist()]
+
+    def copy(self):
+        return QTable(values=self.values.copy(), visited=self.visited.copy())
@@ -0,0 +1,119 @@
+import pygame
+from settings import WHITE
+from field import draw_cell, overpaint_walls, draw_house_marker
+from heatmap import grid_lines
+from mines import draw_mines
+from food import draw_flowers
+
+class GridRenderer:
+    """
+    Inkrementeller Renderer für das Spielfeld.
+
+    Der statische Hintergrund (Grid-Linien, Bunkerwände, Haus) wird einmal auf eine
+    eigene Surface gezeichnet. Darauf aufbauend hält eine zweite Surface das Spielfeld
+    mit Besuchsfarben, Minen und Blumen; davon werden nur geänderte Zellen neu gezeichnet.
+    Alles, was pro Frame obenauf gemalt wird (Agent, Overlay, Hover, Animationen),
+    wird im nächsten Frame aus dieser Surface wiederhergestellt. An die Anzeige gehen
+    nur die betroffenen Rechtecke über pygame.display.update.
+    """
+    def __init__(self, screen, grid, walls, house_pos):
+        self.screen = screen
+        self.grid = grid
+        self.walls = walls
+        self.house_pos = house_pos
+
+        self.background = pygame.Surface(screen.get_size()).convert()
+        self.background.fill(WHITE)
+        # Leeres Grid: die Linien als gecachte Überlagerung statt draw_cell pro Zelle
+        self.background.blit(grid_lines((int(grid.width), int(grid.height)), grid.shape), (0, 0))
+        overpaint_walls(self.background, grid, walls)
+        draw_house_marker(self.background, grid, house_pos)
+        self.board = self.background.copy()
+
+        self.dirty_cells = set()
+        self.overdrawn = []     # in diesem Frame obenauf gemalte Bereiche
+        self.update_rects = []  # an die Anzeige zu übertragende Bereiche
+        self.full_update = True
+
+    def mark_cell(self, pos):
+        self.dirty_cells.add(pos)
+
+    def mark_cells(self, positions):
+        self.dirty_cells.update(positions)
+
+    def add_rect(self, rect):
+        """Meldet einen Bereich, der in diesem Frame direkt auf den Bildschirm gemalt wurde."""
+        if rect is not None:
+            rect = pygame.Rect(rect)
+            self.overdrawn.append(rect)
+            self.update_rects.append(rect)
+
+    def redraw_all(self, mines, flowers):
+        """Baut das komplette Spielfeld neu auf (z. B. nach einer Größenänderung)."""
+        self.board.blit(self.background, (0, 0))
+        for pos, cell in self.grid.items():
+            if cell["visit_count"] > 0 and pos not in self.walls and pos != self.house_pos:
+                draw_cell(self.board, cell)
+        draw_mines(self.board, self.grid, mines)
+        draw_flowers(self.board, self.grid, flowers)
+        self.dirty_cells.clear()
+        self.full_update = True
+
+    def _redraw_cell(self, pos, mines, flowers):
+        cell = self.grid[pos]
+        rect = cell["rect"]
+        self.board.blit(self.background, rect, rect)
+        if pos in self.walls or pos == self.house_pos:
+            return rect
+        self.board.set_clip(rect)
+        if cell["visit_count"] > 0:
+            draw_cell(self.board, cell)
+            # Wände sind leicht vergrößert gezeichnet und ragen in Nachbarzellen hinein.
+            row, col = pos
+            neighbours = [(row + dr, col + dc) for dr in (-1, 0, 1) for dc in (-1, 0, 1)]
+            overpaint_walls(self.board, self.grid, [n for n in neighbours if n in self.walls])
+        if pos in mines:
+            draw_mines(self.board, self.grid, [pos])
+        if pos in flowers:
+            draw_flowers(self.board, self.grid, [pos])
+        self.board.set_clip(None)
+        return rect
+
+    def invalidate(self):
+        """
+        Nach einem Vollbild-Overlay (z. B. heatmap.Heatmap): verwirft die gemerkten Bereiche,
+        im nächsten Frame wird das ganze Spielfeld übertragen.
+        """
+        self.overdrawn = []
+        self.update_rects = []
+        self.full_update = True
+
+    def begin_frame(self, mines, flowers):
+        """
+        Stellt die im letzten Frame übermalten Bereiche wieder her und zeichnet alle
+        als geändert gemeldeten Zellen neu. Danach können Agent, Overlay usw. direkt
+        auf den Bildschirm gemalt und per add_rect gemeldet werden.
+        """
+        restore = self.overdrawn
+        for pos in self.dirty_cells:
+            if pos in self.grid:
+                restore.append(self._redraw_cell(pos, mines, flowers))
+        self.dirty_cells.clear()
+        self.overdrawn = []
+
+        if self.full_update:
+            self.screen.blit(self.board, (0, 0))
+            self.update_rects = []
+            return
+        for rect in restore:
+            self.screen.blit(self.board, rect, rect)
+        self.update_rects = restore
+
+    def present(self):
+        """Überträgt alle geänderten Bereiche dieses Frames auf die Anzeige."""
+        if self.full_update:
+            pygame.display.flip()
+            self.full_update = False
+        else:
+            pygame.display.update(self.update_rects)
+        self.update_rects = []
@@ -0,0 +1,197 @@
+import numpy as np
+
+class SumTree:
+    """
+    Summenbaum über capacity nichtnegative Gewichte für proportionales Ziehen in
+    O(log N). Jeder Knoten fasst fanout Kinder zusammen (levels[0] sind die Blätter,
+    levels[-1] die obersten fanout Summen); der breite Baum hält die Zahl der Ebenen
+    klein, denn Aktualisieren und Ziehen arbeiten vektorisiert auf ganzen Index-Batches,
+    eine Ebene pro NumPy-Schritt.
+    """
+    def __init__(self, capacity, fanout=32):
+        self.fanout = fanout
+        self.levels = []
+        size = capacity
+        while True:
+            size = -(-size // fanout) * fanout
+            self.levels.append(np.zeros(size, dtype=np.float64))
+            if size == fanout:
+                break
+            size //= fanout
+
+    @property
+    def total(self):
+        return self.levels[-1].sum()
+
+    def leaf_values(self, indices):
+        return self.levels[0][indices]
+
+    def update(self, indices, values):
+        nodes = np.asarray(indices, dtype=np.int64)
+        self.levels[0][nodes] = values
+        for child, parent in zip(self.levels, self.levels[1:]):
+            nodes = nodes // self.fanout
+            parent[nodes] = child.reshape(-1, self.fanout)[nodes].sum(axis=1)
+
+    def rebuild(self, values):
+        """Setzt die ersten len(values) Blätter (alle übrigen 0) und berechnet alle Summen neu."""
+        leaves = self.levels[0]
+        leaves[:] = 0
+        leaves[:len(values)] = values
+        for child, parent in zip(self.levels, self.levels[1:]):
+            sums = child.reshape(-1, self.fanout).sum(axis=1)
+            parent[:] = 0
+            parent[:len(sums)] = sums
+
+    def find(self, targets):
+        """Blattindizes, in deren Intervall der kumulierten Summe die Werte targets fallen."""
+        targets = np.array(targets, dtype=np.float64)
+        rows = np.arange(len(targets))
+        nodes = np.zeros(len(targets), dtype=np.int64)
+        for level in reversed(self.levels):
+            block = level.reshape(-1, self.fanout)[nodes]
+            cumulative = np.cumsum(block, axis=1)
+            # Erstes Kind, dessen kumulierte Summe über dem Ziel liegt (Gewicht 0 wird übersprungen)
+            child = np.minimum((cumulative <= targets[:, None]).sum(axis=1), self.fanout - 1)
+            targets -= cumulative[rows, child] - block[rows, child]
+            nodes = nodes * self.fanout + child
+        return nodes
+
+class ReplayBuffer:
+    """
+    Ringpuffer für Übergänge (state, action, reward, next_state, done) in vorab
+    angelegten NumPy-Arrays. Zustände werden als flacher Index in die Q-Tabelle
+    gespeichert (siehe QTable.flat_index).
+
+    Mit prioritized=True wird proportional zu (|TD-Fehler| + eps) ** priority_alpha
+    gezogen; die Verzerrung wird über Importance-Sampling-Gewichte (Exponent beta)
+    ausgeglichen. Die Gewichte stehen in einem SumTree, sodass Ziehen und Aktualisieren
+    O(log N) statt O(capacity) pro Batch kosten; neue Übergänge werden gesammelt und
+    vor dem nächsten Ziehen in einem Zug eingetragen.
+    """
+    def __init__(self, capacity=100000, prioritized=False, priority_alpha=0.6, beta=0.4, eps=1e-3, seed=None):
+        self.capacity = capacity
+        self.prioritized = prioritized
+        self.priority_alpha = priority_alpha
+        self.beta = beta
+        self.eps = eps
+        self.rng = np.random.default_rng(seed)
+
+        self.states = np.zeros(capacity, dtype=np.int32)
+        self.actions = np.zeros(capacity, dtype=np.int8)
+        self.rewards = np.zeros(capacity, dtype=np.float32)
+        self.next_states = np.zeros(capacity, dtype=np.int32)
+        self.dones = np.zeros(capacity, dtype=bool)
+        self.priorities = np.zeros(capacity, dtype=np.float32)
+        self.size = 0
+        self.next_index = 0
+        self.max_priority = 1.0
+        self.tree = SumTree(capacity) if prioritized else None
+        self._pending = []
+
+    def __len__(self):
+        return self.size
+
+    # Gespeicherte Felder für Checkpoints (siehe state/restore)
+    FIELDS = ("states", "actions", "rewards", "next_states", "dones", "priorities")
+
+    def state(self):
+        """
+        Zustand für einen Checkpoint: (meta, arrays) mit Füllstand, Schreibposition,
+        maximaler Priorität und Generatorzustand sowie den belegten Einträgen.
+        """
+        meta = {"capacity": self.capacity, "size": self.size, "next_index": self.next_index,
+                "max_priority": self.max_priority, "rng_state": self.rng.bit_generator.state}
+        arrays = {name: getattr(self, name)[:self.size] for name in self.FIELDS}
+        return meta, arrays
+
+    def restore(self, meta, arrays):
+        """Gegenstück zu state(); die Kapazität muss übereinstimmen."""
+        if meta["capacity"] != self.capacity:
+            raise ValueError(f"Replay-Speicher hat Kapazität {self.capacity}, gespeichert sind {meta['capacity']}")
+        self.size = meta["size"]
+        self.next_index = meta["next_index"]
+        self.max_priority = meta["max_priority"]
+        self.rng.bit_generator.state = meta["rng_state"]
+        for name in self.FIELDS:
+            getattr(self, name)[:self.size] = arrays[name]
+        if self.tree is not None:
+            self._pending.clear()
+            self.tree.rebuild(self.priorities[:self.size].astype(np.float64) ** self.priority_alpha)
+
+    def add(self, state, action, reward, next_state, done):
+        i = self.next_index
+        self.states[i] = state
+        self.actions[i] = action
+        self.rewards[i] = reward
+        self.next_states[i] = next_state
+        self.dones[i] = done
+        # Neue Übergänge mit maximaler Priorität, damit sie mindestens einmal gezogen werden
+        self.priorities[i] = self.max_priority
+        if self.tree is not None:
+            self._pending.append(i)
+        self.next_index = (i + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+
+    def sample(self, batch_size):
+        """
+        Zieht batch_size Indizes. Gibt (indices, weights) zurück; ohne Priorisierung
+        sind alle Gewichte 1.
+        """
+        if not self.prioritized:
+            return self.rng.integers(0, self.size, batch_size), np.ones(batch_size, dtype=np.float32)
+        self._flush_pending()
+        total = self.tree.total
+        targets = self.rng.random(batch_size) * total
+        # Rundungsfehler könnten in die leeren Blätter hinter size führen
+        indices = np.minimum(self.tree.find(targets), self.size - 1)
+        probabilities = self.tree.leaf_values(indices) / total
+        weights = (self.size * probabilities) ** -self.beta
+        return indices, (weights / weights.max()).astype(np.float32)
+
+    def _flush_pending(self):
+        if self._pending:
+            indices = np.array(self._pending, dtype=np.int64)
+            self._pending.clear()
+            self.tree.update(indices, self.priorities[indices].astype(np.float64) ** self.priority_alpha)
+
+    def update_priorities(self, indices, td_errors):
+        priorities = np.abs(td_errors) + self.eps
+        self.priorities[indices] = priorities
+        self.max_priority = max(self.max_priority, float(priorities.max()))
+        if self.tree is not None:
+            self._flush_pending()
+            # Bei doppelt gezogenen Indizes gilt wie oben die zuletzt geschriebene Priorität
+            self.tree.update(indices, self.priorities[indices].astype(np.float64) ** self.priority_alpha)
+
+    def train(self, q_table, batch_size, alpha, gamma):
+        """
+        Zieht einen Mini-Batch und wendet die TD-Updates vektorisiert auf die Q-Tabelle an.
+        Gibt die TD-Fehler des Batches zurück.
+        """
+        indices, weights = self.sample(batch_size)
+        # Flache Sicht ohne Kopie (eine Zuweisung an shape schlägt fehl, statt still zu kopieren)
+        q = q_table.values.view()
+        q.shape = (-1, q_table.values.shape[-1])
+        td_errors = batch_td_update(
+            q,
+            self.states[indices], self.actions[indices], self.rewards[indices],
+            self.next_states[indices], self.dones[indices], alpha, gamma, weights,
+        )
+        if self.prioritized:
+            self.update_priorities(indices, td_errors)
+        return td_errors
+
+def batch_td_update(q, states, actions, rewards, next_states, dones, alpha, gamma, weights=None):
+    """
+    Tabellarisches Q-Learning-Update für einen ganzen Batch auf q (Form (Zustände, Aktionen)).
+    Kommt dasselbe (state, action)-Paar mehrfach vor, wird sein Update gemittelt statt
+    aufsummiert, damit der Schritt nicht über das Ziel hinausschießt.
+    """
+    targets = rewards + gamma * q[next_states].max(axis=1) * ~dones
+    td_errors = targets - q[states, actions]
+    steps = alpha * td_errors if weights is None else alpha * weights * td_errors
+    flat = states.astype(np.int64) * q.shape[1] + actions
+    _, inverse, counts = np.unique(flat, return_inverse=True, return_counts=True)
+    np.add.at(q, (states, actions), steps / counts[inverse])
+    return td_errors
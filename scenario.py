@@ -0,0 +1,235 @@
+"""
+Szenarien: Spielfeldgröße, Bunker, Minen-/Blumendichte, Seeds und Agenten-Hyperparameter
+als JSON-Datei statt fest verdrahteter Werte.
+
+    python scenario.py                                   # Standardszenario headless trainieren
+    python scenario.py scenarios/small.json              # Szenario aus Datei
+    python scenario.py a.json b.json --set seed=3 --set alpha=0.3
+    python scenario.py --set rows=50 --set cols=50 --print-config
+    python scenario.py a.json b.json --checkpoint        # je Szenario eigener Checkpoint
+
+Nicht angegebene Schlüssel übernehmen die Werte aus DEFAULTS.
+"""
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+from settings import CHECKPOINT_PATH, FPS, GRID_COLS, GRID_ROWS, STATE_ENCODER
+from field import bunker_mask
+from encoding import make_encoder
+from character import PacManAgent
+from evolution import Recombiner
+from simulation import GenerationTracker, HeadlessGame, train
+from arena import Arena
+from trainer import PopulationTrainer
+from trajectory import TrajectoryLog
+
+DEFAULTS = {
+    # Spielfeld
+    "rows": GRID_ROWS,
+    "cols": GRID_COLS,
+    "fps": FPS,
+    "bunker_size": 20,          # Kantenlänge der vier Eckbunker, 0 = keine Bunker
+    "bunker_opening": 4,
+    # Belegung: feste Anzahl oder, falls gesetzt, Anteil der freien Zellen
+    "mines": 100,
+    "flowers": 150,
+    "mine_density": None,
+    "flower_density": None,
+    # Karten-Seed (auch für die Exploration); None = zufällig
+    "seed": None,
+    # Agent
+    "encoder": STATE_ENCODER,
+    "epsilon": 0.1,
+    "alpha": 0.5,
+    "gamma": 0.9,
+    # Replay-Speicher (replay.py): Mini-Batch-Updates aus gespeicherten Übergängen
+    "replay": False,
+    "replay_batch": 32,
+    "replay_every": 4,
+    # Training
+    "generations": 200,
+    "elite_size": 3,
+    "patience": 5,
+    "epsilon_bump": 0.1,        # Anhebung der Explorationsrate nach patience Generationen ohne Rekord
+    "fresh_layouts": False,
+    "merge": "mean",
+    "mutation": None,
+    "mutation_rate": 0.05,
+    "mutation_strength": 0.1,
+    # Trajektorien-Log (trajectory.py): jede Episode wird an diese Datei angehängt, None = aus
+    "trajectory_log": None,
+    # Arena (arena.py): Agenten auf einem gemeinsamen Feld, verteilt auf agent_groups Q-Tabellen
+    "agents": 100,
+    "agent_groups": 1,
+}
+
+# Schlüssel, die nur Laufdauer, Anzeige oder Ausgaben betreffen; sie gehen nicht in
+# den Checkpoint-Namen ein (siehe Scenario.checkpoint_path)
+RUN_KEYS = ("fps", "generations", "trajectory_log", "agents", "agent_groups")
+
+class Scenario:
+    """Ein Satz Szenario-Werte; unbekannte Schlüssel sind ein Fehler (Tippfehler-Schutz)."""
+    def __init__(self, **values):
+        unknown = set(values) - set(DEFAULTS)
+        if unknown:
+            raise ValueError(f"Unbekannte Szenario-Schlüssel: {', '.join(sorted(unknown))}")
+        self.values = dict(DEFAULTS)
+        self.values.update(values)
+
+    @classmethod
+    def from_file(cls, path):
+        with open(path, encoding="utf-8") as f:
+            return cls(**json.load(f))
+
+    def save(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.values, f, indent=2)
+
+    def with_overrides(self, **overrides):
+        return Scenario(**{**self.values, **overrides})
+
+    def __getitem__(self, key):
+        return self.values[key]
+
+    def checkpoint_path(self):
+        """
+        Checkpoint-Datei dieses Szenarios: CHECKPOINT_PATH für das Standardszenario, sonst
+        mit einer Kennung der Werte im Namen, damit sich Szenarien nicht gegenseitig
+        überschreiben oder fremde Q-Tabellen laden.
+        """
+        values = {key: value for key, value in self.values.items() if key not in RUN_KEYS}
+        if values == {key: value for key, value in DEFAULTS.items() if key not in RUN_KEYS}:
+            return CHECKPOINT_PATH
+        digest = hashlib.sha1(json.dumps(values, sort_keys=True).encode("utf-8")).hexdigest()[:10]
+        root, ext = os.path.splitext(CHECKPOINT_PATH)
+        return f"{root}-{digest}{ext}"
+
+    def free_cells(self):
+        """Anzahl Zellen, auf denen Minen und Blumen liegen dürfen (ohne Wände und Haus)."""
+        walls = bunker_mask(self["rows"], self["cols"], self["bunker_size"], self["bunker_opening"])
+        return self["rows"] * self["cols"] - int(walls.sum()) - 1
+
+    def counts(self):
+        """(Minen, Blumen) – aus den Dichten, sofern angegeben, sonst die festen Anzahlen."""
+        free = None
+        counts = []
+        for count, density in ((self["mines"], self["mine_density"]), (self["flowers"], self["flower_density"])):
+            if density is not None:
+                free = self.free_cells() if free is None else free
+                count = round(density * free)
+            counts.append(count)
+        return tuple(counts)
+
+    def game_kwargs(self):
+        """Argumente für HeadlessGame (und PopulationTrainer/simulation.train)."""
+        num_mines, num_flowers = self.counts()
+        return {
+            "rows": self["rows"], "cols": self["cols"],
+            "bunker_size": self["bunker_size"], "bunker_opening": self["bunker_opening"],
+            "num_mines": num_mines, "num_flowers": num_flowers,
+        }
+
+    def make_encoder(self):
+        if self["encoder"] == "position":
+            return make_encoder("position", rows=self["rows"], cols=self["cols"])
+        return make_encoder(self["encoder"])
+
+    def make_agent(self, cell_size=1):
+        pacman = PacManAgent((self["rows"] // 2, self["cols"] // 2), cell_size, encoder=self.make_encoder(),
+                             grid_shape=(self["rows"], self["cols"]))
+        pacman.epsilon = self["epsilon"]
+        pacman.alpha = self["alpha"]
+        pacman.gamma = self["gamma"]
+        if self["replay"]:
+            pacman.enable_replay(batch_size=self["replay_batch"], replay_every=self["replay_every"], seed=self["seed"])
+        return pacman
+
+    def make_recombiner(self):
+        return Recombiner(self["merge"], mutation=self["mutation"], mutation_rate=self["mutation_rate"],
+                          mutation_strength=self["mutation_strength"], seed=self["seed"])
+
+    def make_tracker(self):
+        return GenerationTracker(self["elite_size"], self["patience"], self.make_recombiner(), self["epsilon_bump"])
+
+    def make_trainer(self, population_size=32, workers=None):
+        """PopulationTrainer mit denselben Elite-, Explorations- und Kreuzungswerten wie make_tracker."""
+        return PopulationTrainer(population_size, self["elite_size"], workers, seed=self["seed"],
+                                 epsilon=self["epsilon"], patience=self["patience"], encoder=self.make_encoder(),
+                                 fresh_layouts=self["fresh_layouts"], recombiner=self.make_recombiner(),
+                                 epsilon_bump=self["epsilon_bump"], **self.game_kwargs())
+
+    def make_trajectory_log(self):
+        if self["trajectory_log"] is None:
+            return None
+        return TrajectoryLog(self["trajectory_log"], **self.game_kwargs())
+
+    def make_game(self, pacman=None, grid=None):
+        return HeadlessGame(pacman if pacman is not None else self.make_agent(), seed=self["seed"],
+                            grid=grid, trajectory=self.make_trajectory_log(), **self.game_kwargs())
+
+    def make_arena(self, agents=None, groups=None):
+        return Arena(agents if agents is not None else self["agents"],
+                     groups if groups is not None else self["agent_groups"],
+                     seed=self["seed"], encoder=self.make_encoder(), epsilon=self["epsilon"],
+                     alpha=self["alpha"], gamma=self["gamma"], **self.game_kwargs())
+
+    def train(self, generations=None, checkpoint_path=None, report=None):
+        """Trainiert headless nach diesem Szenario; gibt (pacman, tracker) zurück."""
+        return train(generations if generations is not None else self["generations"], seed=self["seed"],
+                     checkpoint_path=checkpoint_path, fresh_layouts=self["fresh_layouts"], report=report,
+                     pacman=self.make_agent(), tracker=self.make_tracker(),
+                     trajectory=self.make_trajectory_log(), **self.game_kwargs())
+
+def parse_overrides(assignments):
+    """["alpha=0.3", "seed=1"] -> {"alpha": 0.3, "seed": 1}; Werte als JSON, sonst Text."""
+    overrides = {}
+    for assignment in assignments or ():
+        key, _, text = assignment.partition("=")
+        try:
+            overrides[key] = json.loads(text)
+        except json.JSONDecodeError:
+            overrides[key] = text
+    return overrides
+
+def load_scenarios(paths, overrides=None):
+    scenarios = [Scenario.from_file(path) for path in paths] if paths else [Scenario()]
+    return [scenario.with_overrides(**(overrides or {})) for scenario in scenarios]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Learning-Pac headless nach Szenario-Dateien trainieren")
+    parser.add_argument("scenarios", nargs="*", help="Szenario-Dateien (JSON); ohne Angabe das Standardszenario")
+    parser.add_argument("--set", action="append", metavar="KEY=VALUE", help="Szenario-Wert überschreiben")
+    parser.add_argument("--generations", type=int, help="Anzahl Generationen (überschreibt das Szenario)")
+    parser.add_argument("--checkpoint", nargs="?", const=True, metavar="PATH",
+                        help="Checkpoint fortsetzen und speichern; ohne PATH je Szenario Scenario.checkpoint_path()")
+    parser.add_argument("--print-config", action="store_true", help="nur das aufgelöste Szenario ausgeben")
+    parser.add_argument("--output", help="Ergebnisse als JSON in diese Datei schreiben")
+    args = parser.parse_args(argv)
+
+    if isinstance(args.checkpoint, str) and len(args.scenarios) > 1:
+        parser.error("--checkpoint PATH gilt nur für ein Szenario; ohne PATH bekommt jedes Szenario einen eigenen")
+    scenarios = load_scenarios(args.scenarios, parse_overrides(args.set))
+    if args.print_config:
+        for scenario in scenarios:
+            print(json.dumps(scenario.values, indent=2))
+        return 0
+
+    results = []
+    for name, scenario in zip(args.scenarios or ["default"], scenarios):
+        start = time.perf_counter()
+        checkpoint_path = scenario.checkpoint_path() if args.checkpoint is True else args.checkpoint
+        pacman, tracker = scenario.train(args.generations, checkpoint_path)
+        elapsed = time.perf_counter() - start
+        results.append({"scenario": name, "config": scenario.values, "record_survival": tracker.record_survival,
+                        "record_generation": tracker.record_generation, "seconds": elapsed})
+        print(f"{name}: Rekord {tracker.record_survival} Ticks in Gen {tracker.record_generation} ({elapsed:.2f}s)")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
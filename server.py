@@ -0,0 +1,248 @@
+"""
+Trainingsserver: trainiert headless nach einem Szenario und streamt den Fortschritt an
+beliebig viele lokale Clients (z. B. viewer.py), die sich jederzeit an- und abmelden können.
+
+    python server.py [szenario.json] [--port 8765] [--set KEY=VALUE ...]
+
+Protokoll: TCP auf localhost, eine JSON-Nachricht pro Zeile.
+
+Server -> Client
+    {"type": "hello", "rows", "cols", "walls": [flache Indizes], "house": [row, col]}
+    {"type": "generation", "generation", "survival", "record", "record_generation",
+     "epsilon", "steps_per_sec"}
+    {"type": "frame", "generation", "steps", "pos", "mines", "flowers"}   (nach "frames")
+    {"type": "ack", "cmd", ...} bzw. {"type": "error", "message"}
+
+Client -> Server
+    {"cmd": "pause"} / {"cmd": "resume"}
+    {"cmd": "speed", "ticks_per_second": 50}      (null = so schnell wie möglich)
+    {"cmd": "epsilon", "value": 0.05}
+    {"cmd": "snapshot", "path": "snapshot.pacq"}  (Q-Tabelle und Trainingszustand)
+    {"cmd": "frames", "fps": 10}                  (Spielfeld-Frames abonnieren, 0 = aus)
+
+Langsame Clients bremsen die Simulation nie: jeder Client hat eine begrenzte Warteschlange,
+bei Überlauf wird die älteste Nachricht verworfen.
+"""
+import argparse
+import asyncio
+import json
+import sys
+import time
+import numpy as np
+from gridmodel import WALL
+from checkpoint import save_training
+from scenario import load_scenarios, parse_overrides
+
+DEFAULT_PORT = 8765
+
+def encode_message(message):
+    return (json.dumps(message) + "\n").encode("utf-8")
+
+class ClientConnection:
+    """Warteschlange und Frame-Abo eines verbundenen Clients."""
+    def __init__(self, writer, queue_size):
+        self.writer = writer
+        self.queue = asyncio.Queue(maxsize=queue_size)
+        self.frame_interval = 0.0   # Sekunden zwischen Frames, 0 = kein Abo
+        self.last_frame = 0.0
+
+    def send(self, data):
+        if self.queue.full():
+            self.queue.get_nowait()
+        self.queue.put_nowait(data)
+
+    async def pump(self):
+        """Schreibt die Warteschlange in den Socket, bis die Verbindung endet."""
+        while True:
+            data = await self.queue.get()
+            self.writer.write(data)
+            await self.writer.drain()
+
+class TrainingServer:
+    """
+    Führt die Headless-Simulation in Häppchen von höchstens chunk_time Sekunden aus und
+    gibt dazwischen die Kontrolle an die Ereignisschleife ab, damit Clients bedient werden.
+    """
+    def __init__(self, scenario, host="127.0.0.1", port=DEFAULT_PORT, chunk_time=0.02, queue_size=256):
+        self.scenario = scenario
+        self.host = host
+        self.port = port
+        self.chunk_time = chunk_time
+        self.queue_size = queue_size
+        self.game = scenario.make_game()
+        self.tracker = scenario.make_tracker()
+        self.clients = set()
+        self.running = asyncio.Event()
+        self.running.set()
+        self.ticks_per_second = None
+        self.stopped = False
+        self._generation_start = time.perf_counter()
+
+    # --- Nachrichten -------------------------------------------------------
+
+    def hello(self):
+        grid = self.game.grid
+        return {
+            "type": "hello", "rows": grid.rows, "cols": grid.cols,
+            "walls": np.flatnonzero(grid.cell_type & WALL).tolist(),
+            "house": list(self.game.house_pos),
+        }
+
+    def frame(self):
+        game = self.game
+        return {
+            "type": "frame", "generation": game.pacman.generation, "steps": game.pacman.steps,
+            "pos": list(game.pacman.pos),
+            "mines": np.flatnonzero(game.current_mines.mask()).tolist(),
+            "flowers": np.flatnonzero(game.current_flowers.mask()).tolist(),
+        }
+
+    def broadcast(self, message):
+        if not self.clients:
+            return
+        data = encode_message(message)
+        for client in self.clients:
+            client.send(data)
+
+    def handle_command(self, message, client):
+        """Wendet eine Steuernachricht an und gibt die Antwort zurück."""
+        cmd = message.get("cmd")
+        if cmd == "pause":
+            self.running.clear()
+        elif cmd == "resume":
+            self.running.set()
+        elif cmd == "speed":
+            value = message.get("ticks_per_second")
+            self.ticks_per_second = None if value is None else max(0.1, float(value))
+            return {"type": "ack", "cmd": cmd, "ticks_per_second": self.ticks_per_second}
+        elif cmd == "epsilon":
+            self.game.pacman.epsilon = min(1.0, max(0.0, float(message["value"])))
+            return {"type": "ack", "cmd": cmd, "epsilon": self.game.pacman.epsilon}
+        elif cmd == "snapshot":
+            path = message.get("path", "snapshot.pacq")
+            # Läuft zwischen zwei Simulations-Häppchen, die Q-Tabelle ist also konsistent.
+            save_training(path, self.game.pacman, self.tracker, self.game.map_seed)
+            return {"type": "ack", "cmd": cmd, "path": path}
+        elif cmd == "frames":
+            fps = float(message.get("fps", 0))
+            client.frame_interval = 1 / fps if fps > 0 else 0.0
+            return {"type": "ack", "cmd": cmd, "fps": fps}
+        else:
+            return {"type": "error", "message": f"Unbekanntes Kommando {cmd!r}"}
+        return {"type": "ack", "cmd": cmd}
+
+    # --- Verbindungen ------------------------------------------------------
+
+    async def handle_client(self, reader, writer):
+        client = ClientConnection(writer, self.queue_size)
+        self.clients.add(client)
+        client.send(encode_message(self.hello()))
+        pump = asyncio.create_task(client.pump())
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    reply = self.handle_command(json.loads(line), client)
+                except (ValueError, KeyError, TypeError, OSError) as e:
+                    reply = {"type": "error", "message": str(e)}
+                client.send(encode_message(reply))
+        except ConnectionError:
+            pass
+        finally:
+            self.clients.discard(client)
+            pump.cancel()
+            writer.close()
+
+    # --- Simulation --------------------------------------------------------
+
+    def end_generation(self):
+        game, tracker = self.game, self.tracker
+        pacman = game.pacman
+        elapsed = time.perf_counter() - self._generation_start
+        survival = pacman.survival_time
+        tracker.end_generation(pacman)
+        self.broadcast({
+            "type": "generation", "generation": pacman.generation - 1, "survival": survival,
+            "record": tracker.record_survival, "record_generation": tracker.record_generation,
+            "epsilon": pacman.epsilon, "steps_per_sec": survival / elapsed if elapsed > 0 else 0.0,
+        })
+        if self.scenario["fresh_layouts"]:
+            game.new_layout()
+        else:
+            game.reset()
+        self._generation_start = time.perf_counter()
+
+    def run_ticks(self, max_ticks):
+        """Simuliert bis zu max_ticks Schritte, höchstens aber chunk_time Sekunden lang."""
+        game = self.game
+        deadline = time.perf_counter() + self.chunk_time
+        ticks = 0
+        while ticks < max_ticks:
+            if not game.pacman.alive:
+                self.end_generation()
+            game.step()
+            ticks += 1
+            if ticks % 64 == 0 and time.perf_counter() >= deadline:
+                break
+        return ticks
+
+    def send_frames(self):
+        now = time.perf_counter()
+        data = None
+        for client in self.clients:
+            if client.frame_interval and now - client.last_frame >= client.frame_interval:
+                data = data or encode_message(self.frame())
+                client.send(data)
+                client.last_frame = now
+
+    async def simulate(self):
+        accumulator = 0.0
+        last = time.perf_counter()
+        while not self.stopped:
+            await self.running.wait()
+            now = time.perf_counter()
+            if self.ticks_per_second is None:
+                self.run_ticks(sys.maxsize)
+            else:
+                # Fester Zeitschritt wie in main: angesammelte Ticks seit dem letzten Häppchen
+                accumulator = min(accumulator + (now - last) * self.ticks_per_second, self.ticks_per_second)
+                accumulator -= self.run_ticks(int(accumulator))
+            last = now
+            self.send_frames()
+            if self.ticks_per_second is None:
+                await asyncio.sleep(0)
+            else:
+                await asyncio.sleep(min(0.05, 1 / self.ticks_per_second))
+
+    async def serve(self):
+        server = await asyncio.start_server(self.handle_client, self.host, self.port)
+        print(f"Trainingsserver auf {self.host}:{self.port}")
+        async with server:
+            await self.simulate()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Headless-Training mit Live-Metriken für lokale Clients")
+    parser.add_argument("scenario", nargs="?", help="Szenario-Datei (JSON)")
+    parser.add_argument("--set", action="append", metavar="KEY=VALUE", help="Szenario-Wert überschreiben")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--speed", type=float, help="Ticks pro Sekunde (Standard: unbegrenzt)")
+    args = parser.parse_args(argv)
+
+    scenario = load_scenarios([args.scenario] if args.scenario else [], parse_overrides(args.set))[0]
+
+    async def run():
+        server = TrainingServer(scenario, args.host, args.port)
+        server.ticks_per_second = args.speed
+        await server.serve()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
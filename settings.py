@@ -12,3 +12,30 @@ WHITE = (255, 255, 255)
 BLACK = (0, 0, 0)
 LIGHT_GRAY = (230, 230, 230)  # Sehr helles Grau für die Grid-Linien
 WALL_COLOR = (100, 100, 100)    # Farbe der Walls (dunkleres Grau)
+
+# Simulation in Ticks (ein Tick = ein Bewegungsschritt des Agenten)
+MOVE_DELAY = 0.4           # Sekunden zwischen zwei Bewegungen im Echtzeitmodus
+STARVATION_TICKS = 50      # 20 Sekunden ohne Nahrung = 50 Schritte
+FLOWER_BONUS_TICKS = 25    # Eine Blume verschafft 10 Sekunden = 25 Schritte
+
+# Checkpoints (Q-Tabelle und Trainingszustand)
+CHECKPOINT_PATH = "checkpoint.pacq"
+CHECKPOINT_INTERVAL = 10   # alle 10 Generationen speichern
+
+# Instrumentierung (F3: Zeitmessung/Panel, F4: Trace exportieren, F5: cProfile)
+TRACE_PATH = "stage_trace.json"
+PROFILE_PATH = "profile.pstats"
+
+# Fester Zeitschritt: höchstens so viele Ticks pro gerendertem Frame (sonst Spirale bei Überlast)
+MAX_TICKS_PER_FRAME = 1000
+# Turbo-Modus (Taste T): Simulationszeit pro gerendertem Frame in Sekunden
+TURBO_FRAME_BUDGET = 0.1
+
+# HUD-Texte höchstens alle n Sekunden aktualisieren (Wanduhr, unabhängig vom Speed-Slider)
+HUD_INTERVAL = 0.1
+
+# Diagnoseansichten (Taste H, siehe heatmap.py): Neuaufbau höchstens alle n Sekunden
+OVERLAY_INTERVAL = 0.25
+
+# Zustandskodierung des Agenten: "position" (eine Q-Zeile pro Zelle) oder "local" (kartenunabhängig)
+STATE_ENCODER = "position"
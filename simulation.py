@@ -0,0 +1,271 @@
+import random
+import numpy as np
+from settings import GRID_COLS, GRID_ROWS, STARVATION_TICKS, FLOWER_BONUS_TICKS, CHECKPOINT_INTERVAL
+from field import create_grid, generate_layout
+from character import PacManAgent
+from evolution import Recombiner
+from gridmodel import WALL, MINE, FLOWER, HOUSE
+from qtable import ACTION_INDEX
+from distfield import DistanceField
+from checkpoint import save_training, resume_training
+
+class GenerationTracker:
+    """
+    Buchführung über die Generationen: Rekord, Elite-Mittelung der Q-Tabellen
+    und Anhebung der Explorationsrate um epsilon_bump nach patience Generationen ohne
+    neuen Rekord. Wie die Eliten kombiniert werden, bestimmt der Recombiner
+    (standardmäßig zustandsweiser Mittelwert).
+    """
+    def __init__(self, elite_size=3, patience=5, recombiner=None, epsilon_bump=0.1):
+        self.elite_size = elite_size
+        self.patience = patience
+        self.epsilon_bump = epsilon_bump
+        self.recombiner = recombiner if recombiner is not None else Recombiner()
+        self.record_generation = 0
+        self.record_survival = 0
+        self.no_improvement_counter = 0
+        self.generation_data = []
+
+    def end_generation(self, pacman):
+        """
+        Wird aufgerufen, wenn der Agent gestorben ist. Aktualisiert den Rekord und
+        ersetzt nach elite_size Generationen die Q-Tabelle durch die Kombination der Eliten.
+        """
+        self.generation_data.append((pacman.survival_time, pacman.Q.copy()))
+        if pacman.survival_time > self.record_survival:
+            self.record_survival = pacman.survival_time
+            self.record_generation = pacman.generation
+            self.no_improvement_counter = 0
+        else:
+            self.no_improvement_counter += 1
+
+        pacman.generation += 1
+
+        if len(self.generation_data) >= self.elite_size:
+            elite = sorted(self.generation_data, key=lambda x: x[0], reverse=True)[:self.elite_size]
+            pacman.Q = self.recombiner.combine_tables([entry[1] for entry in elite], [entry[0] for entry in elite])
+            if self.no_improvement_counter >= self.patience:
+                pacman.epsilon = min(1.0, pacman.epsilon + self.epsilon_bump)
+                self.no_improvement_counter = 0
+            self.generation_data.clear()
+
+class LayoutGame:
+    """
+    Gemeinsame Kartenverwaltung von HeadlessGame und arena.Arena: Grid mit Wand-, Minen-
+    und Blumenschicht, die Karte aus field.generate_layout (gecacht je Seed, der Seed
+    steht in map_seed) und Distanzfelder.
+
+    Distanzfelder (distance_field) werden erst beim ersten Zugriff berechnet; danach
+    werden sie beim Fressen einer Blume bzw. Auslösen einer Mine inkrementell
+    aktualisiert und bei _restore_layout() aus einer Kopie der Startbelegung
+    wiederhergestellt. Unterklassen liefern _random_map_seed() und reset().
+    """
+    def _init_layout(self, grid, rows, cols, bunker_size, bunker_opening, num_mines, num_flowers, map_seed=None):
+        if grid is None:
+            # Eine Zelle = ein Pixel; das Grid wird nur für die Positionen benötigt.
+            grid = create_grid(cols, rows, rows, cols)
+        self.grid = grid
+        self.num_mines = num_mines
+        self.num_flowers = num_flowers
+        self.bunker_size = bunker_size
+        self.bunker_opening = bunker_opening
+        self.walls = grid.layer(WALL)
+        self.current_mines = grid.layer(MINE)
+        self.current_flowers = grid.layer(FLOWER)
+        # Schicht-Bit -> [DistanceField, Zustand bei Startbelegung oder None]
+        self.distance_fields = {}
+        self._load_layout(map_seed if map_seed is not None else self._random_map_seed())
+        grid.set_cells([self.house_pos], HOUSE)
+
+    def _random_map_seed(self):
+        raise NotImplementedError
+
+    def _load_layout(self, map_seed):
+        layout = generate_layout(map_seed, self.grid.rows, self.grid.cols, self.bunker_size,
+                                 self.bunker_opening, self.num_mines, self.num_flowers)
+        self.map_seed = map_seed
+        self.layout = layout
+        self.house_pos = layout.house_pos
+        self.walls.assign_mask(layout.walls)
+        # Startbelegung als boolesche Masken (schreibgeschützt, aus dem Karten-Cache)
+        self.initial_mines = layout.mines
+        self.initial_flowers = layout.flowers
+        for entry in self.distance_fields.values():
+            entry[1] = None
+
+    def _restore_layout(self):
+        """Stellt Minen, Blumen und Distanzfelder der Startbelegung wieder her."""
+        self.current_mines.assign_mask(self.initial_mines)
+        self.current_flowers.assign_mask(self.initial_flowers)
+        for entry in self.distance_fields.values():
+            field, initial = entry
+            if initial is None:
+                field.compute()
+                entry[1] = field.state()
+            else:
+                field.restore(initial)
+
+    def distance_field(self, bit):
+        """
+        Distanzfeld zur nächsten Zelle der Schicht bit (FLOWER, MINE oder WALL) für
+        O(1)-Abfragen pro Schritt. Blumen und Minen werden um die Wände herum gemessen.
+        """
+        entry = self.distance_fields.get(bit)
+        if entry is None:
+            entry = [DistanceField(self.grid, bit, blocked_bits=0 if bit == WALL else WALL), None]
+            self.distance_fields[bit] = entry
+        return entry[0]
+
+    def _remove_source(self, bit, pos):
+        entry = self.distance_fields.get(bit)
+        if entry is not None:
+            entry[0].remove_source(pos)
+
+    def new_layout(self, seed=None):
+        """
+        Lädt die Minen- und Blumenbelegung zu seed (ohne seed eine neue zufällige, z. B.
+        pro Generation, wenn der Agent mit einem kartenunabhängigen Encoder trainiert)
+        und setzt zurück.
+        """
+        self._load_layout(seed if seed is not None else self._random_map_seed())
+        self.reset()
+
+class HeadlessGame(LayoutGame):
+    """
+    Simulation ohne Anzeige und ohne Wanduhr. Ein Aufruf von step() entspricht
+    genau einem Bewegungsschritt; Überlebens- und Hungerzeit werden in Ticks gemessen.
+
+    Karte und Distanzfelder verwaltet LayoutGame: ohne seed wird ein zufälliger
+    Karten-Seed gezogen, der in map_seed steht. Mit seed wird zusätzlich der
+    globale Zufallsgenerator (Exploration des Agenten) gesetzt.
+
+    Die Züge der laufenden Episode stehen als Aktionsindizes in moves. Mit trajectory
+    (ein trajectory.TrajectoryLog) wird jede Episode beim Tod des Agenten angehängt.
+    """
+    def __init__(self, pacman=None, num_mines=100, num_flowers=150, seed=None, grid=None,
+                 rows=GRID_ROWS, cols=GRID_COLS, bunker_size=20, bunker_opening=4, trajectory=None):
+        if seed is not None:
+            random.seed(seed)
+        self.trajectory = trajectory
+        self.moves = bytearray()
+        self._init_layout(grid, rows, cols, bunker_size, bunker_opening, num_mines, num_flowers, seed)
+        if pacman is None:
+            pacman = PacManAgent(self.house_pos, 1, grid_shape=self.grid.shape)
+        self.pacman = pacman
+        self.reset()
+
+    def _random_map_seed(self):
+        return random.getrandbits(32)
+
+    def reset(self):
+        self.pacman.reset(self.house_pos)
+        self._restore_layout()
+        self.last_event = None
+        self.moves.clear()
+        self.pacman.observe(self)
+
+    def removed_cells(self):
+        """Positionen der Minen und Blumen der Startbelegung, die inzwischen fehlen."""
+        missing = (self.initial_mines & ~self.current_mines.mask()) | (self.initial_flowers & ~self.current_flowers.mask())
+        return [tuple(pos) for pos in np.argwhere(missing).tolist()]
+
+    def step(self):
+        """
+        Ein Simulationsschritt: Bewegung, Belohnung, Lernen und Todesregeln.
+        Gibt die Belohnung zurück; das auslösende Ereignis steht in last_event
+        ("flower", "mine", "wall", "starved" oder None).
+        """
+        pacman = self.pacman
+        pacman.step()
+        self.moves.append(ACTION_INDEX[pacman.prev_action])
+        self.last_event = None
+        # Standard-Schrittpenalty
+        reward = -1
+        # Ein einziger Zugriff auf den Zelltyp statt mehrerer Mengen-Tests
+        cells = self.grid.cells
+        index = pacman.pos[0] * self.grid.cols + pacman.pos[1]
+        cell_type = cells[index]
+        if cell_type & FLOWER:
+            reward = 10
+            pacman.last_food_step += FLOWER_BONUS_TICKS
+            cells[index] &= ~FLOWER & 0xFF
+            self._remove_source(FLOWER, pacman.pos)
+            self.last_event = "flower"
+        if cell_type & MINE:
+            reward = -100
+            cells[index] &= ~MINE & 0xFF
+            self._remove_source(MINE, pacman.pos)
+            pacman.alive = False
+            self.last_event = "mine"
+        if cell_type & WALL:
+            reward = -100
+            pacman.alive = False
+            self.last_event = "wall"
+        pacman.learn(reward, pacman.observe(self))
+
+        # Tod, wenn STARVATION_TICKS Schritte ohne Nahrung vergangen sind:
+        if pacman.alive and pacman.steps - pacman.last_food_step >= STARVATION_TICKS:
+            pacman.alive = False
+            self.last_event = "starved"
+        pacman.survival_time = pacman.steps
+        if not pacman.alive and self.trajectory is not None:
+            self.trajectory.write_episode(pacman.generation, self.map_seed, self.moves, self.last_event)
+        return reward
+
+    def run_episode(self, max_steps=None):
+        """
+        Spielt eine Episode ab dem aktuellen Zustand bis zum Tod (oder max_steps)
+        und gibt die Überlebenszeit in Ticks zurück.
+        """
+        pacman = self.pacman
+        while pacman.alive and (max_steps is None or pacman.steps < max_steps):
+            self.step()
+        return pacman.survival_time
+
+def train(generations, seed=None, checkpoint_path=None, checkpoint_interval=CHECKPOINT_INTERVAL,
+          encoder=None, fresh_layouts=False, pacman=None, tracker=None, trajectory=None, report=None,
+          **game_kwargs):
+    """
+    Trainiert einen Agenten headless über die angegebene Anzahl Generationen
+    mit derselben Elite-Logik wie das Hauptprogramm. Mit checkpoint_path wird ein
+    vorhandener Checkpoint fortgesetzt und regelmäßig gespeichert. Mit fresh_layouts
+    spielt jede Generation auf einer neu erzeugten Karte (sinnvoll mit LocalEncoder).
+    pacman und tracker können vorkonfiguriert übergeben werden (siehe scenario.py),
+    trajectory zeichnet alle Episoden auf (siehe trajectory.py). report (optional) wird
+    nach jeder Generation mit (generation, survival) aufgerufen.
+    """
+    if pacman is None and encoder is not None:
+        rows, cols = game_kwargs.get("rows", GRID_ROWS), game_kwargs.get("cols", GRID_COLS)
+        pacman = PacManAgent((rows // 2, cols // 2), 1, encoder=encoder, grid_shape=(rows, cols))
+    game = HeadlessGame(pacman, seed=seed, trajectory=trajectory, **game_kwargs)
+    if tracker is None:
+        tracker = GenerationTracker()
+    if checkpoint_path is not None:
+        meta = resume_training(checkpoint_path, game.pacman, tracker)
+        # Weiter auf der Karte, auf der die nächste Generation gespielt hätte
+        if meta is not None and meta.get("map_seed") is not None:
+            game.new_layout(meta["map_seed"])
+    for _ in range(generations):
+        survival = game.run_episode()
+        if report is not None:
+            report(game.pacman.generation, survival)
+        tracker.end_generation(game.pacman)
+        if fresh_layouts:
+            game.new_layout()
+        else:
+            game.reset()
+        if checkpoint_path is not None and game.pacman.generation % checkpoint_interval == 0:
+            save_training(checkpoint_path, game.pacman, tracker, game.map_seed)
+    if checkpoint_path is not None:
+        save_training(checkpoint_path, game.pacman, tracker, game.map_seed)
+    if trajectory is not None:
+        trajectory.flush()
+    return game.pacman, tracker
+
+if __name__ == '__main__':
+    import time
+    start = time.perf_counter()
+    pacman, tracker = train(200, seed=0)
+    elapsed = time.perf_counter() - start
+    print(f"Record: Gen {tracker.record_generation} survived {tracker.record_survival} ticks "
+          f"({elapsed:.2f}s)")
@@ -0,0 +1,278 @@
+"""
+Hyperparameter-Suche über Szenario-Werte: viele headless Trainingsläufe parallel,
+schwache Konfigurationen werden früh gestoppt, am Ende steht eine Ergebnistabelle.
+
+    python sweep.py --method grid --param alpha=0.1,0.3,0.5 --param gamma=0.8,0.9,0.99
+    python sweep.py --method random --samples 100 --param alpha=uniform:0.05:0.9 \\
+                    --param epsilon=loguniform:0.01:0.3 --param mutation=null,"gaussian"
+    python sweep.py scenarios/small.json --method halving --samples 243 --param patience=int:2:10 \\
+                    --output sweep.csv
+
+Parameterangaben (KEY=SPEC, KEY ist ein Szenario-Schlüssel):
+  - a,b,c              feste Werte (JSON, sonst Text); für grid als Achse, sonst gleichverteilt gezogen
+  - uniform:LO:HI      gleichverteilt
+  - loguniform:LO:HI   logarithmisch gleichverteilt
+  - int:LO:HI          ganze Zahl aus [LO, HI]
+
+Jeder Lauf trainiert in Abschnitten (Sprossen) und setzt über einen Checkpoint fort; der
+Checkpoint enthält den Zufallszustand und einen aktiven Replay-Speicher, sodass die
+Sprossen zusammen genau einem Lauf am Stück entsprechen (prüfbar mit --check-resume).
+Bewertet wird die mittlere Überlebenszeit der letzten window Generationen. Bei grid und
+random stoppt nach jeder Sprosse (ab min_generations), wer unter stop_below mal dem
+besten Lauf liegt; bei halving (Successive Halving) überlebt je Sprosse nur das beste
+1/eta, dafür wächst das Budget der nächsten Sprosse um den Faktor eta.
+"""
+import argparse
+import csv
+import itertools
+import json
+import math
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import time
+from scenario import Scenario, load_scenarios, parse_overrides
+
+METHODS = ("grid", "random", "halving")
+
+def parse_value(text):
+    try:
+        return json.loads(text)
+    except json.JSONDecodeError:
+        return text
+
+def parse_param(assignment):
+    """"alpha=uniform:0.1:0.9" -> ("alpha", ("uniform", 0.1, 0.9)); Listen -> ("choice", [...])."""
+    key, _, spec = assignment.partition("=")
+    kind, _, bounds = spec.partition(":")
+    if kind in ("uniform", "loguniform", "int") and bounds:
+        low, high = (float(value) for value in bounds.split(":"))
+        return key, (kind, low, high)
+    return key, ("choice", [parse_value(value) for value in spec.split(",")])
+
+def sample(space, rng):
+    values = {}
+    for key, (kind, *args) in space.items():
+        if kind == "choice":
+            values[key] = rng.choice(args[0])
+        elif kind == "uniform":
+            values[key] = rng.uniform(*args)
+        elif kind == "loguniform":
+            values[key] = math.exp(rng.uniform(math.log(args[0]), math.log(args[1])))
+        else:
+            values[key] = rng.randint(int(args[0]), int(args[1]))
+    return values
+
+def grid_configs(space):
+    for key, (kind, *_) in space.items():
+        if kind != "choice":
+            raise ValueError(f"grid braucht feste Werte, {key!r} ist {kind}")
+    keys = list(space)
+    return [dict(zip(keys, combination)) for combination in itertools.product(*(space[key][1] for key in keys))]
+
+def _run_rung(args):
+    """
+    Trainiert eine Konfiguration generations Generationen weiter (Fortsetzung über den
+    Checkpoint) und gibt (Index, Überlebenszeiten je Generation, Rekord, Sekunden) zurück.
+    """
+    index, values, generations, checkpoint_path = args
+    curve = []
+    start = time.perf_counter()
+    _, tracker = Scenario(**values).train(generations, checkpoint_path,
+                                          report=lambda generation, survival: curve.append(survival))
+    return index, curve, tracker.record_survival, time.perf_counter() - start
+
+def check_resume(values, generations, rung):
+    """
+    Trainiert values einmal generations Generationen am Stück und einmal in Sprossen zu
+    rung Generationen über einen Checkpoint. Gibt (gleich, Kurve am Stück, Kurve in Sprossen)
+    zurück; gleich ist True, wenn beide Überlebenskurven übereinstimmen.
+    """
+    _, continuous, _, _ = _run_rung((0, values, generations, None))
+    resumed = []
+    with tempfile.TemporaryDirectory(prefix="sweep-") as directory:
+        path = os.path.join(directory, "resume.pacq")
+        done = 0
+        while done < generations:
+            budget = min(rung, generations - done)
+            resumed.extend(_run_rung((0, values, budget, path))[1])
+            done += budget
+    return continuous == resumed, continuous, resumed
+
+class Run:
+    """Eine Konfiguration im Sweep: Werte, bisherige Überlebenskurve und Status."""
+    def __init__(self, index, params, values):
+        self.index = index
+        self.params = params
+        self.values = values
+        self.curve = []
+        self.record = 0
+        self.seconds = 0.0
+        self.status = "running"
+
+    def score(self, window):
+        recent = self.curve[-window:]
+        return sum(recent) / len(recent) if recent else 0.0
+
+class Sweep:
+    """
+    Führt die Suche aus. base ist das Szenario, dessen Werte die Parameter überschreiben;
+    ohne Seed im Szenario bekommt jeder Lauf einen eigenen festen Seed, damit die
+    Fortsetzung über den Checkpoint auf derselben Karte weiterspielt.
+    """
+    def __init__(self, base, space, method="random", samples=50, workers=None, rung=20,
+                 min_generations=20, stop_below=0.5, eta=3, window=10, seed=None):
+        if method not in METHODS:
+            raise ValueError(f"Unbekannte Suchmethode {method!r} (erlaubt: {', '.join(METHODS)})")
+        self.base = base
+        self.space = space
+        self.method = method
+        self.workers = workers or os.cpu_count()
+        self.rung = rung
+        self.min_generations = min_generations
+        self.stop_below = stop_below
+        self.eta = eta
+        self.window = window
+        rng = random.Random(seed)
+        params = grid_configs(space) if method == "grid" else [sample(space, rng) for _ in range(samples)]
+        self.runs = []
+        for index, values in enumerate(params):
+            scenario = base.with_overrides(**values)
+            if scenario["seed"] is None:
+                scenario = scenario.with_overrides(seed=rng.getrandbits(32))
+            self.runs.append(Run(index, values, scenario.values))
+
+    def active(self):
+        return [run for run in self.runs if run.status == "running"]
+
+    def budgets(self):
+        """Generationen pro Sprosse, bis das Budget des Szenarios (generations) erreicht ist."""
+        total = self.base["generations"]
+        budgets = []
+        done = 0
+        step = self.rung
+        while done < total:
+            budgets.append(min(step, total - done))
+            done += budgets[-1]
+            if self.method == "halving":
+                step *= self.eta
+        return budgets
+
+    def run(self, report=None):
+        """Führt alle Sprossen aus und gibt die Läufe nach Bewertung sortiert zurück."""
+        with tempfile.TemporaryDirectory(prefix="sweep-") as directory, \
+                multiprocessing.Pool(self.workers) as pool:
+            generations = 0
+            budgets = self.budgets()
+            for number, budget in enumerate(budgets):
+                runs = self.active()
+                tasks = [(run.index, run.values, budget, os.path.join(directory, f"run{run.index}.pacq"))
+                         for run in runs]
+                for index, curve, record, seconds in pool.imap_unordered(_run_rung, tasks):
+                    run = self.runs[index]
+                    run.curve.extend(curve)
+                    run.record = max(run.record, record)
+                    run.seconds += seconds
+                generations += budget
+                if number < len(budgets) - 1:
+                    self.prune(runs, generations)
+                if report is not None:
+                    report(generations, runs, self.window)
+        for run in self.active():
+            run.status = "done"
+        return self.ranking()
+
+    def prune(self, runs, generations):
+        """Stoppt nach einer Sprosse die schwachen Läufe (siehe Moduldokumentation)."""
+        ranked = sorted(runs, key=lambda run: run.score(self.window), reverse=True)
+        if self.method == "halving":
+            for run in ranked[max(1, len(ranked) // self.eta):]:
+                run.status = f"stopped@{generations}"
+        elif generations >= self.min_generations and ranked:
+            threshold = self.stop_below * ranked[0].score(self.window)
+            for run in ranked:
+                if run.score(self.window) < threshold:
+                    run.status = f"stopped@{generations}"
+
+    def ranking(self):
+        return sorted(self.runs, key=lambda run: (run.status == "done", run.score(self.window), len(run.curve)),
+                      reverse=True)
+
+def result_rows(runs, window, keys):
+    return [dict({"rank": rank, "score": round(run.score(window), 2), "record": run.record,
+                  "generations": len(run.curve), "status": run.status, "seconds": round(run.seconds, 2)},
+                 **{key: run.params[key] for key in keys})
+            for rank, run in enumerate(runs, 1)]
+
+def write_results(path, rows):
+    if path.endswith(".csv"):
+        with open(path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+            writer.writeheader()
+            writer.writerows(rows)
+    else:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(rows, f, indent=2)
+
+def format_table(rows, limit=None):
+    rows = rows[:limit] if limit else rows
+    columns = list(rows[0])
+    cells = [[f"{row[column]:.4g}" if isinstance(row[column], float) else str(row[column]) for column in columns]
+             for row in rows]
+    widths = [max(len(column), *(len(line[i]) for line in cells)) for i, column in enumerate(columns)]
+    lines = ["  ".join(column.rjust(width) for column, width in zip(columns, widths))]
+    lines += ["  ".join(cell.rjust(width) for cell, width in zip(line, widths)) for line in cells]
+    return "\n".join(lines)
+
+def print_report(generations, runs, window):
+    best = max(runs, key=lambda run: run.score(window))
+    stopped = sum(run.status != "running" for run in runs)
+    print(f"Generation {generations}: {len(runs)} Läufe, bester Score {best.score(window):.1f} "
+          f"({best.params}), {stopped} gestoppt")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Hyperparameter-Suche über Szenario-Werte")
+    parser.add_argument("scenario", nargs="?", help="Basis-Szenario (JSON)")
+    parser.add_argument("--set", action="append", metavar="KEY=VALUE", help="Szenario-Wert überschreiben")
+    parser.add_argument("--param", action="append", required=True, metavar="KEY=SPEC", help="zu variierender Wert")
+    parser.add_argument("--method", choices=METHODS, default="random")
+    parser.add_argument("--samples", type=int, default=50, help="Anzahl Konfigurationen für random/halving")
+    parser.add_argument("--workers", type=int, help="parallele Prozesse (Standard: alle Kerne)")
+    parser.add_argument("--rung", type=int, default=20, help="Generationen der ersten Sprosse")
+    parser.add_argument("--min-generations", type=int, default=20, help="frühestes Stoppen (grid/random)")
+    parser.add_argument("--stop-below", type=float, default=0.5, help="Stopp unter diesem Anteil des Besten")
+    parser.add_argument("--eta", type=int, default=3, help="Reduktionsfaktor für halving")
+    parser.add_argument("--window", type=int, default=10, help="Generationen für die Bewertung")
+    parser.add_argument("--seed", type=int, help="Seed für das Ziehen der Konfigurationen")
+    parser.add_argument("--output", help="Ergebnistabelle als .csv oder .json")
+    parser.add_argument("--top", type=int, default=20, help="so viele Zeilen ausgeben")
+    parser.add_argument("--check-resume", action="store_true",
+                        help="vorab prüfen, ob die erste Konfiguration in Sprossen wie am Stück trainiert")
+    args = parser.parse_args(argv)
+
+    base = load_scenarios([args.scenario] if args.scenario else [], parse_overrides(args.set))[0]
+    space = dict(parse_param(assignment) for assignment in args.param)
+    sweep = Sweep(base, space, args.method, args.samples, args.workers, args.rung, args.min_generations,
+                  args.stop_below, args.eta, args.window, args.seed)
+    if args.check_resume:
+        run = sweep.runs[0]
+        generations = min(2 * args.rung, base["generations"])
+        same, continuous, resumed = check_resume(run.values, generations, args.rung)
+        if not same:
+            first = next(i for i, (a, b) in enumerate(zip(continuous, resumed)) if a != b)
+            print(f"Fortsetzung weicht ab Generation {first + 1} ab ({run.params})")
+            return 1
+        print(f"Fortsetzung geprüft: {generations} Generationen in Sprossen zu {args.rung} wie am Stück")
+    start = time.perf_counter()
+    runs = sweep.run(report=print_report)
+    rows = result_rows(runs, args.window, list(space))
+    print(f"{len(runs)} Konfigurationen in {time.perf_counter() - start:.1f}s")
+    print(format_table(rows, args.top))
+    if args.output:
+        write_results(args.output, rows)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,232 @@
+import os
+import random
+import time
+import multiprocessing
+from multiprocessing import shared_memory
+import numpy as np
+from settings import GRID_COLS, GRID_ROWS, CHECKPOINT_INTERVAL
+from qtable import QTable
+from evolution import Recombiner
+from character import PacManAgent
+from encoding import PositionEncoder
+from simulation import HeadlessGame
+from checkpoint import write_checkpoint, read_checkpoint, random_state, restore_random_state
+
+def _shared_array(shm, shape, dtype):
+    return np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+
+# Zustand eines Worker-Prozesses (wird einmal pro Prozess im Initializer aufgebaut)
+_worker = {}
+
+def _init_worker(base_names, slot_names, population_size, map_seed, encoder, fresh_layouts, game_kwargs):
+    base_values = shared_memory.SharedMemory(name=base_names[0])
+    base_visited = shared_memory.SharedMemory(name=base_names[1])
+    slot_values = shared_memory.SharedMemory(name=slot_names[0])
+    slot_visited = shared_memory.SharedMemory(name=slot_names[1])
+    q_shape = tuple(encoder.shape) + (4,)
+    _worker["shm"] = (base_values, base_visited, slot_values, slot_visited)
+    _worker["base"] = QTable(values=_shared_array(base_values, q_shape, np.float32),
+                             visited=_shared_array(base_visited, q_shape[:-1], bool))
+    _worker["slot_values"] = _shared_array(slot_values, (population_size,) + q_shape, np.float32)
+    _worker["slot_visited"] = _shared_array(slot_visited, (population_size,) + q_shape[:-1], bool)
+    # Ohne fresh_layouts spielen alle Worker auf derselben Karte wie der Elternprozess.
+    rows, cols = game_kwargs.get("rows", GRID_ROWS), game_kwargs.get("cols", GRID_COLS)
+    pacman = PacManAgent((rows // 2, cols // 2), 1, encoder=encoder, grid_shape=(rows, cols))
+    _worker["game"] = HeadlessGame(pacman, seed=map_seed, **game_kwargs)
+    _worker["fresh_layouts"] = fresh_layouts
+
+def _evaluate_candidate(args):
+    """
+    Spielt eine Episode mit einer Kopie der Basis-Q-Tabelle und schreibt die gelernte
+    Tabelle in den Slot des Kandidaten. Zurück geht nur (Slot, Überlebensticks).
+    """
+    slot, seed, epsilon, mutation_rate, mutation_strength = args
+    random.seed(seed)
+    game = _worker["game"]
+    pacman = game.pacman
+    values = _worker["slot_values"][slot]
+    visited = _worker["slot_visited"][slot]
+    values[...] = _worker["base"].values
+    visited[...] = _worker["base"].visited
+    pacman.Q = QTable(values=values, visited=visited)
+    pacman.epsilon = epsilon
+    if mutation_rate > 0:
+        pacman.mutate(mutation_rate, mutation_strength)
+    if _worker["fresh_layouts"]:
+        game.new_layout(seed)
+    else:
+        game.reset()
+    survival = game.run_episode()
+    return slot, survival
+
+class PopulationTrainer:
+    """
+    Bewertet pro Generation population_size Kandidaten parallel in einem Prozess-Pool
+    (Headless-Regeln) und mittelt die Q-Tabellen der elite_size besten Kandidaten.
+    Die Q-Tabellen liegen in Shared Memory; über die Prozessgrenze gehen nur Slot-Nummern
+    und Überlebenszeiten. Die Form der Tabellen ergibt sich aus dem Encoder; mit
+    fresh_layouts spielt jeder Kandidat auf einer eigenen, neu erzeugten Karte. Nach
+    patience Generationen ohne Rekord steigt epsilon um epsilon_bump (wie im GenerationTracker).
+    """
+    def __init__(self, population_size=32, elite_size=3, workers=None, seed=None,
+                 epsilon=0.1, patience=5, mutation_rate=0.0, mutation_strength=0.1,
+                 encoder=None, fresh_layouts=False, recombiner=None, epsilon_bump=0.1, **game_kwargs):
+        self.population_size = population_size
+        self.elite_size = min(elite_size, population_size)
+        self.patience = patience
+        self.epsilon_bump = epsilon_bump
+        self.epsilon = epsilon
+        self.mutation_rate = mutation_rate
+        self.mutation_strength = mutation_strength
+        self.rng = random.Random(seed)
+        self.recombiner = recombiner if recombiner is not None else Recombiner(seed=self.rng.getrandbits(32))
+        self.map_seed = self.rng.getrandbits(32)
+        self.workers = workers or os.cpu_count()
+        self.fresh_layouts = fresh_layouts
+        self.game_kwargs = game_kwargs
+        self.encoder = encoder if encoder is not None else PositionEncoder(
+            game_kwargs.get("rows", GRID_ROWS), game_kwargs.get("cols", GRID_COLS))
+        self.q_shape = tuple(self.encoder.shape) + (4,)
+
+        q_bytes = int(np.prod(self.q_shape)) * 4
+        cells = int(np.prod(self.q_shape[:-1]))
+        self._shm = [
+            shared_memory.SharedMemory(create=True, size=q_bytes),
+            shared_memory.SharedMemory(create=True, size=cells),
+            shared_memory.SharedMemory(create=True, size=q_bytes * population_size),
+            shared_memory.SharedMemory(create=True, size=cells * population_size),
+        ]
+        self.base = QTable(values=_shared_array(self._shm[0], self.q_shape, np.float32),
+                           visited=_shared_array(self._shm[1], self.q_shape[:-1], bool))
+        self.base.values[...] = 0
+        self.base.visited[...] = False
+        self.slot_values = _shared_array(self._shm[2], (population_size,) + self.q_shape, np.float32)
+        self.slot_visited = _shared_array(self._shm[3], (population_size,) + self.q_shape[:-1], bool)
+
+        self.generation = 0
+        self.record_generation = 0
+        self.record_survival = 0
+        self.no_improvement_counter = 0
+        # Der Pool wird erst bei der ersten Generation gestartet, damit load() vorher noch
+        # die Karte (map_seed) des Checkpoints setzen kann.
+        self.pool = None
+
+    def _start_pool(self):
+        self.pool = multiprocessing.Pool(
+            processes=self.workers,
+            initializer=_init_worker,
+            initargs=((self._shm[0].name, self._shm[1].name), (self._shm[2].name, self._shm[3].name),
+                      self.population_size, self.map_seed, self.encoder, self.fresh_layouts, self.game_kwargs),
+        )
+
+    def _stop_pool(self):
+        if self.pool is not None:
+            self.pool.close()
+            self.pool.join()
+            self.pool = None
+
+    def run_generation(self):
+        """
+        Bewertet eine Generation und übernimmt das Elite-Mittel als neue Basis.
+        Gibt die Überlebenszeiten aller Kandidaten (nach Slot geordnet) zurück.
+        """
+        if self.pool is None:
+            self._start_pool()
+        self.generation += 1
+        tasks = [(slot, self.rng.getrandbits(32), self.epsilon, self.mutation_rate, self.mutation_strength)
+                 for slot in range(self.population_size)]
+        survival = np.zeros(self.population_size, dtype=np.int64)
+        for slot, ticks in self.pool.imap_unordered(_evaluate_candidate, tasks):
+            survival[slot] = ticks
+
+        best = int(survival.max())
+        if best > self.record_survival:
+            self.record_survival = best
+            self.record_generation = self.generation
+            self.no_improvement_counter = 0
+        else:
+            self.no_improvement_counter += 1
+
+        elite = np.argsort(-survival, kind="stable")[:self.elite_size]
+        merged = self.recombiner.combine(self.slot_values[elite], self.slot_visited[elite], survival[elite])
+        self.base.values[...] = merged.values
+        self.base.visited[...] = merged.visited
+        if self.no_improvement_counter >= self.patience:
+            self.epsilon = min(1.0, self.epsilon + self.epsilon_bump)
+            self.no_improvement_counter = 0
+        return survival
+
+    def train(self, generations, report=None, checkpoint_path=None, checkpoint_interval=CHECKPOINT_INTERVAL):
+        """
+        Führt mehrere Generationen aus. report (optional) wird nach jeder Generation mit
+        (generation, survival, generations_per_second) aufgerufen. Mit checkpoint_path
+        wird regelmäßig und am Ende ein Checkpoint geschrieben.
+        """
+        start = time.perf_counter()
+        for i in range(generations):
+            survival = self.run_generation()
+            if report is not None:
+                report(self.generation, survival, (i + 1) / (time.perf_counter() - start))
+            if checkpoint_path is not None and self.generation % checkpoint_interval == 0:
+                self.save(checkpoint_path)
+        if checkpoint_path is not None:
+            self.save(checkpoint_path)
+        return self.base.copy()
+
+    def save(self, path):
+        meta = {
+            "generation": self.generation,
+            "epsilon": self.epsilon,
+            "encoder": self.encoder.name,
+            "map_seed": self.map_seed,
+            "record_generation": self.record_generation,
+            "record_survival": self.record_survival,
+            "no_improvement_counter": self.no_improvement_counter,
+            "trainer_random_state": random_state(self.rng),
+            "recombiner_state": self.recombiner.rng.bit_generator.state,
+        }
+        write_checkpoint(path, meta, {"q_values": self.base.values, "q_visited": self.base.visited})
+
+    def load(self, path):
+        """
+        Übernimmt Basis-Q-Tabelle und Trainingszustand aus einem Checkpoint. Die Worker
+        sehen die neue Basis sofort, da sie im Shared Memory liegt; bei einer anderen
+        Karte (map_seed) werden sie mit dieser neu gestartet.
+        """
+        meta, arrays = read_checkpoint(path)
+        self.base.values[...] = arrays["q_values"]
+        self.base.visited[...] = arrays["q_visited"]
+        self.generation = meta["generation"]
+        self.epsilon = meta["epsilon"]
+        self.record_generation = meta["record_generation"]
+        self.record_survival = meta["record_survival"]
+        self.no_improvement_counter = meta["no_improvement_counter"]
+        if meta.get("map_seed") is not None and meta["map_seed"] != self.map_seed:
+            self.map_seed = meta["map_seed"]
+            self._stop_pool()
+        if "trainer_random_state" in meta:
+            restore_random_state(meta["trainer_random_state"], self.rng)
+        if "recombiner_state" in meta:
+            self.recombiner.rng.bit_generator.state = meta["recombiner_state"]
+        return meta
+
+    def close(self):
+        self._stop_pool()
+        for shm in self._shm:
+            shm.close()
+            shm.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def print_report(generation, survival, generations_per_second):
+    print(f"Gen {generation}: best {survival.max()} ticks, mean {survival.mean():.1f} ticks, "
+          f"{generations_per_second:.2f} gen/s")
+
+if __name__ == '__main__':
+    with PopulationTrainer(population_size=32, seed=0) as trainer:
+        trainer.train(50, report=print_report)
+        print(f"Record: Gen {trainer.record_generation} survived {trainer.record_survival} ticks")
@@ -0,0 +1,352 @@
+"""
+Trajektorien-Log: jede Episode als Karten-Seed plus Zugfolge (2 Bit pro Zug) in einer
+Datei, an die nur angehängt wird. Da die Karte aus dem Seed entsteht (field.generate_layout)
+und die Regeln deterministisch sind, lässt sich jede Episode daraus exakt nachspielen –
+die Q-Tabelle und der Zufallsgenerator des Agenten werden dafür nicht gebraucht.
+
+    python trajectory.py list runs.pact                      # Episoden auflisten (* = neuer Rekord)
+    python trajectory.py show runs.pact --best --speed 40    # im Fenster abspielen
+    python trajectory.py export runs.pact -e 12 --frames out/          # PNG pro Tick
+    python trajectory.py export runs.pact -e 12 --video rekord.mp4     # über ffmpeg
+
+Dateiformat: MAGIC | Version (uint32) | Header-Länge (uint32) | JSON-Header (Kartenparameter),
+danach Episoden: Generation (uint32) | Karten-Seed (int64) | Züge (uint32) | Ende (uint8) |
+Züge gepackt, 4 pro Byte. Ein unvollständiger letzter Eintrag (Abbruch beim Schreiben)
+wird beim Lesen ignoriert und vor dem nächsten Anhängen abgeschnitten.
+
+Kosten beim Aufzeichnen: HeadlessGame hängt pro Tick ein Byte an, TrajectoryLog packt und
+schreibt die Episoden gesammelt (alle flush_every Episoden und beim Beenden).
+"""
+import argparse
+import atexit
+import json
+import os
+import shutil
+import struct
+import subprocess
+import sys
+import numpy as np
+from character import PacManAgent
+from simulation import HeadlessGame
+
+MAGIC = b"PACT"
+VERSION = 1
+EPISODE = struct.Struct("<IqIB")
+# Ereignis, mit dem die Episode endete (HeadlessGame.last_event); None = Spielfeld verlassen
+END_EVENTS = (None, "flower", "mine", "wall", "starved")
+LAYOUT_KEYS = ("rows", "cols", "bunker_size", "bunker_opening", "num_mines", "num_flowers")
+
+def pack_moves(moves):
+    """Aktionsindizes (0..3) -> 4 Züge pro Byte, der erste in den höchsten Bits."""
+    moves = np.frombuffer(bytes(moves), dtype=np.uint8)
+    padded = np.zeros(-(-len(moves) // 4) * 4, dtype=np.uint8)
+    padded[:len(moves)] = moves
+    padded = padded.reshape(-1, 4)
+    return ((padded[:, 0] << 6) | (padded[:, 1] << 4) | (padded[:, 2] << 2) | padded[:, 3]).tobytes()
+
+def unpack_moves(data, count):
+    packed = np.frombuffer(data, dtype=np.uint8)
+    moves = np.stack([packed >> 6, packed >> 4, packed >> 2, packed], axis=1) & 3
+    return moves.reshape(-1)[:count]
+
+class TrajectoryLog:
+    """
+    Schreibt Episoden an eine Log-Datei an. Existiert die Datei schon, müssen ihre
+    Kartenparameter zu layout passen (dieselben Schlüssel wie Scenario.game_kwargs);
+    ein unvollständiger letzter Eintrag wird vor dem Anhängen abgeschnitten.
+
+    Die Züge werden erst in einem Puffer gesammelt und alle flush_every Episoden in
+    einem NumPy-Durchgang gepackt; jede Episode ist dafür auf ein Vielfaches von 4
+    Zügen aufgefüllt, sodass die gepackten Bytes genau an den Episodengrenzen liegen.
+    Beim Beenden des Prozesses wird der Rest automatisch geschrieben.
+    """
+    def __init__(self, path, flush_every=256, **layout):
+        self.path = path
+        self.flush_every = flush_every
+        self._headers = []
+        self._moves = bytearray()
+        self.layout = {key: layout[key] for key in LAYOUT_KEYS}
+        if os.path.exists(path) and os.path.getsize(path) > 0:
+            existing, _ = read_header(path)
+            if existing != self.layout:
+                raise ValueError(f"{path}: Kartenparameter {existing} passen nicht zu {self.layout}")
+            complete = complete_length(path)
+            if complete < os.path.getsize(path):
+                os.truncate(path, complete)
+            self.file = open(path, "ab")
+        else:
+            self.file = open(path, "wb")
+            header = json.dumps(self.layout).encode("utf-8")
+            self.file.write(MAGIC + struct.pack("<II", VERSION, len(header)) + header)
+            self.file.flush()
+        atexit.register(self.close)
+
+    def write_episode(self, generation, map_seed, moves, event):
+        self._headers.append(EPISODE.pack(generation, map_seed, len(moves), END_EVENTS.index(event)))
+        self._moves += moves
+        self._moves += bytes(-len(moves) % 4)
+        if len(self._headers) >= self.flush_every:
+            self.flush()
+
+    def flush(self):
+        if not self._headers:
+            return
+        packed = pack_moves(self._moves)
+        parts = []
+        offset = 0
+        for header in self._headers:
+            size = -(-EPISODE.unpack(header)[2] // 4)
+            parts.append(header)
+            parts.append(packed[offset:offset + size])
+            offset += size
+        self.file.write(b"".join(parts))
+        self.file.flush()
+        self._headers.clear()
+        self._moves.clear()
+
+    def close(self):
+        if not self.file.closed:
+            self.flush()
+            self.file.close()
+        atexit.unregister(self.close)
+
+def read_header(path):
+    """Gibt (Kartenparameter, Offset der ersten Episode) zurück."""
+    with open(path, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} ist kein Trajektorien-Log")
+        version, length = struct.unpack("<II", f.read(8))
+        if version != VERSION:
+            raise ValueError(f"{path}: Version {version} wird nicht unterstützt (erwartet {VERSION})")
+        return json.loads(f.read(length)), len(MAGIC) + 8 + length
+
+class Episode:
+    __slots__ = ("number", "generation", "map_seed", "moves", "event")
+
+    def __init__(self, number, generation, map_seed, moves, event):
+        self.number = number
+        self.generation = generation
+        self.map_seed = map_seed
+        self.moves = moves
+        self.event = event
+
+    @property
+    def survival(self):
+        return len(self.moves)
+
+def _records(data):
+    """
+    Durchläuft die Episoden-Bytes data (ab der ersten Episode) und liefert je vollständigem
+    Eintrag (generation, map_seed, Züge, Ende, Start der Züge, Ende des Eintrags).
+    """
+    position = 0
+    while position + EPISODE.size <= len(data):
+        generation, map_seed, count, event = EPISODE.unpack_from(data, position)
+        start = position + EPISODE.size
+        end = start + -(-count // 4)
+        if end > len(data):
+            return
+        yield generation, map_seed, count, event, start, end
+        position = end
+
+def _episode_data(path):
+    layout, offset = read_header(path)
+    with open(path, "rb") as f:
+        f.seek(offset)
+        return layout, offset, f.read()
+
+def complete_length(path):
+    """Dateilänge bis zum Ende des letzten vollständigen Eintrags."""
+    _, offset, data = _episode_data(path)
+    end = 0
+    for *_, end in _records(data):
+        pass
+    return offset + end
+
+def read_episodes(path):
+    """Kartenparameter und Liste aller vollständig geschriebenen Episoden."""
+    layout, _, data = _episode_data(path)
+    episodes = []
+    for generation, map_seed, count, event, start, end in _records(data):
+        episodes.append(Episode(len(episodes), generation, map_seed, unpack_moves(data[start:end], count),
+                                END_EVENTS[event]))
+    return layout, episodes
+
+def record_episodes(episodes):
+    """Episoden, die beim Schreiben einen neuen Überlebensrekord aufgestellt haben."""
+    records = []
+    best = 0
+    for episode in episodes:
+        if episode.survival > best:
+            best = episode.survival
+            records.append(episode)
+    return records
+
+class ScriptedAgent(PacManAgent):
+    """Agent, der die Züge einer aufgezeichneten Episode abspielt, statt sie zu wählen."""
+    def __init__(self, start_pos, cell_size, moves, grid_shape):
+        super().__init__(start_pos, cell_size, grid_shape=grid_shape)
+        self.moves = moves.tolist()
+
+    def get_action_index(self, state):
+        return self.moves[self.steps]
+
+    def learn(self, reward, new_state):
+        pass
+
+def replay_game(layout, episode, grid=None):
+    """
+    HeadlessGame auf der Karte der Episode, dessen Agent die aufgezeichneten Züge macht.
+    Jeder step() spielt genau einen Tick nach, wie er ursprünglich abgelaufen ist.
+    """
+    rows, cols = layout["rows"], layout["cols"]
+    pacman = ScriptedAgent((rows // 2, cols // 2), grid.cell_width if grid is not None else 1,
+                           episode.moves, (rows, cols))
+    return HeadlessGame(pacman, seed=episode.map_seed, grid=grid, **layout)
+
+def verify(layout, episode):
+    """Spielt headless nach und prüft Überlebenszeit und Todesursache gegen den Eintrag."""
+    game = replay_game(layout, episode)
+    game.run_episode()
+    return game.pacman.survival_time == episode.survival and game.last_event == episode.event
+
+def select_episode(episodes, number=None, best=False):
+    if not episodes:
+        raise ValueError("Das Log enthält keine Episoden")
+    if best:
+        return max(episodes, key=lambda episode: episode.survival)
+    if number is None:
+        return episodes[-1]
+    return episodes[number]
+
+def render_frames(screen, layout, episode, ticks_per_frame=1):
+    """
+    Zeichnet die Episode mit GridRenderer und PacManAgent.draw auf screen. Liefert nach
+    jedem gezeichneten Frame die Anzahl gespielter Ticks (Generator).
+    """
+    from field import create_grid
+    from renderer import GridRenderer
+    width, height = screen.get_size()
+    grid = create_grid(width, height, layout["rows"], layout["cols"])
+    game = replay_game(layout, episode, grid)
+    renderer = GridRenderer(screen, grid, game.walls, game.house_pos)
+    renderer.redraw_all(game.current_mines, game.current_flowers)
+    pacman = game.pacman
+    while True:
+        renderer.begin_frame(game.current_mines, game.current_flowers)
+        renderer.add_rect(pacman.draw(screen, grid))
+        renderer.present()
+        yield pacman.steps
+        if not pacman.alive:
+            return
+        for _ in range(ticks_per_frame):
+            game.step()
+            if game.last_event in ("flower", "mine"):
+                renderer.mark_cell(pacman.pos)
+            if not pacman.alive:
+                break
+
+def show(layout, episode, speed, size):
+    """Spielt die Episode im Fenster mit speed Ticks pro Sekunde ab (Leertaste: Pause)."""
+    import pygame
+    pygame.init()
+    screen = pygame.display.set_mode((size, size))
+    pygame.display.set_caption(f"Episode {episode.number}: Gen {episode.generation}, {episode.survival} Ticks")
+    clock = pygame.time.Clock()
+    # Bis 60 Ticks/s ein Tick pro Frame, darüber mehrere
+    ticks_per_frame = max(1, round(speed / 60))
+    fps = speed / ticks_per_frame
+    frames = render_frames(screen, layout, episode, ticks_per_frame)
+    paused = False
+    running = True
+    while running:
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT or (event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE):
+                running = False
+            elif event.type == pygame.KEYDOWN and event.key == pygame.K_SPACE:
+                paused = not paused
+        if not paused and next(frames, None) is None:
+            paused = True
+        clock.tick(fps)
+    pygame.quit()
+
+def export(layout, episode, size, frames_dir=None, video=None, fps=30, every=1):
+    """
+    Rendert die Episode ohne Fenster (SDL-Dummy-Treiber) und schreibt jeden every-ten
+    Tick als PNG nach frames_dir und/oder als Video über ffmpeg. Gibt die Anzahl Frames zurück.
+    """
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    import pygame
+    pygame.display.init()
+    screen = pygame.display.set_mode((size, size))
+    encoder = None
+    if video is not None:
+        ffmpeg = shutil.which("ffmpeg")
+        if ffmpeg is None:
+            raise RuntimeError("Für den Video-Export wird ffmpeg im PATH benötigt (alternativ --frames)")
+        encoder = subprocess.Popen(
+            [ffmpeg, "-y", "-loglevel", "error", "-f", "rawvideo", "-pix_fmt", "rgb24", "-s", f"{size}x{size}",
+             "-r", str(fps), "-i", "-", "-pix_fmt", "yuv420p", video], stdin=subprocess.PIPE)
+    if frames_dir is not None:
+        os.makedirs(frames_dir, exist_ok=True)
+    count = 0
+    try:
+        for ticks in render_frames(screen, layout, episode, every):
+            if frames_dir is not None:
+                pygame.image.save(screen, os.path.join(frames_dir, f"frame_{ticks:06d}.png"))
+            if encoder is not None:
+                encoder.stdin.write(pygame.image.tobytes(screen, "RGB"))
+            count += 1
+    finally:
+        if encoder is not None:
+            encoder.stdin.close()
+            encoder.wait()
+        pygame.quit()
+    return count
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Aufgezeichnete Episoden auflisten, abspielen und exportieren")
+    commands = parser.add_subparsers(dest="command", required=True)
+    list_parser = commands.add_parser("list", help="Episoden auflisten")
+    list_parser.add_argument("--records", action="store_true", help="nur Episoden mit neuem Rekord")
+    list_parser.add_argument("--verify", action="store_true", help="jede Episode headless nachspielen und prüfen")
+    show_parser = commands.add_parser("show", help="Episode im Fenster abspielen")
+    show_parser.add_argument("--speed", type=float, default=20, help="Ticks pro Sekunde")
+    export_parser = commands.add_parser("export", help="Episode als PNG-Frames oder Video exportieren")
+    export_parser.add_argument("--frames", help="Verzeichnis für PNG-Frames")
+    export_parser.add_argument("--video", help="Videodatei (benötigt ffmpeg)")
+    export_parser.add_argument("--fps", type=int, default=30)
+    export_parser.add_argument("--every", type=int, default=1, help="nur jeden n-ten Tick als Frame")
+    for sub in (list_parser, show_parser, export_parser):
+        sub.add_argument("log", help="Trajektorien-Log (.pact)")
+    for sub in (show_parser, export_parser):
+        sub.add_argument("-e", "--episode", type=int, help="Nummer der Episode (Standard: die letzte)")
+        sub.add_argument("--best", action="store_true", help="die Episode mit der längsten Überlebenszeit")
+        sub.add_argument("--size", type=int, default=800, help="Bildgröße in Pixeln")
+    args = parser.parse_args(argv)
+
+    layout, episodes = read_episodes(args.log)
+    if args.command == "list":
+        records = {episode.number for episode in record_episodes(episodes)}
+        for episode in episodes:
+            if args.records and episode.number not in records:
+                continue
+            line = (f"{episode.number:6d}{'*' if episode.number in records else ' '} Gen {episode.generation:6d} "
+                    f"{episode.survival:6d} Ticks  Ende: {episode.event or 'Rand'}  Karte {episode.map_seed}")
+            if args.verify:
+                line += "  ok" if verify(layout, episode) else "  ABWEICHUNG"
+            print(line)
+        return 0
+
+    episode = select_episode(episodes, args.episode, args.best)
+    if args.command == "show":
+        show(layout, episode, args.speed, args.size)
+    else:
+        if args.frames is None and args.video is None:
+            parser.error("export braucht --frames und/oder --video")
+        count = export(layout, episode, args.size, args.frames, args.video, args.fps, args.every)
+        print(f"Episode {episode.number}: {count} Frames exportiert")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,136 @@
+import numpy as np
+from settings import GRID_COLS, GRID_ROWS, STARVATION_TICKS, FLOWER_BONUS_TICKS
+from field import bunker_mask
+import qtable
+
+# Aktionen als Array für die vektorisierte Bewegung (Reihenfolge wie qtable.ACTIONS)
+ACTIONS = np.array(qtable.ACTIONS, dtype=np.int32)
+
+class VecPacManEnv:
+    """
+    N unabhängige Spielfelder, die im Gleichschritt simuliert werden.
+    Positionen, Minen, Blumen und Lebendstatus liegen als NumPy-Arrays vor,
+    sodass ein Tick für alle N Felder aus wenigen Array-Operationen besteht.
+    Es gelten dieselben Regeln und Bunker-Parameter wie in HeadlessGame.
+    """
+    def __init__(self, num_envs, num_mines=100, num_flowers=150, seed=None,
+                 rows=GRID_ROWS, cols=GRID_COLS, bunker_size=20, bunker_opening=4):
+        self.num_envs = num_envs
+        self.rows = rows
+        self.cols = cols
+        self.num_mines = num_mines
+        self.num_flowers = num_flowers
+        self.rng = np.random.default_rng(seed)
+
+        self.wall_mask = bunker_mask(rows, cols, bunker_size, bunker_opening)
+        self.house_pos = (self.rows // 2, self.cols // 2)
+
+        # Startbelegung pro Feld; reset() kopiert sie in den laufenden Zustand.
+        self.initial_mines = np.zeros((num_envs, self.rows, self.cols), dtype=bool)
+        self.initial_flowers = np.zeros((num_envs, self.rows, self.cols), dtype=bool)
+        self.generate_layouts()
+
+        self.mines = np.empty_like(self.initial_mines)
+        self.flowers = np.empty_like(self.initial_flowers)
+        self.pos = np.empty((num_envs, 2), dtype=np.int32)
+        self.prev_pos = np.empty((num_envs, 2), dtype=np.int32)
+        self.alive = np.empty(num_envs, dtype=bool)
+        self.steps = np.empty(num_envs, dtype=np.int32)
+        self.last_food_step = np.empty(num_envs, dtype=np.int32)
+        self._env_index = np.arange(num_envs)
+        self.reset()
+
+    def generate_layouts(self, env_ids=None):
+        """
+        Erzeugt neue, zufällige Minen- und Blumenbelegungen für die angegebenen Felder
+        (standardmäßig alle). Minen und Blumen liegen nie auf Wänden oder dem Haus
+        und nie auf derselben Zelle.
+        """
+        if env_ids is None:
+            env_ids = np.arange(self.num_envs)
+        env_ids = np.asarray(env_ids)
+        free = ~self.wall_mask
+        free[self.house_pos] = False
+        free_cells = np.flatnonzero(free)
+        num_mines = min(self.num_mines, len(free_cells))
+        num_flowers = min(self.num_flowers, len(free_cells) - num_mines)
+        k = num_mines + num_flowers
+
+        # Zufällige Schlüssel je freier Zelle; die k kleinsten bilden eine gleichverteilte
+        # Stichprobe ohne Zurücklegen, die Sortierung danach eine zufällige Reihenfolge.
+        keys = self.rng.random((len(env_ids), len(free_cells)))
+        chosen = np.argpartition(keys, k - 1, axis=1)[:, :k] if k > 0 else np.empty((len(env_ids), 0), dtype=np.intp)
+        order = np.argsort(np.take_along_axis(keys, chosen, axis=1), axis=1)
+        chosen = free_cells[np.take_along_axis(chosen, order, axis=1)]
+
+        flat_mines = self.initial_mines.reshape(self.num_envs, -1)
+        flat_flowers = self.initial_flowers.reshape(self.num_envs, -1)
+        flat_mines[env_ids] = False
+        flat_flowers[env_ids] = False
+        rows = env_ids[:, None]
+        flat_mines[rows, chosen[:, :num_mines]] = True
+        flat_flowers[rows, chosen[:, num_mines:]] = True
+
+    def reset(self, mask=None):
+        """
+        Setzt die ausgewählten Felder (boolesche Maske oder Indizes, standardmäßig alle)
+        auf ihre Startbelegung zurück.
+        """
+        if mask is None:
+            mask = slice(None)
+        self.mines[mask] = self.initial_mines[mask]
+        self.flowers[mask] = self.initial_flowers[mask]
+        self.pos[mask] = self.house_pos
+        self.prev_pos[mask] = self.house_pos
+        self.alive[mask] = True
+        self.steps[mask] = 0
+        self.last_food_step[mask] = 0
+
+    def step(self, actions):
+        """
+        Wendet für jedes Feld eine Aktion (Index in ACTIONS) an.
+        Gibt (rewards, dones) zurück: rewards ist ein float32-Array der Länge N,
+        dones markiert die Felder, deren Agent in diesem Tick gestorben ist.
+        Bereits tote Felder bleiben unverändert und erhalten die Belohnung 0.
+        """
+        alive = self.alive.copy()
+        rewards = np.where(alive, -1.0, 0.0).astype(np.float32)
+
+        new_pos = self.pos + ACTIONS[np.asarray(actions)]
+        inside = ((new_pos[:, 0] >= 0) & (new_pos[:, 0] < self.rows) &
+                  (new_pos[:, 1] >= 0) & (new_pos[:, 1] < self.cols))
+        moving = alive & inside
+        self.prev_pos[alive] = self.pos[alive]
+        self.pos[moving] = new_pos[moving]
+        # Verlassen des Spielfelds tötet den Agenten, die Position bleibt stehen.
+        dead = alive & ~inside
+        self.steps[alive] += 1
+
+        env = self._env_index
+        r = self.pos[:, 0]
+        c = self.pos[:, 1]
+
+        ate = alive & self.flowers[env, r, c]
+        self.flowers[env[ate], r[ate], c[ate]] = False
+        self.last_food_step[ate] += FLOWER_BONUS_TICKS
+        rewards[ate] = 10.0
+
+        hit = alive & (self.mines[env, r, c] | self.wall_mask[r, c])
+        self.mines[env[hit], r[hit], c[hit]] = False
+        rewards[hit] = -100.0
+        dead |= hit
+
+        dead |= alive & (self.steps - self.last_food_step >= STARVATION_TICKS)
+        self.alive[dead] = False
+        return rewards, dead
+
+if __name__ == '__main__':
+    import time
+    env = VecPacManEnv(4096, seed=0)
+    ticks = 200
+    start = time.perf_counter()
+    for _ in range(ticks):
+        _, dones = env.step(env.rng.integers(0, 4, env.num_envs))
+        env.reset(dones)
+    elapsed = time.perf_counter() - start
+    print(f"{elapsed / (ticks * env.num_envs) * 1e6:.3f} µs pro Feld und Tick")
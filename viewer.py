@@ -0,0 +1,152 @@
+"""
+Schlanker pygame-Client für server.py: zeigt Spielfeld und Metriken des laufenden Trainings.
+Das Fenster kann jederzeit geschlossen und neu geöffnet werden, das Training läuft weiter.
+
+    python viewer.py [--host 127.0.0.1] [--port 8765] [--fps 10]
+
+Tasten: P Pause/Weiter, +/- Geschwindigkeit, 0 unbegrenzt, E/D Epsilon +/-0.05,
+S Snapshot, ESC Beenden.
+"""
+import argparse
+import json
+import socket
+import sys
+import numpy as np
+import pygame
+from field import create_grid
+from gridmodel import WALL, MINE, FLOWER, HOUSE
+from character import PacManAgent
+from renderer import GridRenderer
+from server import DEFAULT_PORT
+
+class ServerConnection:
+    """Nicht blockierender Socket mit zeilenweisem JSON-Protokoll."""
+    def __init__(self, host, port):
+        self.sock = socket.create_connection((host, port))
+        self.sock.setblocking(False)
+        self.buffer = b""
+
+    def send(self, message):
+        self.sock.sendall((json.dumps(message) + "\n").encode("utf-8"))
+
+    def receive(self):
+        """Alle vollständig empfangenen Nachrichten; None, wenn der Server die Verbindung beendet hat."""
+        try:
+            while True:
+                chunk = self.sock.recv(65536)
+                if not chunk:
+                    return None
+                self.buffer += chunk
+        except BlockingIOError:
+            pass
+        *lines, self.buffer = self.buffer.split(b"\n")
+        return [json.loads(line) for line in lines if line]
+
+    def close(self):
+        self.sock.close()
+
+def draw_metrics(screen, font, metrics, status):
+    lines = [
+        f"Gen {metrics.get('generation', '-')}: {metrics.get('survival', '-')} Ticks",
+        f"Record: Gen {metrics.get('record_generation', '-')} mit {metrics.get('record', '-')} Ticks",
+        f"Epsilon {metrics.get('epsilon', 0):.2f} | {metrics.get('steps_per_sec', 0):.0f} Schritte/s",
+        status,
+    ]
+    panel = pygame.Surface((320, len(lines) * font.get_linesize() + 10), pygame.SRCALPHA)
+    panel.fill((0, 0, 0, 160))
+    for i, line in enumerate(lines):
+        panel.blit(font.render(line, True, (255, 255, 255)), (10, 5 + i * font.get_linesize()))
+    return screen.blit(panel, (10, 10))
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Viewer für den Trainingsserver")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--fps", type=float, default=10, help="Spielfeld-Frames pro Sekunde vom Server")
+    parser.add_argument("--size", type=int, default=800, help="Fenstergröße in Pixeln")
+    args = parser.parse_args(argv)
+
+    connection = ServerConnection(args.host, args.port)
+    connection.send({"cmd": "frames", "fps": args.fps})
+    pygame.init()
+    screen = pygame.display.set_mode((args.size, args.size))
+    pygame.display.set_caption("Learning-Pac Viewer")
+    font = pygame.font.SysFont(None, 24)
+    clock = pygame.time.Clock()
+
+    grid = renderer = avatar = None
+    mines = flowers = None
+    metrics = {}
+    speed = None
+    epsilon = None
+    paused = False
+
+    running = True
+    while running:
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                running = False
+            elif event.type == pygame.KEYDOWN:
+                if event.key == pygame.K_ESCAPE:
+                    running = False
+                elif event.key == pygame.K_p:
+                    paused = not paused
+                    connection.send({"cmd": "pause" if paused else "resume"})
+                elif event.key in (pygame.K_PLUS, pygame.K_KP_PLUS, pygame.K_EQUALS):
+                    speed = 10.0 if speed is None else speed * 2
+                    connection.send({"cmd": "speed", "ticks_per_second": speed})
+                elif event.key in (pygame.K_MINUS, pygame.K_KP_MINUS) and speed is not None:
+                    speed = max(1.0, speed / 2)
+                    connection.send({"cmd": "speed", "ticks_per_second": speed})
+                elif event.key == pygame.K_0:
+                    speed = None
+                    connection.send({"cmd": "speed", "ticks_per_second": None})
+                elif event.key in (pygame.K_e, pygame.K_d) and epsilon is not None:
+                    epsilon = min(1.0, max(0.0, epsilon + (0.05 if event.key == pygame.K_e else -0.05)))
+                    connection.send({"cmd": "epsilon", "value": epsilon})
+                elif event.key == pygame.K_s:
+                    connection.send({"cmd": "snapshot"})
+
+        messages = connection.receive()
+        if messages is None:
+            break
+        for message in messages:
+            if message["type"] == "hello":
+                grid = create_grid(args.size, args.size, message["rows"], message["cols"])
+                grid.cell_type.reshape(-1)[message["walls"]] |= WALL
+                house = tuple(message["house"])
+                grid.set_cells([house], HOUSE)
+                mines, flowers = grid.layer(MINE), grid.layer(FLOWER)
+                renderer = GridRenderer(screen, grid, grid.layer(WALL), house)
+                renderer.redraw_all(mines, flowers)
+                avatar = PacManAgent(house, grid.cell_width, grid_shape=grid.shape)
+            elif message["type"] == "frame" and grid is not None:
+                # Nur Zellen neu zeichnen, deren Minen-/Blumenstatus sich geändert hat
+                before = grid.cell_type & (MINE | FLOWER)
+                mines.clear()
+                flowers.clear()
+                grid.cell_type.reshape(-1)[message["mines"]] |= MINE
+                grid.cell_type.reshape(-1)[message["flowers"]] |= FLOWER
+                changed = (grid.cell_type & (MINE | FLOWER)) != before
+                renderer.mark_cells(tuple(pos) for pos in np.argwhere(changed).tolist())
+                avatar.pos = tuple(message["pos"])
+            elif message["type"] == "generation":
+                metrics = message
+                epsilon = message["epsilon"]
+            elif message["type"] == "error":
+                print("Server:", message["message"])
+
+        if renderer is not None:
+            renderer.begin_frame(mines, flowers)
+            renderer.add_rect(avatar.draw(screen, grid))
+            status = "Pause" if paused else ("unbegrenzt" if speed is None else f"{speed:.0f} Ticks/s")
+            renderer.add_rect(draw_metrics(screen, font, metrics, status))
+            renderer.present()
+        clock.tick(30)
+
+    connection.close()
+    pygame.quit()
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())